@@ -2,33 +2,73 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
+from dataclasses import dataclass
+import json
 import time
 
+from pages.dom_snapshot import DEFAULT_SELECTOR, DomSnapshot, take_snapshot
+from utils import perf_history
+
+
+@dataclass(frozen=True)
+class WaitResult:
+    """Outcome of a readiness wait: which signal, how long it took, whether it fired."""
+    signal: str
+    waited_s: float
+    satisfied: bool
+
+
+_DOM_OBSERVER_SCRIPT = """
+if (!window.__qaMutationObserver) {
+  window.__qaLastMutation = performance.now();
+  window.__qaMutationObserver = new MutationObserver(function() {
+    window.__qaLastMutation = performance.now();
+  });
+  window.__qaMutationObserver.observe(document, {
+    subtree: true, childList: true, attributes: true, characterData: true
+  });
+}
+return performance.now() - window.__qaLastMutation;
+"""
+
+_ANIMATION_FRAMES_SCRIPT = """
+var frames = arguments[0], done = arguments[arguments.length - 1];
+(function tick(n) {
+  if (n <= 0) { done(true); return; }
+  requestAnimationFrame(function() { tick(n - 1); });
+})(frames);
+"""
+
+_NETWORK_START = "Network.requestWillBeSent"
+_NETWORK_END = ("Network.loadingFinished", "Network.loadingFailed")
+
+
 class BasePage:
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
-    
+        self.waits: list[WaitResult] = []
+
     def find_element(self, locator, timeout=10):
         return WebDriverWait(self.driver, timeout).until(
             EC.presence_of_element_located(locator)
         )
-    
+
     def find_elements(self, locator):
         return self.driver.find_elements(*locator)
-    
+
     def click(self, locator):
         element = self.wait.until(EC.element_to_be_clickable(locator))
         element.click()
-    
+
     def input_text(self, locator, text):
         element = self.find_element(locator)
         element.clear()
         element.send_keys(text)
-    
+
     def get_text(self, locator):
         return self.find_element(locator).text
-    
+
     def is_element_visible(self, locator, timeout=5):
         try:
             WebDriverWait(self.driver, timeout).until(
@@ -37,21 +77,137 @@ class BasePage:
             return True
         except TimeoutException:
             return False
-    
+
     def scroll_to_element(self, locator):
         element = self.find_element(locator)
         self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
-        time.sleep(0.5)
-    
+        self.wait_for_animation_frames()
+
     def take_screenshot(self, name):
         from config.config import Config
         filepath = f"{Config.SCREENSHOTS_DIR}/{name}_{int(time.time())}.png"
         self.driver.save_screenshot(filepath)
         return filepath
-    
+
+    def snapshot(self, selector=DEFAULT_SELECTOR, limit=5000) -> DomSnapshot:
+        """Digest of all elements matching selector, fetched in a single script call."""
+        return take_snapshot(self.driver, selector, limit)
+
     def get_page_load_time(self):
         navigation_start = self.driver.execute_script("return window.performance.timing.navigationStart")
         load_complete = self.driver.execute_script("return window.performance.timing.loadEventEnd")
-        return (load_complete - navigation_start) / 1000.0
+        load_s = (load_complete - navigation_start) / 1000.0
+        perf_history.record("page_load_s", load_s, page=perf_history.page_key(self.driver.current_url))
+        return load_s
+
+    # ---- Readiness waits -------------------------------------------------
+    # Each wait returns a WaitResult (also appended to self.waits) instead of
+    # sleeping a fixed amount.
+
+    def _record(self, signal, start, satisfied):
+        result = WaitResult(signal=signal, waited_s=time.monotonic() - start, satisfied=satisfied)
+        self.waits.append(result)
+        return result
+
+    def wait_for_network_idle(self, idle_ms=500, timeout=10, max_inflight=0):
+        """Wait until no more than max_inflight requests are pending for idle_ms.
+
+        Tracks CDP Network events from Chrome's performance log; falls back to
+        resource-timing entry counts when that log is unavailable.
+        """
+        start = time.monotonic()
+        try:
+            # The first batch holds the events since the last read, i.e. this page's
+            # requests so far (the pool drains the log between tests).
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return self._wait_for_resource_quiet(start, idle_ms, timeout)
 
+        inflight = set()
+        last_activity = time.monotonic()
+        while time.monotonic() - start < timeout:
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError, TypeError):
+                    continue
+                method = message.get("method")
+                request_id = (message.get("params") or {}).get("requestId")
+                if method == _NETWORK_START:
+                    inflight.add(request_id)
+                    last_activity = time.monotonic()
+                elif method in _NETWORK_END:
+                    inflight.discard(request_id)
+                    last_activity = time.monotonic()
+            quiet_s = time.monotonic() - last_activity
+            if len(inflight) <= max_inflight and quiet_s * 1000 >= idle_ms:
+                return self._record("network_idle", start, True)
+            time.sleep(0.05)
+            entries = self.driver.get_log("performance")
+        return self._record("network_idle", start, False)
+
+    def _wait_for_resource_quiet(self, start, idle_ms, timeout):
+        script = "return performance.getEntriesByType('resource').length;"
+        last_count = None
+        last_change = time.monotonic()
+        while time.monotonic() - start < timeout:
+            try:
+                count = self.driver.execute_script(script)
+            except Exception:
+                count = None
+            if count != last_count:
+                last_count = count
+                last_change = time.monotonic()
+            elif (time.monotonic() - last_change) * 1000 >= idle_ms:
+                return self._record("network_idle", start, True)
+            time.sleep(0.05)
+        return self._record("network_idle", start, False)
+
+    def wait_for_dom_quiet(self, quiet_ms=300, timeout=10):
+        """Wait until an injected MutationObserver has seen no mutation for quiet_ms."""
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            try:
+                since_last = self.driver.execute_script(_DOM_OBSERVER_SCRIPT)
+            except Exception:
+                since_last = None
+            if since_last is not None and since_last >= quiet_ms:
+                return self._record("dom_quiet", start, True)
+            time.sleep(0.05)
+        return self._record("dom_quiet", start, False)
+
+    def row_count(self, rows_css):
+        try:
+            return int(self.driver.execute_script(
+                "return document.querySelectorAll(arguments[0]).length;", rows_css
+            ))
+        except Exception:
+            return 0
+
+    def wait_for_row_count_change(self, rows_css, previous, timeout=5):
+        """Wait until the number of elements matching rows_css differs from previous."""
+        start = time.monotonic()
+        while time.monotonic() - start < timeout:
+            if self.row_count(rows_css) != previous:
+                return self._record("row_count_change", start, True)
+            time.sleep(0.05)
+        return self._record("row_count_change", start, False)
+
+    def wait_for_animation_frames(self, frames=2):
+        """Wait for the browser to paint `frames` requestAnimationFrame ticks."""
+        start = time.monotonic()
+        try:
+            self.driver.execute_async_script(_ANIMATION_FRAMES_SCRIPT, frames)
+            return self._record("animation_frames", start, True)
+        except Exception:
+            return self._record("animation_frames", start, False)
 
+    def wait_until_ready(self, idle_ms=500, timeout=10):
+        """Network idle, then DOM quiet, then a settled frame."""
+        start = time.monotonic()
+        results = [
+            self.wait_for_network_idle(idle_ms=idle_ms, timeout=timeout),
+            self.wait_for_dom_quiet(timeout=timeout),
+            self.wait_for_animation_frames(),
+        ]
+        return self._record("ready", start, all(r.satisfied for r in results))
@@ -0,0 +1,161 @@
+"""One-round-trip DOM digest that page objects can query locally.
+
+``BasePage.snapshot()`` runs a single ``execute_script`` that serializes tag,
+text, key attributes, visibility and bounding box for every element matching a
+selector. Queries then run in Python; only the nodes a test actually needs to
+interact with are turned back into WebElements via ``live()`` (one more call).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+DEFAULT_SELECTOR = (
+    "a, button, input, select, textarea, label, img, "
+    "h1, h2, h3, h4, h5, h6, nav, header, footer, main, section, form, [role]"
+)
+
+_ATTRIBUTES = ("id", "class", "name", "type", "role", "aria-label", "title", "alt", "src", "target", "rel")
+
+_SNAPSHOT_SCRIPT = """
+var selector = arguments[0], limit = arguments[1], attrNames = arguments[2];
+var els = Array.prototype.slice.call(document.querySelectorAll(selector), 0, limit);
+var token = Date.now().toString(36) + Math.random().toString(36).slice(2);
+window.__qaSnapshot = {token: token, els: els};
+var sx = window.scrollX, sy = window.scrollY, nodes = [];
+for (var i = 0; i < els.length; i++) {
+  var el = els[i], r = el.getBoundingClientRect(), cs = window.getComputedStyle(el), own = '';
+  for (var c = el.firstChild; c; c = c.nextSibling) { if (c.nodeType === 3) own += c.nodeValue; }
+  var attrs = {};
+  for (var a = 0; a < attrNames.length; a++) {
+    var v = el.getAttribute(attrNames[a]);
+    if (v !== null) attrs[attrNames[a]] = v;
+  }
+  if (el.href !== undefined && typeof el.href === 'string') attrs.href = el.href;
+  else if (el.getAttribute('href') !== null) attrs.href = el.getAttribute('href');
+  nodes.push([
+    el.tagName.toLowerCase(),
+    (el.textContent || '').replace(/\\s+/g, ' ').trim().slice(0, 500),
+    own.replace(/\\s+/g, ' ').trim(),
+    attrs,
+    r.width > 0 && r.height > 0 && cs.visibility !== 'hidden' && cs.display !== 'none' && cs.opacity !== '0',
+    !el.disabled,
+    [r.left + sx, r.top + sy, r.width, r.height]
+  ]);
+}
+return {token: token, url: location.href, title: document.title, nodes: nodes};
+"""
+
+_LIVE_SCRIPT = """
+var snap = window.__qaSnapshot;
+if (!snap || snap.token !== arguments[0]) return null;
+return arguments[1].map(function(i) { return snap.els[i]; });
+"""
+
+
+@dataclass(frozen=True)
+class SnapshotNode:
+    index: int
+    tag: str
+    text: str
+    own_text: str
+    attrs: dict
+    visible: bool
+    enabled: bool
+    rect: tuple[float, float, float, float]
+
+    @property
+    def href(self) -> str:
+        return self.attrs.get("href", "")
+
+    def attr(self, name: str, default: str = "") -> str:
+        return self.attrs.get(name, default)
+
+    @property
+    def clickable(self) -> bool:
+        return self.visible and self.enabled
+
+
+def _contains_any(haystack: str, needles: str | Iterable[str]) -> bool:
+    if isinstance(needles, str):
+        needles = (needles,)
+    return any(n in haystack for n in needles)
+
+
+class DomSnapshot:
+    def __init__(self, driver, payload: dict):
+        self.driver = driver
+        self.token: str = payload.get("token", "")
+        self.url: str = payload.get("url", "")
+        self.title: str = payload.get("title", "")
+        self.nodes: tuple[SnapshotNode, ...] = tuple(
+            SnapshotNode(i, tag, text, own, attrs or {}, bool(visible), bool(enabled), tuple(rect))
+            for i, (tag, text, own, attrs, visible, enabled, rect) in enumerate(payload.get("nodes") or [])
+        )
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def find_all(
+        self,
+        tag: str | tuple[str, ...] | None = None,
+        *,
+        text: str | Iterable[str] | None = None,
+        own_text: str | Iterable[str] | None = None,
+        href: str | Iterable[str] | None = None,
+        visible: bool | None = None,
+        where: Callable[[SnapshotNode], bool] | None = None,
+        **attrs: str,
+    ) -> list[SnapshotNode]:
+        """Nodes matching every given filter.
+
+        ``text``/``own_text``/``href`` are substring matches (any of several values),
+        mirroring XPath ``contains(., ...)`` / ``contains(text(), ...)``. Extra
+        keyword arguments match attributes exactly (``aria_label`` -> ``aria-label``).
+        """
+        tags = (tag,) if isinstance(tag, str) else tag
+        wanted = {name.replace("_", "-"): value for name, value in attrs.items()}
+        found = []
+        for node in self.nodes:
+            if tags and node.tag not in tags:
+                continue
+            if text is not None and not _contains_any(node.text, text):
+                continue
+            if own_text is not None and not _contains_any(node.own_text, own_text):
+                continue
+            if href is not None and not _contains_any(node.href, href):
+                continue
+            if visible is not None and node.visible != visible:
+                continue
+            if any(node.attrs.get(name) != value for name, value in wanted.items()):
+                continue
+            if where is not None and not where(node):
+                continue
+            found.append(node)
+        return found
+
+    def find(self, tag=None, **filters) -> SnapshotNode | None:
+        matches = self.find_all(tag, **filters)
+        return matches[0] if matches else None
+
+    def exists(self, tag=None, **filters) -> bool:
+        return self.find(tag, **filters) is not None
+
+    def first_clickable(self, tag=None, **filters) -> SnapshotNode | None:
+        """First visible, enabled match; the local equivalent of selenium_actions.first_clickable."""
+        return next((n for n in self.find_all(tag, **filters) if n.clickable), None)
+
+    def live(self, nodes: SnapshotNode | Iterable[SnapshotNode]):
+        """Resolve node(s) to WebElements in one call; raises if the page changed since."""
+        single = isinstance(nodes, SnapshotNode)
+        batch = [nodes] if single else list(nodes)
+        elements = self.driver.execute_script(_LIVE_SCRIPT, self.token, [n.index for n in batch])
+        if elements is None:
+            raise StaleElementReferenceException("DOM snapshot is stale (page navigated or re-snapshotted)")
+        return elements[0] if single else elements
+
+
+def take_snapshot(driver, selector: str = DEFAULT_SELECTOR, limit: int = 5000) -> DomSnapshot:
+    return DomSnapshot(driver, driver.execute_script(_SNAPSHOT_SCRIPT, selector, limit, list(_ATTRIBUTES)) or {})
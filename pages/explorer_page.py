@@ -1,6 +1,5 @@
 from selenium.webdriver.common.by import By
 from .base_page import BasePage
-import time
 
 class ExplorerPage(BasePage):
     """
@@ -12,6 +11,7 @@ class ExplorerPage(BasePage):
     FLIGHT_TABLE = (By.ID, "planesTable")
     LOGIN_LINK = (By.XPATH, "//a[contains(@href, '/login') or contains(text(), 'Sign in')]")
     FLIGHT_DETAILS_PANEL = (By.ID, "selected_infoblock")
+    FLIGHT_ROWS_CSS = "#planesTable tr"
 
     def is_map_visible(self):
         """Check if the map container is visible and loaded."""
@@ -20,10 +20,13 @@ class ExplorerPage(BasePage):
     def search_for_flight(self, identifier):
         """
         Searches for a flight using its ICAO24, callsign, or other identifier.
+        Returns the WaitResult of the client-side filtering settling.
         """
-        # Enter search text and wait briefly for client-side filtering to apply.
+        # Wait for the table to re-filter, then for DOM updates to settle.
+        before = self.row_count(self.FLIGHT_ROWS_CSS)
         self.input_text(self.SEARCH_INPUT, identifier)
-        time.sleep(2)
+        self.wait_for_row_count_change(self.FLIGHT_ROWS_CSS, before, timeout=2)
+        return self.wait_for_dom_quiet(quiet_ms=200, timeout=2)
 
     def select_flight_from_table_by_callsign(self, callsign):
         """
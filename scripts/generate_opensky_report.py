@@ -28,7 +28,7 @@ def main() -> int:
     output_path = Path(args.output)
 
     md = input_path.read_text(encoding="utf-8", errors="replace")
-    markdown_to_pdf(md, output_path)
+    markdown_to_pdf(md, output_path, base_dir=input_path.parent)
     print(f"Wrote {output_path}")
     return 0
 
@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import re
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -30,7 +31,22 @@ class RuntimeSettings:
     link_check_max: int
     link_check_timeout_s: float
     link_check_delay_s: float
+    link_check_workers: int
+    link_check_per_host: int
     check_external_links: bool
+    crawl_max_pages: int
+    crawl_max_depth: int
+    crawl_checkpoint: Path | None
+    crawl_resume: bool
+    driver_pool_size: int
+    driver_max_uses: int
+    driver_max_memory_mb: float
+    perf_iterations: int
+    perf_warmup: int
+    responsive_tabs: int
+    load_profile: str
+    load_max_vus: int
+    load_max_duration_s: float
     jira_create_on_fail: bool
     jira_project: str | None
     jira_issue_type: str
@@ -54,6 +70,32 @@ def pytest_addoption(parser):
         default="https://map.opensky-network.org/",
         help="OpenSky public map URL",
     )
+    parser.addoption(
+        "--mirror",
+        action="store_true",
+        default=False,
+        help="Serve the captured *.htm snapshots locally and point --base-url/--map-url at them",
+    )
+    parser.addoption(
+        "--mirror-assets",
+        action="store",
+        default=None,
+        help="Directory of captured sub-resources served by the mirror (URL path layout)",
+    )
+    parser.addoption(
+        "--mirror-latency-ms",
+        action="store",
+        type=float,
+        default=0.0,
+        help="Latency injected by the mirror before each response",
+    )
+    parser.addoption(
+        "--mirror-bandwidth-kbps",
+        action="store",
+        type=float,
+        default=0.0,
+        help="Per-connection bandwidth cap applied by the mirror (0 = unlimited)",
+    )
     parser.addoption(
         "--artifacts-dir",
         action="store",
@@ -91,7 +133,80 @@ def pytest_addoption(parser):
         action="store",
         type=float,
         default=0.0,
-        help="Delay (seconds) between link integrity requests",
+        help="Minimum delay (seconds) between link integrity requests to the same host",
+    )
+    parser.addoption(
+        "--link-check-workers",
+        action="store",
+        type=int,
+        default=8,
+        help="Max concurrent link integrity requests (all hosts)",
+    )
+    parser.addoption(
+        "--link-check-per-host",
+        action="store",
+        type=int,
+        default=4,
+        help="Max concurrent link integrity requests per host",
+    )
+    parser.addoption(
+        "--rate-limit",
+        action="store",
+        type=float,
+        default=8.0,
+        help="Initial requests/s per host for HTTP checks, Jira and load scenarios; adapts (AIMD) on 403/429/503 (0 disables)",
+    )
+    parser.addoption(
+        "--rate-limit-max",
+        action="store",
+        type=float,
+        default=50.0,
+        help="Ceiling for the adapted per-host request rate",
+    )
+    parser.addoption(
+        "--http-retries",
+        action="store",
+        type=int,
+        default=3,
+        help="Retries for throttled (429/503) requests, honouring Retry-After, else jittered exponential backoff",
+    )
+    parser.addoption(
+        "--url-cache-ttl",
+        action="store",
+        type=float,
+        default=600.0,
+        help="Seconds a URL verdict is reused across pages/tests (0 disables the cache)",
+    )
+    parser.addoption(
+        "--url-cache-size",
+        action="store",
+        type=int,
+        default=2048,
+        help="Max URL verdicts kept in the session cache (LRU eviction)",
+    )
+    parser.addoption(
+        "--validator-cache",
+        action="store",
+        default=str(Path("reports") / "http_validators.sqlite"),
+        help="SQLite file of ETag/Last-Modified validators reused across runs",
+    )
+    parser.addoption(
+        "--no-validator-cache",
+        action="store_true",
+        default=False,
+        help="Always send unconditional requests (ignore the validator cache)",
+    )
+    parser.addoption(
+        "--http-record",
+        action="store",
+        default=None,
+        help="Record requests-based traffic (link checks, headers) into this archive",
+    )
+    parser.addoption(
+        "--http-replay",
+        action="store",
+        default=None,
+        help="Serve requests-based traffic from this archive (no network)",
     )
     parser.addoption(
         "--check-external-links",
@@ -99,6 +214,238 @@ def pytest_addoption(parser):
         default=False,
         help="Also check external links (may be noisy/slow)",
     )
+    parser.addoption(
+        "--crawl-max-pages",
+        action="store",
+        type=int,
+        default=200,
+        help="Pages the site crawl test may expand (robots.txt/sitemap.xml seeded)",
+    )
+    parser.addoption(
+        "--crawl-depth",
+        action="store",
+        type=int,
+        default=3,
+        help="Max link depth from the base URL for the site crawl test",
+    )
+    parser.addoption(
+        "--crawl-checkpoint",
+        action="store",
+        default=None,
+        help="Checkpoint file for the site crawl (frontier, seen-set, findings)",
+    )
+    parser.addoption(
+        "--crawl-resume",
+        action="store_true",
+        default=False,
+        help="Resume the site crawl from --crawl-checkpoint",
+    )
+
+    parser.addoption(
+        "--driver-pool-size",
+        action="store",
+        type=int,
+        default=1,
+        help="Browsers pre-launched per process/xdist worker",
+    )
+    parser.addoption(
+        "--driver-max-uses",
+        action="store",
+        type=int,
+        default=25,
+        help="Recycle a pooled browser after this many tests",
+    )
+    parser.addoption(
+        "--driver-max-memory-mb",
+        action="store",
+        type=float,
+        default=512.0,
+        help="Recycle a pooled browser when a test leaves more page JS heap in use than this (0 disables)",
+    )
+
+    parser.addoption(
+        "--perf-iterations",
+        action="store",
+        type=int,
+        default=5,
+        help="Measured page loads per performance test (after warmup)",
+    )
+    parser.addoption(
+        "--perf-warmup",
+        action="store",
+        type=int,
+        default=1,
+        help="Page loads discarded before sampling in performance tests",
+    )
+    parser.addoption(
+        "--responsive-tabs",
+        action="store",
+        type=int,
+        default=4,
+        help="Tabs loading viewport emulations concurrently in the responsive suite",
+    )
+    parser.addoption(
+        "--visual-diff",
+        action="store_true",
+        default=False,
+        help="Compare RWD/CB screenshots with baselines in reports/screenshots/baseline at session end",
+    )
+    parser.addoption(
+        "--visual-approve",
+        action="store_true",
+        default=False,
+        help="Accept this run's RWD/CB screenshots as the new visual baselines",
+    )
+    parser.addoption(
+        "--visual-ssim-threshold",
+        action="store",
+        type=float,
+        default=0.98,
+        help="Per-tile SSIM below which a screenshot tile counts as changed",
+    )
+    parser.addoption(
+        "--run-load",
+        action="store_true",
+        default=False,
+        help="Run the load-engine scenarios (marked 'load_scenario'); they are skipped by default",
+    )
+    parser.addoption(
+        "--load-profile",
+        action="store",
+        default="smoke",
+        choices=("smoke", "full"),
+        help="Load scenarios: 'smoke' scales them down, 'full' runs the original shapes and durations",
+    )
+    parser.addoption(
+        "--load-max-vus",
+        action="store",
+        type=int,
+        default=5,
+        help="Peak virtual users per load scenario in the smoke profile",
+    )
+    parser.addoption(
+        "--load-max-duration",
+        action="store",
+        type=float,
+        default=10.0,
+        help="Seconds per load scenario in the smoke profile",
+    )
+    parser.addoption(
+        "--perf-history",
+        action="store",
+        default=str(Path("reports") / "perf_history"),
+        help="Directory of per-run performance history files (Parquet, or gzip CSV without pyarrow)",
+    )
+    parser.addoption(
+        "--no-perf-history",
+        action="store_true",
+        default=False,
+        help="Do not record performance history or check for regressions",
+    )
+    parser.addoption(
+        "--perf-baseline-window",
+        action="store",
+        type=int,
+        default=10,
+        help="Number of earlier runs forming the regression baseline",
+    )
+    parser.addoption(
+        "--perf-regression-threshold",
+        action="store",
+        type=float,
+        default=0.05,
+        help="Minimum relative median slowdown reported as a regression (0.05 = 5%%)",
+    )
+    parser.addoption(
+        "--perf-fail-on-regression",
+        action="store_true",
+        default=False,
+        help="Fail the session when a performance regression is detected",
+    )
+
+    parser.addoption(
+        "--artifact-workers",
+        action="store",
+        type=int,
+        default=2,
+        help="Background threads per stage (write, upload) for failure artifacts",
+    )
+    parser.addoption(
+        "--artifact-queue-size",
+        action="store",
+        type=int,
+        default=16,
+        help="Pending failure artifact jobs per stage before the test run waits",
+    )
+    parser.addoption(
+        "--artifact-flush-timeout",
+        action="store",
+        type=float,
+        default=120.0,
+        help="Seconds to wait at session end for pending artifact writes/uploads",
+    )
+
+    parser.addoption(
+        "--artifact-max-age-days",
+        action="store",
+        type=float,
+        default=14.0,
+        help="Drop stored failure artifacts older than this at session end",
+    )
+    parser.addoption(
+        "--artifact-max-mb",
+        action="store",
+        type=float,
+        default=500.0,
+        help="Evict the oldest failure artifacts beyond this total blob size (0 disables)",
+    )
+
+    parser.addoption(
+        "--changed-only",
+        action="store_true",
+        default=False,
+        help="Run only tests whose target pages changed since the last run (fingerprints of PAGES/TARGETS/RWD_MATRIX)",
+    )
+    parser.addoption(
+        "--full-run-every",
+        action="store",
+        type=int,
+        default=10,
+        help="With --changed-only, force a full run every N runs (0 = never)",
+    )
+    parser.addoption(
+        "--change-state",
+        action="store",
+        default=str(Path("reports") / "change_impact.json"),
+        help="Page fingerprints and run counter used by --changed-only",
+    )
+
+    parser.addoption(
+        "--durations-path",
+        action="store",
+        default=str(Path("reports") / "test_durations.json"),
+        help="Per-test duration history used for sharding and xdist ordering",
+    )
+    parser.addoption(
+        "--no-durations",
+        action="store_true",
+        default=False,
+        help="Ignore recorded durations (shards balance by test count) and do not record new ones",
+    )
+    parser.addoption(
+        "--shard-count",
+        action="store",
+        type=int,
+        default=1,
+        help="Split the collected tests into this many duration-balanced shards (e.g. CI nodes)",
+    )
+    parser.addoption(
+        "--shard-index",
+        action="store",
+        type=int,
+        default=0,
+        help="Which shard (0-based) this node runs; see --shard-count",
+    )
 
     parser.addoption(
         "--jira-create-on-fail",
@@ -109,6 +456,524 @@ def pytest_addoption(parser):
     parser.addoption("--jira-project", action="store", default=None, help="Jira project key (e.g. QA)")
     parser.addoption("--jira-issue-type", action="store", default="Bug", help="Jira issue type")
     parser.addoption("--jira-label", action="store", default=None, help="Optional Jira label")
+    parser.addoption(
+        "--jira-batch",
+        action="store_true",
+        default=False,
+        help="Queue failures and file them at session end (grouped, bulk-created) instead of one by one",
+    )
+    parser.addoption(
+        "--jira-upload-workers",
+        action="store",
+        type=int,
+        default=4,
+        help="Concurrent Jira attachment uploads",
+    )
+
+
+def pytest_configure(config):
+    from utils.artifact_pipeline import ArtifactPipeline
+    from utils.rate_limiter import LIMITER
+    from utils.web_audit import URL_CACHE, set_validator_store
+
+    config._artifact_pipeline = ArtifactPipeline(
+        write_workers=int(config.getoption("--artifact-workers")),
+        upload_workers=int(config.getoption("--artifact-workers")),
+        maxsize=int(config.getoption("--artifact-queue-size")),
+        on_error=lambda stage, label, exc: logger.warning(f"[ART] {stage} failed for {label}: {exc}"),
+    )
+    config._jira_filer = _make_jira_filer(config) if config.getoption("--jira-create-on-fail") else None
+
+    shard_count, shard_index = int(config.getoption("--shard-count")), int(config.getoption("--shard-index"))
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise pytest.UsageError(f"--shard-index must be in [0, {shard_count}) and --shard-count >= 1")
+    if not config.getoption("--no-durations"):
+        from utils.test_sharding import DurationStore
+
+        config._duration_store = DurationStore(Path(config.getoption("--durations-path")))
+        config.pluginmanager.register(_DurationRecorder(config._duration_store), "duration-recorder")
+
+    if config.getoption("--mirror"):
+        from utils.mirror_server import MirrorServer, MirrorSite
+
+        assets = config.getoption("--mirror-assets")
+        mirror = MirrorServer(
+            MirrorSite(
+                assets_dir=Path(assets) if assets else None,
+                latency_ms=float(config.getoption("--mirror-latency-ms")),
+                bandwidth_kbps=float(config.getoption("--mirror-bandwidth-kbps")),
+            )
+        ).start()
+        config._mirror_server = mirror
+        config.option.base_url = mirror.base_url
+        config.option.map_url = mirror.map_url
+        # Many tests read Config.BASE_URL directly.
+        Config.BASE_URL = mirror.base_url
+        logger.info(f"[MIRROR] serving snapshots at {mirror.base_url}")
+
+    URL_CACHE.configure(
+        ttl_s=float(config.getoption("--url-cache-ttl")),
+        max_entries=int(config.getoption("--url-cache-size")),
+    )
+    LIMITER.configure(
+        rate=max(0.0, float(config.getoption("--rate-limit"))),
+        max_rate=float(config.getoption("--rate-limit-max")),
+        max_retries=int(config.getoption("--http-retries")),
+    )
+
+    record_path = config.getoption("--http-record")
+    replay_path = config.getoption("--http-replay")
+    if record_path and replay_path:
+        raise pytest.UsageError("Use either --http-record or --http-replay, not both.")
+    if record_path or replay_path:
+        from utils import http_archive
+
+        mode = "record" if record_path else "replay"
+        xdist_controller = not hasattr(config, "workerinput") and getattr(config.option, "dist", "no") != "no"
+        if mode == "record" and xdist_controller:
+            # Workers record their own traffic; the controller only clears the previous run.
+            http_archive.clear_archives(Path(record_path))
+        else:
+            http_archive.activate(mode, Path(record_path or replay_path))
+            config._http_archive_active = True
+            logger.info(f"[HAR] {mode}: {record_path or replay_path}")
+
+    # After --mirror/--http-replay, so the pages fingerprinted are the ones the tests will hit.
+    if config.getoption("--changed-only"):
+        config.pluginmanager.register(_ChangeImpactSelector.from_config(config), "change-impact")
+
+    # Replayed responses are already deterministic; conditional requests would only miss.
+    if not config.getoption("--no-validator-cache") and not replay_path:
+        from utils.validator_store import ValidatorStore
+
+        store = ValidatorStore(Path(config.getoption("--validator-cache")))
+        set_validator_store(store)
+        config._validator_store = store
+
+    if not config.getoption("--no-perf-history"):
+        from utils import perf_history
+
+        workerinput = getattr(config, "workerinput", None)
+        perf_history.activate(
+            perf_history.PerfHistory(
+                Path(config.getoption("--perf-history")),
+                commit=perf_history.current_commit(),
+                browser=(config.getoption("--browser") or "chrome").lower(),
+                # xdist workers share the controller's run_id and write one part each.
+                run_id=workerinput.get("perf_run_id") if workerinput else None,
+                part=workerinput["workerid"] if workerinput else "",
+            )
+        )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    from utils import perf_history
+
+    history = perf_history.active()
+    if history is not None:
+        node.workerinput["perf_run_id"] = history.run_id
+
+
+def _make_jira_filer(config):
+    from utils.jira_client import FailureFiler, JiraClient
+
+    batch = bool(config.getoption("--jira-batch"))
+    spool_dir = Path(config.getoption("--artifacts-dir")) / "jira-spool"
+    if batch and hasattr(config, "workerinput"):
+        # Workers only spool their failures: the controller files them in one flush, so a
+        # signature seen on two workers becomes one issue.
+        return _JiraSpool(spool_dir / f"{config.workerinput['workerid']}.json")
+    if batch:
+        for stale in spool_dir.glob("*.json"):
+            stale.unlink(missing_ok=True)
+    try:
+        client = JiraClient.from_env(max_workers=int(config.getoption("--jira-upload-workers")))
+    except RuntimeError as exc:
+        logger.warning(f"[JIRA] disabled: {exc}")
+        return None
+    label = config.getoption("--jira-label")
+    return FailureFiler(
+        client,
+        project_key=config.getoption("--jira-project"),
+        issue_type=str(config.getoption("--jira-issue-type") or "Bug"),
+        labels=[label] if label else [],
+        batch=batch,
+    )
+
+
+class _JiraSpool:
+    """Batch-mode stand-in for FailureFiler on an xdist worker; written at session end."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: list[dict] = []
+
+    def report(self, failure) -> None:
+        entry = {
+            "nodeid": failure.nodeid,
+            "message": failure.message,
+            "summary": failure.summary,
+            "description": failure.description,
+            "attachments": [{"filename": a.filename, "key": a.key} for a in failure.attachments if a.key],
+        }
+        with self._lock:
+            self._entries.append(entry)
+        return None
+
+    def write(self) -> None:
+        with self._lock:
+            entries = list(self._entries)
+        if not entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(entries), encoding="utf-8")
+        logger.info(f"[JIRA] spooled {len(entries)} failures for the controller: {self.path}")
+
+
+def _spooled_failures(config) -> list:
+    """Failures spooled by xdist workers in batch mode (the files are consumed)."""
+    from utils.jira_client import Failure
+
+    root = Path(config.getoption("--artifacts-dir"))
+    store = _artifact_store(root)
+    failures = []
+    for path in sorted((root / "jira-spool").glob("*.json")):
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning(f"[JIRA] unreadable spool {path}: {exc}")
+            continue
+        finally:
+            path.unlink(missing_ok=True)
+        for entry in entries:
+            failures.append(Failure(
+                nodeid=entry["nodeid"],
+                message=entry["message"],
+                summary=entry["summary"],
+                description=entry["description"],
+                attachments=[_jira_attachment(store, a["key"], a["filename"]) for a in entry["attachments"]],
+            ))
+    return failures
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    from utils.test_sharding import DurationStore, longest_files_first, shard_nodeids
+
+    if not config.getoption("--run-load"):
+        # Load scenarios put real traffic on the target site; they only run when asked for.
+        skip_load = pytest.mark.skip(reason="load scenario: pass --run-load to run it")
+        for item in items:
+            if item.get_closest_marker("load_scenario") is not None:
+                item.add_marker(skip_load)
+
+    store = getattr(config, "_duration_store", None)
+    if store is None:
+        # --no-durations: shards are still balanced, by test count.
+        store = DurationStore(Path(config.getoption("--durations-path")), load=False)
+
+    shard_count = int(config.getoption("--shard-count"))
+    if shard_count > 1:
+        shard_index = int(config.getoption("--shard-index"))
+        keep = shard_nodeids([item.nodeid for item in items], store, count=shard_count, index=shard_index)
+        deselected = [item for item in items if item.nodeid not in keep]
+        items[:] = [item for item in items if item.nodeid in keep]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        estimate = sum(store.estimate(item.nodeid) for item in items)
+        logger.info(f"[SHARD] {shard_index + 1}/{shard_count}: {len(items)} tests, ~{estimate:.0f}s estimated")
+
+    # Under xdist, hand the heaviest files out first (every worker computes the same order).
+    if getattr(config.option, "dist", "no") != "no" or hasattr(config, "workerinput"):
+        order = {nodeid: n for n, nodeid in enumerate(longest_files_first([item.nodeid for item in items], store))}
+        items.sort(key=lambda item: order[item.nodeid])
+
+
+class _DurationRecorder:
+    """Collects call durations from reports; on the controller this includes xdist workers' reports."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def pytest_runtest_logreport(self, report):
+        if report.when != "call":
+            return
+        for name, value in report.user_properties:
+            if name == "duration_s":
+                self.store.record(report.nodeid, value)
+
+
+def _item_pages(item) -> set[str]:
+    """Target pages a test touches, from its ``path`` / ``pages`` parameters and ``pages`` markers."""
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    pages = set()
+    if isinstance(params.get("path"), str):
+        pages.add(params["path"].strip())
+    if isinstance(params.get("pages"), (list, tuple)):
+        pages.update(p.strip() for p in params["pages"])
+    for marker in item.iter_markers("pages"):
+        pages.update(p.strip() for p in marker.args)
+    return pages
+
+
+class _ChangeImpactSelector:
+    """--changed-only: deselects tests whose pages kept their fingerprint.
+
+    The controller fingerprints the pages once and hands the verdict to xdist
+    workers through workerinput, so every worker selects the same tests.
+    Tests not tied to a target page (no ``path``/``pages`` parameter and no
+    ``pages`` marker) always run.
+    """
+
+    def __init__(self, *, full_run: bool, changed: set[str], known: set[str], selection=None, state=None):
+        self.full_run = full_run
+        self.changed = changed
+        self.known = known
+        self.selection = selection
+        self.state = state
+        self.failed_paths: set[str] = set()
+        self.passed_paths: set[str] = set()
+
+    @classmethod
+    def from_config(cls, config) -> "_ChangeImpactSelector":
+        workerinput = getattr(config, "workerinput", None)
+        if workerinput is not None:
+            verdict = workerinput.get("change_impact") or {"full_run": True, "changed": [], "known": []}
+            return cls(full_run=verdict["full_run"], changed=set(verdict["changed"]), known=set(verdict["known"]))
+
+        from utils import change_impact
+
+        state = change_impact.ChangeState.load(Path(config.getoption("--change-state")))
+        fingerprints = change_impact.fingerprint_pages(
+            str(config.getoption("--base-url")), change_impact.target_paths()
+        )
+        selection = change_impact.plan(state, fingerprints, full_run_every=int(config.getoption("--full-run-every")))
+        logger.info(
+            f"[IMPACT] {'full run: ' if selection.full_run else ''}{selection.reason}"
+            + (f"; changed: {', '.join(sorted(selection.changed))}" if selection.changed else "")
+        )
+        return cls(
+            full_run=selection.full_run,
+            changed=set(selection.changed),
+            known=set(fingerprints),
+            selection=selection,
+            state=state,
+        )
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        node.workerinput["change_impact"] = {
+            "full_run": self.full_run,
+            "changed": sorted(self.changed),
+            "known": sorted(self.known),
+        }
+
+    def affected(self, item) -> bool:
+        pages = _item_pages(item)
+        if not pages:
+            # Nothing says which pages it depends on, so it cannot be skipped safely.
+            return True
+        # Pages outside the fingerprinted set have no history: run their tests.
+        return bool(pages & self.changed or pages - self.known)
+
+    def pytest_collection_modifyitems(self, config, items):
+        if self.full_run:
+            return
+        deselected = [item for item in items if not self.affected(item)]
+        if not deselected:
+            return
+        items[:] = [item for item in items if self.affected(item)]
+        config.hook.pytest_deselected(items=deselected)
+        logger.info(f"[IMPACT] running {len(items)} tests, {len(deselected)} deselected (pages unchanged)")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        # Reports share the item's user_properties list; tag it once. The pages travel
+        # with the report, so the controller also sees them for xdist workers' tests.
+        pages = _item_pages(item)
+        if pages and not any(name == "pages" for name, _ in report.user_properties):
+            report.user_properties.append(("pages", sorted(pages)))
+
+    def pytest_runtest_logreport(self, report):
+        pages = next((value for name, value in report.user_properties if name == "pages"), None)
+        if not pages:
+            return
+        if report.failed:
+            self.failed_paths.update(pages)
+        elif report.when == "call" and report.passed:
+            self.passed_paths.update(pages)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        # Only the controller owns the state; collect-only, interrupted and usage-error runs leave it alone.
+        if self.selection is None or session.config.option.collectonly or exitstatus not in (0, 1, 5):
+            return
+        from utils import change_impact
+
+        change_impact.record_run(
+            self.state, self.selection, passed_paths=self.passed_paths, failed_paths=self.failed_paths
+        )
+
+
+def pytest_unconfigure(config):
+    from utils import perf_history
+
+    perf_history.activate(None)
+
+    mirror = getattr(config, "_mirror_server", None)
+    if mirror is not None:
+        mirror.stop()
+
+    if getattr(config, "_http_archive_active", False):
+        from utils import http_archive
+
+        http_archive.deactivate()
+
+    store = getattr(config, "_validator_store", None)
+    if store is None:
+        return
+    from utils.web_audit import set_validator_store
+
+    set_validator_store(None)
+    store.close()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from utils.rate_limiter import LIMITER
+    from utils.web_audit import URL_CACHE
+
+    stats = URL_CACHE.stats()
+    if stats.hits or stats.misses:
+        logger.info(
+            f"[CACHE] url verdicts: hits={stats.hits} misses={stats.misses} "
+            f"coalesced={stats.coalesced} evictions={stats.evictions} size={stats.size}"
+        )
+    if LIMITER.stats.throttled:
+        logger.info(f"[RATE] {LIMITER.stats.describe()} rates={LIMITER.rates()}")
+
+    _finish_artifact_pipeline(session)
+    _finish_perf_history(session)
+    _finish_durations(session)
+    # Screenshots from all xdist workers land in one directory; diff them once, on the controller.
+    if not hasattr(session.config, "workerinput"):
+        _finish_visual_diff(session)
+
+
+def _finish_durations(session) -> None:
+    store = getattr(session.config, "_duration_store", None)
+    # xdist workers' durations reach the controller through their reports; only it writes the file.
+    if store is None or hasattr(session.config, "workerinput"):
+        return
+    try:
+        saved = store.save()
+    except OSError as exc:
+        logger.warning(f"[SHARD] could not save durations: {exc}")
+        return
+    if saved:
+        logger.info(f"[SHARD] recorded {saved} durations in {store.path}")
+
+
+def _finish_artifact_pipeline(session) -> None:
+    pipeline = getattr(session.config, "_artifact_pipeline", None)
+    if pipeline is None:
+        return
+    if not pipeline.close(timeout_s=float(session.config.getoption("--artifact-flush-timeout"))):
+        logger.warning("[ART] flush timed out; some artifacts/uploads may be incomplete")
+    for stage in pipeline.stats():
+        if stage.waits_s:
+            logger.info(f"[ART] {stage.describe()}")
+    for store in _artifact_stores.values():
+        logger.info(f"[ART] store {store.root}: {store.stats.describe()}")
+    _finish_jira_filer(session)
+
+    # Retention once per run, on the controller (after every xdist worker has flushed).
+    if hasattr(session.config, "workerinput"):
+        return
+    from utils.artifact_store import ArtifactStore
+
+    root = Path(session.config.getoption("--artifacts-dir"))
+    if not root.exists():
+        return
+    max_mb = float(session.config.getoption("--artifact-max-mb"))
+    result = ArtifactStore(root).gc(
+        max_age_days=float(session.config.getoption("--artifact-max-age-days")),
+        max_bytes=int(max_mb * 1024 * 1024) if max_mb > 0 else None,
+    )
+    if result.manifests_removed or result.blobs_removed:
+        logger.info(
+            f"[ART] retention: removed {result.manifests_removed} manifests, {result.blobs_removed} blobs "
+            f"({result.bytes_freed / 1024:.0f}KB), kept {result.bytes_kept / 1024:.0f}KB"
+        )
+
+
+def _finish_jira_filer(session) -> None:
+    filer = getattr(session.config, "_jira_filer", None)
+    if filer is None:
+        return
+    if isinstance(filer, _JiraSpool):
+        filer.write()
+        return
+    if filer.batch:
+        for failure in _spooled_failures(session.config):
+            filer.report(failure)
+    try:
+        filed = filer.flush()
+        if filed:
+            logger.info(f"[JIRA] filed {len(filed)} grouped failures: {', '.join(sorted(set(filed.values())))}")
+    except Exception as exc:
+        logger.warning(f"[JIRA] batch filing failed: {exc}")
+    finally:
+        filer.client.close()
+    if filer.stats.created or filer.stats.commented:
+        logger.info(f"[JIRA] {filer.stats.describe()}")
+
+
+def _finish_visual_diff(session) -> None:
+    from utils import visual_diff
+
+    config = session.config
+    if config.getoption("--visual-approve"):
+        logger.info(f"[VISUAL] approved {visual_diff.approve()} baselines")
+        return
+    if not config.getoption("--visual-diff"):
+        return
+    results = visual_diff.diff_screenshots(
+        settings=visual_diff.DiffSettings(ssim_threshold=float(config.getoption("--visual-ssim-threshold")))
+    )
+    changed = [r for r in results if r.status in ("changed", "error")]
+    new = sum(1 for r in results if r.status == "new")
+    logger.info(f"[VISUAL] {len(results)} screenshots: {len(changed)} changed, {new} without baseline")
+    for result in changed:
+        logger.info(f"[VISUAL] {result.describe()}")
+    if changed and config.getoption("--audit-strict"):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def _finish_perf_history(session) -> None:
+    from utils import perf_history
+
+    history = perf_history.active()
+    if history is None:
+        return
+    config = session.config
+    path = history.flush()
+    if path is not None:
+        logger.info(f"[PERF] {len(history.rows())} samples for commit {history.commit} -> {path}")
+    # Workers only write their part; the controller (or a plain run) judges the whole run,
+    # and only its exit status counts under xdist.
+    if hasattr(config, "workerinput"):
+        return
+    regressions = history.detect_regressions(
+        window=max(1, int(config.getoption("--perf-baseline-window"))),
+        min_effect=float(config.getoption("--perf-regression-threshold")),
+    )
+    for regression in regressions:
+        logger.info(f"[REGRESSION] {regression.describe()}")
+    if regressions and config.getoption("--perf-fail-on-regression"):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
 
 
 @pytest.fixture(scope="session")
@@ -128,7 +993,24 @@ def settings(request) -> RuntimeSettings:
         link_check_max=int(request.config.getoption("--link-check-max") or 40),
         link_check_timeout_s=float(request.config.getoption("--link-check-timeout") or 10.0),
         link_check_delay_s=float(request.config.getoption("--link-check-delay") or 0.0),
+        link_check_workers=int(request.config.getoption("--link-check-workers") or 8),
+        link_check_per_host=int(request.config.getoption("--link-check-per-host") or 4),
         check_external_links=bool(request.config.getoption("--check-external-links")),
+        crawl_max_pages=max(1, int(request.config.getoption("--crawl-max-pages"))),
+        crawl_max_depth=max(0, int(request.config.getoption("--crawl-depth"))),
+        crawl_checkpoint=Path(request.config.getoption("--crawl-checkpoint"))
+        if request.config.getoption("--crawl-checkpoint")
+        else None,
+        crawl_resume=bool(request.config.getoption("--crawl-resume")),
+        driver_pool_size=int(request.config.getoption("--driver-pool-size") or 1),
+        driver_max_uses=int(request.config.getoption("--driver-max-uses") or 25),
+        driver_max_memory_mb=float(request.config.getoption("--driver-max-memory-mb") or 0.0),
+        perf_iterations=max(1, int(request.config.getoption("--perf-iterations") or 5)),
+        perf_warmup=max(0, int(request.config.getoption("--perf-warmup") or 0)),
+        responsive_tabs=max(1, int(request.config.getoption("--responsive-tabs"))),
+        load_profile=request.config.getoption("--load-profile"),
+        load_max_vus=max(1, int(request.config.getoption("--load-max-vus"))),
+        load_max_duration_s=max(1.0, float(request.config.getoption("--load-max-duration"))),
         jira_create_on_fail=bool(request.config.getoption("--jira-create-on-fail")),
         jira_project=request.config.getoption("--jira-project"),
         jira_issue_type=str(request.config.getoption("--jira-issue-type") or "Bug"),
@@ -171,8 +1053,7 @@ def _install_js_error_collector(driver) -> None:
         return
 
 
-@pytest.fixture(scope="session")
-def driver(settings: RuntimeSettings):
+def _create_driver(settings: RuntimeSettings):
     logger.info(f"[DRV] init browser={settings.browser} headless={settings.headless}")
 
     browser = settings.browser.lower()
@@ -188,8 +1069,8 @@ def driver(settings: RuntimeSettings):
         if settings.headless:
             options.add_argument("--headless=new")
 
-        # Enable browser console logs (Chrome only)
-        options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+        # Enable browser console logs and CDP Network events (Chrome only)
+        options.set_capability("goog:loggingPrefs", {"browser": "ALL", "performance": "ALL"})
 
         # Prefer the repo-pinned driver (tests/chromedriver.exe) to avoid network downloads.
         chromedriver_path = Path(__file__).with_name("chromedriver.exe")
@@ -257,13 +1138,41 @@ def driver(settings: RuntimeSettings):
     created_driver.set_page_load_timeout(Config.PAGE_LOAD_TIMEOUT)
     if browser == "chrome":
         _install_js_error_collector(created_driver)
+    return created_driver
+
+
+@pytest.fixture(scope="session")
+def driver_pool(settings: RuntimeSettings):
+    from utils.driver_pool import DriverPool, reset_browser_state
+
+    pool = DriverPool(
+        lambda: _create_driver(settings),
+        size=settings.driver_pool_size,
+        max_uses=settings.driver_max_uses,
+        max_memory_mb=settings.driver_max_memory_mb,
+        # Each test gets a new tab in a fresh browser context; it needs the error collector too.
+        reset=lambda d: reset_browser_state(d, on_new_page=_install_js_error_collector),
+    )
+    pool.prelaunch()
 
-    yield created_driver
+    yield pool
 
     try:
-        created_driver.quit()
+        pool.close()
     finally:
-        logger.info("[DRV] closed")
+        logger.info(f"[DRV] closed (launched={pool.launched} recycled={pool.recycled})")
+
+
+@pytest.fixture(scope="function")
+def driver(request, driver_pool):
+    """Warm browser from the pool, reset on return.
+
+    Tests marked ``fresh_browser`` get a newly launched instance instead.
+    """
+    fresh = request.node.get_closest_marker("fresh_browser") is not None
+    pooled_driver = driver_pool.acquire(fresh=fresh)
+    yield pooled_driver
+    driver_pool.release(pooled_driver)
 
 
 @pytest.fixture(scope="function")
@@ -272,51 +1181,125 @@ def setup(driver, settings: RuntimeSettings):
     return driver
 
 
-def _write_text(path: Path, text: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(text, encoding="utf-8", errors="replace")
+@dataclass(frozen=True)
+class FailureSnapshot:
+    """Browser state captured on the hook thread; everything else happens in the pipeline."""
+    screenshot_png: bytes | None
+    html: str | None
+    console: list | None
+    js_errors: list | None
 
 
-def _collect_failure_artifacts(driver, settings: RuntimeSettings, nodeid: str) -> dict[str, str]:
-    artifacts: dict[str, str] = {}
-    test_dir = settings.artifacts_dir / _sanitize_nodeid(nodeid)
-    test_dir.mkdir(parents=True, exist_ok=True)
+def _snapshot_failure(driver) -> FailureSnapshot:
+    def grab(fn):
+        try:
+            return fn()
+        except Exception:
+            return None
 
-    # Screenshot
-    try:
-        screenshot_path = test_dir / "screenshot.png"
-        driver.save_screenshot(str(screenshot_path))
-        artifacts["screenshot"] = str(screenshot_path)
-    except Exception:
-        pass
+    return FailureSnapshot(
+        screenshot_png=grab(driver.get_screenshot_as_png),
+        html=grab(lambda: driver.page_source or ""),
+        # Browser logs (Chrome only)
+        console=grab(lambda: driver.get_log("browser")),
+        # JS errors from injected collector (Chrome only, best-effort)
+        js_errors=grab(lambda: driver.execute_script("return window.__qaErrors || [];")),
+    )
 
-    # HTML dump
-    try:
-        html_path = test_dir / "page.html"
-        _write_text(html_path, driver.page_source or "")
-        artifacts["html"] = str(html_path)
-    except Exception:
-        pass
 
-    # Browser logs (Chrome only)
+def _saved_screenshot_snapshot(path: Path) -> FailureSnapshot:
     try:
-        logs = driver.get_log("browser")
-        log_path = test_dir / "console.json"
-        _write_text(log_path, json.dumps(logs, indent=2))
-        artifacts["console"] = str(log_path)
-    except Exception:
-        pass
+        png = path.read_bytes()
+    except OSError:
+        png = None
+    return FailureSnapshot(screenshot_png=png, html=None, console=None, js_errors=None)
+
+
+def _collect_failure_artifacts(snapshot: FailureSnapshot, settings: RuntimeSettings, nodeid: str) -> list:
+    """Store a failure snapshot in the content-addressed artifact store (runs on a pipeline worker).
+
+    Returns the ArtifactRefs recorded in the test's manifest.json.
+    """
+    store = _artifact_store(settings.artifacts_dir)
+    refs = []
+    if snapshot.screenshot_png is not None:
+        refs.append(store.put("screenshot", "screenshot.png", snapshot.screenshot_png, "image/png"))
+    if snapshot.html is not None:
+        refs.append(store.put_text("html", "page.html", snapshot.html, "text/html"))
+    if snapshot.console is not None:
+        refs.append(store.put_json("console", "console.json", snapshot.console))
+    if snapshot.js_errors is not None:
+        refs.append(store.put_json("js_errors", "js_errors.json", snapshot.js_errors))
+    if not refs:
+        return refs
+
+    manifest = store.write_manifest(settings.artifacts_dir / _sanitize_nodeid(nodeid), nodeid, refs)
+    logger.info(f"[ART] saved {manifest}: " + ", ".join(f"{r.name}={r.digest[:12]}" for r in refs))
+    return refs
+
+
+_artifact_stores: dict[Path, object] = {}
 
-    # JS errors from injected collector (Chrome only, best-effort)
-    try:
-        errors = driver.execute_script("return window.__qaErrors || [];")
-        err_path = test_dir / "js_errors.json"
-        _write_text(err_path, json.dumps(errors, indent=2))
-        artifacts["js_errors"] = str(err_path)
-    except Exception:
-        pass
 
-    return artifacts
+def _artifact_store(root: Path):
+    from utils.artifact_store import ArtifactStore
+
+    store = _artifact_stores.get(root)
+    if store is None:
+        store = _artifact_stores.setdefault(root, ArtifactStore(root))
+    return store
+
+
+def _jira_attachment(store, digest: str, filename: str):
+    from utils.jira_client import Attachment
+
+    return Attachment(
+        filename=filename,
+        read=lambda: store.get(digest),
+        key=digest,
+        on_uploaded=lambda issue_key, meta: store.record_upload(
+            digest, issue_key, meta[0].get("content") if meta else None
+        ),
+    )
+
+
+def _create_jira_issue(settings: RuntimeSettings, filer, nodeid: str, message: str | None, refs: list) -> None:
+    """Hand a failure and its artifacts to the Jira filer (runs on an upload worker).
+
+    Blobs already uploaded for an earlier failure are linked from the description
+    instead of being uploaded again.
+    """
+    from utils.jira_client import Failure
+
+    try:
+        store = _artifact_store(settings.artifacts_dir)
+        description = (
+            f"*Automated failure*\n\n"
+            f"- Test: {nodeid}\n"
+            f"- Error: {(message or '').strip().splitlines()[0] if (message or '').strip() else 'n/a'}\n"
+            f"- URL: {settings.base_url}\n"
+            f"- Browser: {settings.browser}\n"
+            f"- Headless: {settings.headless}\n"
+        )
+        attachments = []
+        for ref in refs:
+            previous = store.upload_record(ref.digest)
+            if previous is not None:
+                description += f"- {ref.filename}: same as attachment on {previous['issue']} {previous.get('url') or ''}\n"
+                continue
+            attachments.append(_jira_attachment(store, ref.digest, ref.filename))
+        failure = Failure(
+            nodeid=nodeid,
+            message=message,
+            summary=f"[AUTOTEST] {nodeid}",
+            description=description,
+            attachments=attachments,
+        )
+        issue_key = filer.report(failure)
+        if issue_key is not None:
+            logger.info(f"[JIRA] {nodeid} -> {issue_key} (signature {failure.signature})")
+    except Exception as exc:
+        logger.warning(f"[JIRA] failed to file issue: {exc}")
 
 
 def pytest_runtest_setup(item):
@@ -336,47 +1319,31 @@ def pytest_runtest_makereport(item, call):
     duration = time.time() - start
     status = "PASS" if report.passed else ("SKIP" if report.skipped else "FAIL")
     logger.info(f"[{status}] {item.nodeid} ({duration:.2f}s)")
+    report.user_properties.append(("duration_s", round(duration, 4)))
 
     if not report.failed:
         return
 
     settings = item.funcargs.get("settings")
     driver = item.funcargs.get("driver")
-    if settings is None or driver is None:
-        return
-
-    artifacts = _collect_failure_artifacts(driver, settings, item.nodeid)
-    if artifacts:
-        logger.info(f"[ART] saved: {artifacts}")
-
-    if not settings.jira_create_on_fail:
+    screenshot = getattr(item, "failure_screenshot", None)
+    if settings is None or (driver is None and screenshot is None):
         return
 
-    try:
-        from utils.jira_client import JiraClient, JiraIssueCreateRequest
-
-        jira = JiraClient.from_env()
-        summary = f"[AUTOTEST] {item.nodeid}"
-        description = (
-            f"*Automated failure*\n\n"
-            f"- Test: {item.nodeid}\n"
-            f"- URL: {settings.base_url}\n"
-            f"- Browser: {settings.browser}\n"
-            f"- Headless: {settings.headless}\n"
-        )
-        req = JiraIssueCreateRequest(
-            project_key=settings.jira_project,
-            issue_type=settings.jira_issue_type,
-            summary=summary,
-            description=description,
-            labels=[settings.jira_label] if settings.jira_label else [],
-        )
-        issue_key = jira.create_issue(req)
-        for _, file_path in artifacts.items():
-            jira.add_attachment(issue_key, Path(file_path))
-        logger.info(f"[JIRA] created {issue_key}")
-    except Exception as exc:
-        logger.warning(f"[JIRA] failed to create issue: {exc}")
+    if driver is not None:
+        # Only the WebDriver calls happen here; the driver goes back to the pool right after.
+        snapshot = _snapshot_failure(driver)
+    else:
+        # Tests without a driver of their own (e.g. tab-based RWD probes) point at a saved screenshot.
+        snapshot = _saved_screenshot_snapshot(Path(screenshot))
+    nodeid = item.nodeid
+    message = call.excinfo.exconly() if call.excinfo is not None else None
+    filer = item.config._jira_filer
+    item.config._artifact_pipeline.submit(
+        nodeid,
+        lambda: _collect_failure_artifacts(snapshot, settings, nodeid),
+        (lambda refs: _create_jira_issue(settings, filer, nodeid, message, refs)) if filer is not None else None,
+    )
 
 
 def pytest_runtest_teardown(item, nextitem):
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.test_logger import get_logger, log_step
+from utils.http_archive import HttpArchiveReader, _archive_paths
+from utils.mirror_server import MirrorServer
+
+logger = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+LINK_TEST = "tests/test_suite_6_link_integrity.py::test_links_01_internal_links_not_broken"
+
+
+def _run_pytest(tmp_path: Path, *args: str) -> subprocess.CompletedProcess:
+    cmd = [
+        sys.executable, "-m", "pytest", str(ROOT / LINK_TEST), f"--rootdir={ROOT}",
+        "-n", "2", "-k", "Home or FAQ", "-p", "no:cacheprovider",
+        "--no-durations", "--no-perf-history", "--no-validator-cache",
+        f"--artifacts-dir={tmp_path / 'artifacts'}", *args,
+    ]
+    return subprocess.run(cmd, cwd=tmp_path, capture_output=True, text=True, timeout=300)
+
+
+@pytest.mark.nonfunctional
+def test_http_archive_record_replay_under_xdist(tmp_path):
+    pytest.importorskip("xdist")
+    archive = tmp_path / "traffic.har"
+
+    with MirrorServer() as mirror:
+        log_step(logger, 1, f"Recording the link checks with 2 xdist workers against {mirror.base_url}")
+        recorded = _run_pytest(tmp_path, f"--base-url={mirror.base_url}", f"--http-record={archive}")
+    assert recorded.returncode == 0, recorded.stdout[-3000:] + recorded.stderr[-3000:]
+
+    log_step(logger, 2, "Checking the per-worker archives")
+    paths = _archive_paths(archive)
+    assert not archive.exists(), "the xdist controller should not write an archive of its own"
+    assert len(paths) == 2, paths
+    reader = HttpArchiveReader(paths)
+    try:
+        assert len(reader) > 0
+    finally:
+        reader.close()
+
+    # The mirror is gone: any request missing from the archive fails the link test.
+    log_step(logger, 3, "Replaying with 2 xdist workers and the mirror stopped")
+    replayed = _run_pytest(tmp_path, f"--base-url={mirror.base_url}", f"--http-replay={archive}")
+    assert replayed.returncode == 0, replayed.stdout[-3000:] + replayed.stderr[-3000:]
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from tests.test_logger import get_logger, log_step
+from utils.jira_client import Attachment, Failure, FailureFiler, JiraClient
+from utils.jira_stub import JiraStubServer
+
+logger = get_logger(__name__)
+
+
+def _failure(nodeid: str, message: str = "AssertionError: status 500", *, summary: str | None = None, attachments=()):
+    return Failure(
+        nodeid=nodeid,
+        message=message,
+        summary=f"[AUTOTEST] {nodeid}" if summary is None else summary,
+        description=f"- Test: {nodeid}\n",
+        attachments=list(attachments),
+    )
+
+
+def _attachment(filename: str, key: str, read=None) -> Attachment:
+    return Attachment(filename=filename, read=read or (lambda: filename.encode("utf-8")), key=key)
+
+
+@pytest.fixture
+def jira():
+    with JiraStubServer() as stub:
+        client = JiraClient(stub.base_url, "qa@example.com", "x", max_workers=4)
+        try:
+            yield stub, client
+        finally:
+            client.close()
+
+
+@pytest.mark.nonfunctional
+def test_jira_filer_dedupes_by_signature(jira):
+    stub, client = jira
+    filer = FailureFiler(client, project_key="QA")
+
+    log_step(logger, 1, "Reporting the same failure from two parametrizations")
+    first = filer.report(_failure("tests/test_a.py::test_page[/]", "AssertionError: took 1234ms"))
+    second = filer.report(_failure("tests/test_a.py::test_page[/faq]", "AssertionError: took 987ms"))
+
+    log_step(logger, 2, "Checking one issue was created and the repeat became a comment")
+    assert first == second
+    assert list(stub.state.issues) == [first]
+    assert len(stub.state.issues[first].comments) == 1
+    assert (filer.stats.created, filer.stats.commented) == (1, 1)
+
+    log_step(logger, 3, "A new filer finds the open issue by its signature label")
+    fresh = FailureFiler(client, project_key="QA")
+    assert fresh.report(_failure("tests/test_a.py::test_page[/blog]", "AssertionError: took 5ms")) == first
+    assert len(stub.state.issues) == 1
+
+
+@pytest.mark.nonfunctional
+def test_jira_filer_batch_bulk_create_with_failed_element(jira):
+    stub, client = jira
+    filer = FailureFiler(client, project_key="QA", batch=True)
+
+    log_step(logger, 1, "Queueing three signatures, one of which Jira rejects (empty summary)")
+    assert filer.report(_failure("tests/test_a.py::test_one")) is None
+    filer.report(_failure("tests/test_a.py::test_one"))
+    filer.report(_failure("tests/test_a.py::test_bad", summary=""))
+    filer.report(_failure("tests/test_a.py::test_two", attachments=[_attachment("page.html", "d1")]))
+    assert not stub.state.issues
+
+    log_step(logger, 2, "Flushing: one bulk create, the rejected element is left out")
+    filed = filer.flush()
+    assert sum(1 for method, path in stub.state.requests if path == "/rest/api/3/issue/bulk") == 1
+    assert len(filed) == 2 and len(stub.state.issues) == 2
+    assert filer.stats.created == 2
+    grouped = next(i for i in stub.state.issues.values() if i.fields["summary"].endswith("test_one"))
+    assert "Also failing with the same signature" in str(grouped.fields["description"])
+    two = next(i for i in stub.state.issues.values() if i.fields["summary"].endswith("test_two"))
+    assert [a["filename"] for a in two.attachments] == ["page.html"]
+
+    log_step(logger, 3, "A second flush comments on the issues filed by the first")
+    filer.report(_failure("tests/test_a.py::test_one"))
+    assert filer.flush() == {sig: key for sig, key in filed.items() if key == grouped.key}
+    assert len(grouped.comments) == 1 and len(stub.state.issues) == 2
+
+
+@pytest.mark.nonfunctional
+def test_jira_filer_uploads_concurrently_once_per_issue(jira):
+    stub, client = jira
+    filer = FailureFiler(client, project_key="QA")
+    # Every read waits for the other three: the uploads only finish if they run in parallel.
+    barrier = threading.Barrier(4, timeout=10)
+
+    def read(name):
+        def _read():
+            barrier.wait()
+            return name.encode("utf-8")
+        return _read
+
+    log_step(logger, 1, "Filing a failure with four attachments")
+    attachments = [_attachment(f"a{n}.bin", f"d{n}", read(f"a{n}.bin")) for n in range(4)]
+    first = filer.report(_failure("tests/test_a.py::test_one", attachments=attachments))
+    assert sorted(a["filename"] for a in stub.state.issues[first].attachments) == [f"a{n}.bin" for n in range(4)]
+    assert filer.stats.uploads == 4 and filer.stats.upload_failures == 0
+
+    log_step(logger, 2, "The same blob goes to a different issue, but only once to the same issue")
+    shared = [_attachment("page.html", "same")]
+    second = filer.report(_failure("tests/test_b.py::test_two", attachments=shared))
+    filer.report(_failure("tests/test_b.py::test_two", attachments=shared))
+    third = filer.report(_failure("tests/test_c.py::test_three", attachments=shared))
+    assert len({first, second, third}) == 3
+    assert [a["filename"] for a in stub.state.issues[second].attachments] == ["page.html"]
+    assert [a["filename"] for a in stub.state.issues[third].attachments] == ["page.html"]
+    assert filer.stats.skipped_uploads == 1
@@ -0,0 +1,130 @@
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from tests.test_logger import get_logger, log_step
+from utils.rate_limiter import RateLimitedSession, RateLimiter, TokenBucket, parse_retry_after
+
+logger = get_logger(__name__)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _bucket(clock, **overrides) -> TokenBucket:
+    settings = dict(
+        rate=10.0, burst=2.0, min_rate=1.0, max_rate=12.0, increase=1.0, decrease=0.5, decrease_cooldown_s=1.0
+    )
+    settings.update(overrides)
+    return TokenBucket(settings.pop("rate"), settings.pop("burst"), clock=clock, **settings)
+
+
+@pytest.mark.nonfunctional
+def test_token_bucket_aimd():
+    clock = _Clock()
+    bucket = _bucket(clock)
+
+    log_step(logger, 1, "Additive increase: +increase/rate per success, capped at max_rate")
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(10.1)
+    for _ in range(500):
+        bucket.on_success()
+    assert bucket.rate == 12.0
+
+    log_step(logger, 2, "Multiplicative decrease, once per cooldown window")
+    assert bucket.on_throttle(None) is True
+    assert bucket.rate == 6.0
+    clock.now += 0.5
+    assert bucket.on_throttle(None) is False
+    assert bucket.rate == 6.0
+    clock.now += 0.5
+    assert bucket.on_throttle(None) is True
+    assert bucket.rate == 3.0
+
+    log_step(logger, 3, "The rate never drops below min_rate")
+    for _ in range(5):
+        clock.now += 1.0
+        bucket.on_throttle(None)
+    assert bucket.rate == 1.0
+
+
+@pytest.mark.nonfunctional
+def test_token_bucket_retry_after_debt():
+    clock = _Clock()
+    bucket = _bucket(clock, rate=4.0)
+
+    log_step(logger, 1, "Burst tokens are free, then callers wait 1/rate each")
+    assert bucket.reserve() == 0.0 and bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.25)
+
+    log_step(logger, 2, "Retry-After puts the bucket into debt for every caller")
+    clock.now += 0.25  # the waiting caller has sent; the bucket is back at zero
+    bucket.on_throttle(3.0)  # rate halves to 2/s, 3s of debt = 6 tokens
+    assert bucket.rate == 2.0
+    assert bucket.reserve() == pytest.approx(3.5)  # the debt plus this caller's own token
+    assert bucket.reserve() == pytest.approx(4.0)
+
+    log_step(logger, 3, "Once the debt is paid off the bucket refills normally")
+    clock.now += 10.0
+    assert bucket.reserve() == 0.0
+
+
+@pytest.mark.nonfunctional
+def test_rate_limiter_retry_policy():
+    limiter = RateLimiter(rate=5.0, max_retries=3, max_retry_after_s=20.0)
+
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:30 GMT", now=1445412500.0) == pytest.approx(10.0)
+    assert parse_retry_after("soon") is None
+
+    assert limiter.retry_delay(0, "120") == 20.0
+    assert 0.0 <= limiter.retry_delay(2) <= 2.0
+    assert limiter.should_retry(429, 0) and limiter.should_retry(503, 2) and not limiter.should_retry(503, 3)
+    assert limiter.should_retry(403, 0) and not limiter.should_retry(403, 1)
+    assert not limiter.should_retry(500, 0)
+
+    assert limiter.feedback("https://a.test/x", 429, "300") is True
+    assert limiter.rates() == {"a.test": 2.5}
+    assert limiter.feedback("https://a.test/x", 200) is False
+    assert limiter.stats.throttled == 1
+
+
+class _ThrottlingAdapter(BaseAdapter):
+    """Answers 503 with ``Retry-After: 0`` to everything and counts what was sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent: list[str] = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request.method)
+        resp = requests.Response()
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "0"
+        resp.url = request.url
+        resp.request = request
+        resp._content = b""
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.mark.nonfunctional
+def test_rate_limited_session_retries_idempotent_methods_only():
+    limiter = RateLimiter(rate=1000.0, max_retries=2)
+    session = RateLimitedSession(limiter)
+    adapter = _ThrottlingAdapter()
+    session.mount("https://", adapter)
+
+    assert session.get("https://a.test/page").status_code == 503
+    assert adapter.sent == ["GET"] * 3
+    adapter.sent.clear()
+    assert session.post("https://a.test/rest/api/3/issue", json={}).status_code == 503
+    assert adapter.sent == ["POST"], "a throttled POST may already have been applied"
+    assert limiter.stats.retries == 2
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from tests.test_logger import get_logger, log_step
+from utils.test_sharding import DurationStore, longest_files_first, lpt_partition, shard_nodeids
+
+logger = get_logger(__name__)
+
+
+def _loads(bins, weights):
+    return [sum(weights[key] for key in shard) for shard in bins]
+
+
+@pytest.mark.nonfunctional
+def test_lpt_partition_balances_shards():
+    log_step(logger, 1, "Textbook case: 7..1 on 3 shards is within one job of perfect")
+    weights = {f"t{w}": float(w) for w in range(1, 8)}
+    bins = lpt_partition(weights, 3)
+    assert sorted(key for shard in bins for key in shard) == sorted(weights)
+    assert max(_loads(bins, weights)) == 10.0  # optimum is 28/3 -> 10
+
+    log_step(logger, 2, "Random weights: Graham's 4/3 bound and one-job spread hold")
+    rng = random.Random(7)
+    for shards in (2, 3, 4, 8):
+        weights = {f"t{n}": rng.uniform(0.1, 30.0) for n in range(60)}
+        bins = lpt_partition(weights, shards)
+        loads = _loads(bins, weights)
+        assert len(bins) == shards and sum(len(shard) for shard in bins) == len(weights)
+        lower_bound = max(sum(weights.values()) / shards, max(weights.values()))
+        assert max(loads) <= (4 / 3 - 1 / (3 * shards)) * lower_bound * 1.0001
+        assert max(loads) - min(loads) <= max(weights.values())
+
+    log_step(logger, 3, "Equal weights are dealt round-robin, deterministically")
+    equal = {f"t{n}": 1.0 for n in range(6)}
+    assert lpt_partition(equal, 4) == lpt_partition(dict(reversed(list(equal.items()))), 4)
+    assert sorted(len(shard) for shard in lpt_partition(equal, 4)) == [1, 1, 2, 2]
+    assert lpt_partition(equal, 0) == [sorted(equal)]
+
+
+@pytest.mark.nonfunctional
+def test_shard_nodeids_cover_every_test_once(tmp_path):
+    store = DurationStore(tmp_path / "durations.json")
+    store.record("tests/test_a.py::test_slow[1]", 20.0)
+    store.record("tests/test_a.py::test_fast", 0.5)
+    store.record("tests/test_b.py::test_mid", 5.0)
+    store.save()
+    nodeids = [
+        "tests/test_a.py::test_slow[1]",
+        "tests/test_a.py::test_slow[2]",  # estimated from its sibling
+        "tests/test_a.py::test_fast",
+        "tests/test_b.py::test_mid",
+        "tests/test_c.py::test_new",  # estimated from the median
+    ]
+    assert store.estimate("tests/test_a.py::test_slow[2]") == 20.0
+    assert store.estimate("tests/test_c.py::test_new") == 5.0
+
+    shards = [shard_nodeids(nodeids, store, count=3, index=i) for i in range(3)]
+    assert set().union(*shards) == set(nodeids)
+    assert sum(len(shard) for shard in shards) == len(nodeids)
+    with pytest.raises(ValueError):
+        shard_nodeids(nodeids, store, count=3, index=3)
+
+    assert longest_files_first(nodeids, store)[:3] == nodeids[:3]
+    assert longest_files_first(nodeids[::-1], store)[-1] == "tests/test_c.py::test_new"
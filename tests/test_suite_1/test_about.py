@@ -1,8 +1,8 @@
 import requests
 import pytest
-import time
 from selenium.webdriver.common.by import By
 from config.config import Config
+from pages.base_page import BasePage
 from utils.web_audit import head_or_get
 
 
@@ -10,6 +10,7 @@ from utils.web_audit import head_or_get
 class TestAboutPages:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/about/faq")
     def test_ABOUT_01_faq_searchable(self, setup):
         """ABOUT-01: Verify FAQ page content and searchability"""
         driver = setup
@@ -19,17 +20,19 @@ class TestAboutPages:
         body = driver.find_element(By.TAG_NAME, 'body').text
         assert 'ADS-B' in body or 'ADS-B' in driver.page_source
 
+    @pytest.mark.pages("/about/terms-of-use", "/about/privacy-policy")
     def test_ABOUT_02_terms_and_privacy(self, setup):
         """ABOUT-02: Test terms-of-use and privacy-policy links"""
         driver = setup
         for path in ['/about/terms-of-use', '/about/privacy-policy']:
             driver.get(f"{self.BASE}{path}")
-            time.sleep(1)
+            BasePage(driver).wait_for_dom_quiet(timeout=5)
             assert driver.title
             # quick scan for expected keywords
             body = driver.find_element(By.TAG_NAME, 'body').text
             assert 'data' in body.lower() or 'privacy' in body.lower()
 
+    @pytest.mark.pages("/about/publications")
     def test_ABOUT_03_publications_links(self, setup):
         """ABOUT-03: Validate publications page links"""
         driver = setup
@@ -42,6 +45,7 @@ class TestAboutPages:
                 pytest.skip(f"External download link blocked (HTTP {r.status_code}): {href}")
             assert r.status_code < 400
 
+    @pytest.mark.pages("/about/faq", "/")
     def test_ABOUT_04_cross_navigation(self, setup):
         """ABOUT-04: Cross-page navigation from about sections"""
         driver = setup
@@ -50,5 +54,5 @@ class TestAboutPages:
         home = driver.find_elements(By.XPATH, "//a[contains(@href, '/') and (contains(text(), 'Home') or contains(@class, 'navbar-brand'))]")
         if home:
             home[0].click()
-            time.sleep(1)
+            BasePage(driver).wait_until_ready(timeout=5)
             assert driver.current_url.rstrip('/') in (self.BASE.rstrip('/'), self.BASE)
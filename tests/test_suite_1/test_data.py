@@ -9,6 +9,7 @@ from config.config import Config
 class TestDataPages:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/data")
     def test_DATA_01_main_data_page_methods(self, setup):
         """DATA-01: Verify main data page access methods"""
         driver = setup
@@ -17,6 +18,7 @@ class TestDataPages:
         links = driver.find_elements(By.XPATH, "//a[contains(@href, '/data/api') or contains(@href, '/data/trino')]")
         assert links
 
+    @pytest.mark.pages("/data/aircraft")
     def test_DATA_02_aircraft_alerts(self, setup):
         """DATA-02: Test aircraft and alerts databases"""
         driver = setup
@@ -26,6 +28,7 @@ class TestDataPages:
         # Not all pages have search; presence of content suffices
         assert driver.page_source
 
+    @pytest.mark.pages("/data/api")
     def test_DATA_03_api_docs_navigation(self, setup):
         """DATA-03: Validate API docs navigation and examples"""
         driver = setup
@@ -33,6 +36,7 @@ class TestDataPages:
         # Look for references to REST or /states/all
         assert '/states/all' in driver.page_source or 'API' in driver.page_source
 
+    @pytest.mark.pages("/data/tools")
     def test_DATA_04_tools_page_links(self, setup):
         """DATA-04: Test tools page library links"""
         driver = setup
@@ -41,6 +45,7 @@ class TestDataPages:
         # require multiple tools; tolerant check
         assert links
 
+    @pytest.mark.pages("/data/scientific")
     def test_DATA_05_scientific_datasets(self, setup):
         """DATA-05: Verify scientific datasets access"""
         driver = setup
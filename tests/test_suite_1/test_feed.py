@@ -9,6 +9,7 @@ from utils.web_audit import head_or_get
 class TestFeedPages:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/feed")
     def test_FEED_01_main_feed_overview(self, setup):
         """FEED-01: Verify main feed page overview"""
         driver = setup
@@ -17,6 +18,7 @@ class TestFeedPages:
         # check subpage links exist
         assert driver.find_elements(By.XPATH, "//a[contains(@href, '/feed/raspberry')]")
 
+    @pytest.mark.pages("/feed/raspberry")
     def test_FEED_02_raspberry_pi_guide(self, setup, tmp_path):
         """FEED-02: Test Raspberry Pi feed installation guide and download link"""
         driver = setup
@@ -30,6 +32,7 @@ class TestFeedPages:
                 pytest.skip(f"External link blocked (HTTP {r.status_code}): {href}")
             assert r.status_code < 400
 
+    @pytest.mark.pages("/feed/debian")
     def test_FEED_03_debian_docker_steps_present(self, setup):
         """FEED-03: Validate Debian/Docker feed setup instructions present"""
         driver = setup
@@ -37,6 +40,7 @@ class TestFeedPages:
         body = driver.find_element(By.TAG_NAME, 'body').text.lower()
         assert 'apt' in body or 'docker' in body
 
+    @pytest.mark.pages("/feed/flarm", "/feed/vhf")
     def test_FEED_04_specialized_feed_pages(self, setup):
         """FEED-04: Test specialized feed pages (FLARM, VHF)"""
         driver = setup
@@ -44,6 +48,7 @@ class TestFeedPages:
             driver.get(f"{self.BASE}{path}")
             assert driver.title or driver.page_source
 
+    @pytest.mark.pages("/feed")
     def test_FEED_05_downloads_and_removal_documented(self, setup):
         """FEED-05: Check that feed page contains install/download guidance (wording may vary)."""
         driver = setup
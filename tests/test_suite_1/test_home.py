@@ -2,12 +2,14 @@ import time
 import pytest
 from selenium.webdriver.common.by import By
 from config.config import Config
+from pages.base_page import BasePage
 from utils.web_audit import head_or_get
-from utils.selenium_actions import first_clickable, safe_click
+from utils.selenium_actions import safe_click
 from selenium.webdriver.support.ui import WebDriverWait
 
 
 @pytest.mark.functional
+@pytest.mark.pages("/")
 class TestHomePage:
     BASE = Config.BASE_URL
 
@@ -17,60 +19,68 @@ class TestHomePage:
         # Ensure page title and key sections
         assert "OpenSky" in driver.title or "OpenSky Network" in driver.title
 
+        # One snapshot answers every section query locally
+        snap = BasePage(driver).snapshot("h2, h5, a")
+
         # Latest News & Updates
-        news = driver.find_elements(By.XPATH, "//h2[contains(., 'Latest News') or contains(., 'Latest News & Updates')]")
+        news = snap.find_all("h2", text=("Latest News", "Latest News & Updates"))
         assert news, "Latest News & Updates section not found"
 
         # Live Flight Map link
-        map_links = driver.find_elements(By.XPATH, "//a[contains(text(), 'Flight Map')]")
+        map_links = snap.find_all("a", own_text="Flight Map")
         assert map_links, "Live Flight Map link not found"
 
         # About OpenSky, Feed Data, Our Data
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'About OpenSky') or contains(., 'About')]")
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'Feed Data') or contains(., 'Feed Data')]")
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'Our Data') or contains(., 'Our Data')]")
+        assert snap.exists("h5", text=("About OpenSky", "About"))
+        assert snap.exists("h5", text="Feed Data")
+        assert snap.exists("h5", text="Our Data")
 
     def test_HOME_02_navigation_links(self, setup):
         """HOME-02: Validate navigation links from homepage"""
         driver = setup
         # About
-        about = driver.find_element(By.XPATH, "//a[contains(@href, '/about') and (contains(text(), 'About') or contains(text(), 'About OpenSky'))]")
-        about_href = about.get_attribute('href')
+        snap = BasePage(driver).snapshot("a")
+        about = snap.find("a", href="/about", own_text=("About", "About OpenSky"))
+        assert about is not None, "About link not found"
+        about_href = about.href
         resp = head_or_get(about_href, timeout=10)
         if resp.status_code in (403, 429):
             pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {about_href}")
         assert resp.status_code < 400
 
         # Feed
-        feed = driver.find_element(By.XPATH, "//a[contains(@href, '/feed') and contains(text(), 'Feed')]")
-        resp = head_or_get(feed.get_attribute('href'), timeout=10)
+        feed = snap.find("a", href="/feed", own_text="Feed")
+        assert feed is not None, "Feed link not found"
+        resp = head_or_get(feed.href, timeout=10)
         if resp.status_code in (403, 429):
-            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {feed.get_attribute('href')}")
+            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {feed.href}")
         assert resp.status_code < 400
 
         # Our Data
-        data = driver.find_element(By.XPATH, "//a[contains(@href, '/data') and contains(text(), 'Our Data')]")
-        resp = head_or_get(data.get_attribute('href'), timeout=10)
+        data = snap.find("a", href="/data", own_text="Our Data")
+        assert data is not None, "Our Data link not found"
+        resp = head_or_get(data.href, timeout=10)
         if resp.status_code in (403, 429):
-            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {data.get_attribute('href')}")
+            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {data.href}")
         assert resp.status_code < 400
 
         # Flight Map
-        fmap = driver.find_element(By.XPATH, "//a[contains(text(), 'Flight Map')]")
-        fmap_href = fmap.get_attribute('href')
+        fmap = snap.find("a", own_text="Flight Map")
+        assert fmap is not None, "Flight Map link not found"
+        fmap_href = fmap.href
         assert 'map.opensky-network.org' in fmap_href or '/map' in fmap_href
 
     def test_HOME_03_signin_cta(self, setup):
         """HOME-03: Test sign-in call-to-action"""
         driver = setup
         # Look for sign in / login link/button
-        signin = driver.find_elements(
-            By.XPATH,
-            "//a[contains(@href, '/login') or contains(., 'Sign in') or contains(., 'Sign In') or contains(., 'Login')]",
+        snap = BasePage(driver).snapshot("a")
+        signin = snap.first_clickable(
+            "a",
+            where=lambda n: "/login" in n.href or any(t in n.text for t in ("Sign in", "Sign In", "Login")),
         )
-        target = first_clickable(signin)
-        assert target is not None, "No clickable Sign in link found"
-        safe_click(driver, target, timeout_s=10)
+        assert signin is not None, "No clickable Sign in link found"
+        safe_click(driver, snap.live(signin), timeout_s=10)
         WebDriverWait(driver, 15).until(lambda d: "/login" in d.current_url or "auth.opensky-network.org" in d.current_url)
         assert '/login' in driver.current_url or 'auth.opensky-network.org' in driver.current_url
         # Check username/password present
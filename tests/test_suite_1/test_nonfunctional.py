@@ -10,6 +10,7 @@ from utils.web_audit import head_or_get
 class TestNonFunctional:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/")
     def test_NF_01_browser_compatibility_smoke(self, setup):
         """NF-01: Simple smoke test for rendering on current browser"""
         driver = setup
@@ -17,6 +18,7 @@ class TestNonFunctional:
         # Ensure no JS errors visible via performance logs not implemented here; just basic rendering
         assert 'OpenSky' in driver.title or driver.page_source
 
+    @pytest.mark.pages("/", "/data/api", "/feed")
     def test_NF_02_page_load_performance(self, setup):
         """NF-02: Measure load times for a few pages"""
         driver = setup
@@ -32,6 +34,7 @@ class TestNonFunctional:
         # At least one measurement succeeded
         assert any(t is not None for t in times)
 
+    @pytest.mark.pages("/")
     def test_NF_03_https_and_mixed_content(self, setup):
         """NF-04: Security: HTTPS and mixed content check (basic)"""
         driver = setup
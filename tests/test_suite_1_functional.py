@@ -1,12 +1,12 @@
 import pytest
-import time
 import requests
 from selenium.webdriver.common.by import By
+from pages.base_page import BasePage
 from pages.explorer_page import ExplorerPage
 from config.config import Config
-from tests.test_logger import get_logger, log_step, log_check, slow_down
+from tests.test_logger import get_logger, log_step, log_check
 from utils.web_audit import head_or_get
-from utils.selenium_actions import first_clickable, safe_click
+from utils.selenium_actions import safe_click
 from selenium.webdriver.support.ui import WebDriverWait
 
 logger = get_logger(__name__)
@@ -16,20 +16,16 @@ logger = get_logger(__name__)
 class TestFunctionalSuite:
     """Realistic functional tests focusing on public OpenSky pages (map, controls, navigation)."""
 
-    MAP_URL = "https://map.opensky-network.org/"
-
-    def test_01_map_loads_successfully_and_performance(self, setup):
+    def test_01_map_loads_successfully_and_performance(self, setup, settings):
         """TC01: Load the public flight map and measure that main map canvas appears quickly."""
         driver = setup
         log_step(logger, 1, "Navigating to flight map")
-        driver.get(self.MAP_URL)
-        slow_down(0.5)
+        driver.get(settings.map_url)
         explorer_page = ExplorerPage(driver)
 
         log_step(logger, 2, "Checking if map canvas is visible")
         assert explorer_page.is_map_visible(), "Map canvas did not become visible within timeout"
         log_check(logger, "Map canvas is visible")
-        slow_down(0.5)
 
         # measure page load time (best-effort). If instrumentation not available, get_page_load_time may return 0
         log_step(logger, 3, "Measuring page load time")
@@ -43,31 +39,27 @@ class TestFunctionalSuite:
         assert load_time <= Config.MAP_LOAD_THRESHOLD, f"Map loaded too slowly: {load_time}s"
         log_check(logger, f"Page load time: {load_time}s (threshold: {Config.MAP_LOAD_THRESHOLD}s)")
 
-    def test_02_search_input_and_table_presence(self, setup):
+    def test_02_search_input_and_table_presence(self, setup, settings):
         """TC02: Verify the map's search input and planes table DOM elements are present and usable."""
         driver = setup
         log_step(logger, 1, "Navigating to map")
-        driver.get(self.MAP_URL)
-        slow_down(0.5)
+        driver.get(settings.map_url)
         explorer_page = ExplorerPage(driver)
 
         log_step(logger, 2, "Checking search input presence")
         search_input = explorer_page.find_element((By.ID, "search_input"))
         assert search_input is not None
         log_check(logger, "Search input found")
-        slow_down(0.3)
-        driver.get(self.MAP_URL)
+        driver.get(settings.map_url)
         explorer_page = ExplorerPage(driver)
 
         # Ensure search input exists
         assert explorer_page.is_element_visible(explorer_page.SEARCH_INPUT), "Search input not visible"
         log_check(logger, "Search input is visible")
-        slow_down(0.3)
 
         # Enter a short search term and ensure the table element exists (dynamic rows may not be present in every run)
         log_step(logger, 3, "Testing flight search")
         explorer_page.search_for_flight("AAL")
-        slow_down(0.5)
         assert explorer_page.is_element_visible(explorer_page.FLIGHT_TABLE), "Planes table element not present"
         # Stricter: require at least one result row in the planes table after search
         try:
@@ -77,12 +69,11 @@ class TestFunctionalSuite:
         assert rows and len(rows) > 0, "No result rows found in planes table after search (strict)"
         log_check(logger, "Planes table is visible after search")
 
-    def test_03_map_controls_present(self, setup):
+    def test_03_map_controls_present(self, setup, settings):
         """TC03: Verify key map controls (Home, Follow, Random) and sidebar toggle exist."""
         driver = setup
         log_step(logger, 1, "Navigating to map")
-        driver.get(self.MAP_URL)
-        slow_down(0.5)
+        driver.get(settings.map_url)
         explorer_page = ExplorerPage(driver)
 
         log_step(logger, 2, "Checking map controls")
@@ -91,12 +82,12 @@ class TestFunctionalSuite:
             visible = explorer_page.is_element_visible((By.ID, ctrl_id))
             assert visible, f"{desc} ({ctrl_id}) not visible"
             log_check(logger, f"{desc} found")
-            slow_down(0.2)
         # Stricter: require a zoom control to be present (may reveal missing control styling)
         assert explorer_page.is_element_visible((By.ID, 'zoom_in')) or explorer_page.is_element_visible((By.ID, 'zoom')), (
             "Zoom control not found (strict)"
         )
 
+    @pytest.mark.pages("/")
     def test_04_home_page_has_flight_map_link(self, setup):
         """TC04: From the main site home page, verify the Flight Map link points to the map.opensky-network.org domain."""
         driver = setup
@@ -109,6 +100,7 @@ class TestFunctionalSuite:
         href = elems[0].get_attribute("href")
         assert "map.opensky-network.org" in href or "/map" in href, f"Flight Map link points to unexpected location: {href}"
 
+    @pytest.mark.pages("/")
     def test_05_login_link_points_to_auth(self, setup):
         """TC05: Verify the Sign in / Login entry points to the auth system (does not perform login)."""
         driver = setup
@@ -120,6 +112,7 @@ class TestFunctionalSuite:
 
 
 @pytest.mark.functional
+@pytest.mark.pages("/")
 class TestHomePages:
     """HOME-01 .. HOME-04 implemented inside the main suite file."""
     BASE = Config.BASE_URL
@@ -129,50 +122,56 @@ class TestHomePages:
         # Stricter: require exact expected site title substring for clearer identification
         assert "OpenSky Network" in driver.title, f"Unexpected homepage title: {driver.title} (strict)"
 
-        news = driver.find_elements(By.XPATH, "//h2[contains(., 'Latest News') or contains(., 'Latest News & Updates')]")
+        snap = BasePage(driver).snapshot("h2, h5, a")
+        news = snap.find_all("h2", text=("Latest News", "Latest News & Updates"))
         assert news, "Latest News & Updates section not found"
 
-        map_links = driver.find_elements(By.XPATH, "//a[contains(text(), 'Flight Map')]")
+        map_links = snap.find_all("a", own_text="Flight Map")
         assert map_links, "Live Flight Map link not found"
 
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'About OpenSky') or contains(., 'About')]")
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'Feed Data') or contains(., 'Feed Data')]")
-        assert driver.find_elements(By.XPATH, "//h5[contains(., 'Our Data') or contains(., 'Our Data')]")
+        assert snap.exists("h5", text=("About OpenSky", "About"))
+        assert snap.exists("h5", text="Feed Data")
+        assert snap.exists("h5", text="Our Data")
 
     def test_HOME_02_navigation_links(self, setup):
         driver = setup
-        about = driver.find_element(By.XPATH, "//a[contains(@href, '/about') and (contains(text(), 'About') or contains(text(), 'About OpenSky'))]")
-        about_href = about.get_attribute('href')
+        snap = BasePage(driver).snapshot("a")
+        about = snap.find("a", href="/about", own_text=("About", "About OpenSky"))
+        assert about is not None, "About link not found"
+        about_href = about.href
         resp = head_or_get(about_href, timeout=10)
         if resp.status_code in (403, 429):
             pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {about_href}")
         assert resp.status_code < 400
 
-        feed = driver.find_element(By.XPATH, "//a[contains(@href, '/feed') and contains(text(), 'Feed')]")
-        resp = head_or_get(feed.get_attribute('href'), timeout=10)
+        feed = snap.find("a", href="/feed", own_text="Feed")
+        assert feed is not None, "Feed link not found"
+        resp = head_or_get(feed.href, timeout=10)
         if resp.status_code in (403, 429):
-            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {feed.get_attribute('href')}")
+            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {feed.href}")
         assert resp.status_code < 400
 
-        data = driver.find_element(By.XPATH, "//a[contains(@href, '/data') and contains(text(), 'Our Data')]")
-        resp = head_or_get(data.get_attribute('href'), timeout=10)
+        data = snap.find("a", href="/data", own_text="Our Data")
+        assert data is not None, "Our Data link not found"
+        resp = head_or_get(data.href, timeout=10)
         if resp.status_code in (403, 429):
-            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {data.get_attribute('href')}")
+            pytest.skip(f"Blocked by WAF/CDN (HTTP {resp.status_code}): {data.href}")
         assert resp.status_code < 400
 
-        fmap = driver.find_element(By.XPATH, "//a[contains(text(), 'Flight Map')]")
-        fmap_href = fmap.get_attribute('href')
+        fmap = snap.find("a", own_text="Flight Map")
+        assert fmap is not None, "Flight Map link not found"
+        fmap_href = fmap.href
         assert 'map.opensky-network.org' in fmap_href or '/map' in fmap_href
 
     def test_HOME_03_signin_cta(self, setup):
         driver = setup
-        signin = driver.find_elements(
-            By.XPATH,
-            "//a[contains(@href, '/login') or contains(., 'Sign in') or contains(., 'Sign In') or contains(., 'Login')]",
+        snap = BasePage(driver).snapshot("a")
+        signin = snap.first_clickable(
+            "a",
+            where=lambda n: "/login" in n.href or any(t in n.text for t in ("Sign in", "Sign In", "Login")),
         )
-        target = first_clickable(signin)
-        assert target is not None, "No clickable Sign in link found"
-        safe_click(driver, target, timeout_s=10)
+        assert signin is not None, "No clickable Sign in link found"
+        safe_click(driver, snap.live(signin), timeout_s=10)
         WebDriverWait(driver, 15).until(lambda d: "/login" in d.current_url or "auth.opensky-network.org" in d.current_url)
         assert '/login' in driver.current_url or 'auth.opensky-network.org' in driver.current_url
         assert driver.find_elements(By.ID, 'username')
@@ -195,6 +194,7 @@ class TestHomePages:
 class TestAboutPagesInline:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/about/faq")
     def test_ABOUT_01_faq_searchable(self, setup):
         driver = setup
         driver.get(f"{self.BASE}about/faq")
@@ -202,15 +202,17 @@ class TestAboutPagesInline:
         body = driver.find_element(By.TAG_NAME, 'body').text
         assert 'ADS-B' in body or 'ADS-B' in driver.page_source
 
+    @pytest.mark.pages("/about/terms-of-use", "/about/privacy-policy")
     def test_ABOUT_02_terms_and_privacy(self, setup):
         driver = setup
         for path in ['/about/terms-of-use', '/about/privacy-policy']:
             driver.get(f"{self.BASE}{path}")
-            time.sleep(1)
+            BasePage(driver).wait_for_dom_quiet(timeout=5)
             assert driver.title
             body = driver.find_element(By.TAG_NAME, 'body').text
             assert 'data' in body.lower() or 'privacy' in body.lower()
 
+    @pytest.mark.pages("/about/publications")
     def test_ABOUT_03_publications_links(self, setup):
         driver = setup
         driver.get(f"{self.BASE}about/publications")
@@ -222,13 +224,14 @@ class TestAboutPagesInline:
                 pytest.skip(f"External download link blocked (HTTP {r.status_code}): {href}")
             assert r.status_code < 400
 
+    @pytest.mark.pages("/about/faq", "/")
     def test_ABOUT_04_cross_navigation(self, setup):
         driver = setup
         driver.get(f"{self.BASE}about/faq")
         home = driver.find_elements(By.XPATH, "//a[contains(@href, '/') and (contains(text(), 'Home') or contains(@class, 'navbar-brand'))]")
         if home:
             home[0].click()
-            time.sleep(1)
+            BasePage(driver).wait_until_ready(timeout=5)
             assert driver.current_url.rstrip('/') in (self.BASE.rstrip('/'), self.BASE)
 
 
@@ -236,12 +239,14 @@ class TestAboutPagesInline:
 class TestFeedPagesInline:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/feed")
     def test_FEED_01_main_feed_overview(self, setup):
         driver = setup
         driver.get(f"{self.BASE}feed")
         assert 'Feed Data' in driver.page_source or 'Feed' in driver.title
         assert driver.find_elements(By.XPATH, "//a[contains(@href, '/feed/raspberry')]")
 
+    @pytest.mark.pages("/feed/raspberry")
     def test_FEED_02_raspberry_pi_guide(self, setup):
         driver = setup
         driver.get(f"{self.BASE}feed/raspberry")
@@ -253,18 +258,21 @@ class TestFeedPagesInline:
                 pytest.skip(f"External link blocked (HTTP {r.status_code}): {href}")
             assert r.status_code < 400
 
+    @pytest.mark.pages("/feed/debian")
     def test_FEED_03_debian_docker_steps_present(self, setup):
         driver = setup
         driver.get(f"{self.BASE}feed/debian")
         body = driver.find_element(By.TAG_NAME, 'body').text.lower()
         assert 'apt' in body or 'docker' in body
 
+    @pytest.mark.pages("/feed/flarm", "/feed/vhf")
     def test_FEED_04_specialized_feed_pages(self, setup):
         driver = setup
         for path in ['feed/flarm', 'feed/vhf']:
             driver.get(f"{self.BASE}{path}")
             assert driver.title or driver.page_source
 
+    @pytest.mark.pages("/feed")
     def test_FEED_05_downloads_and_removal_documented(self, setup):
         driver = setup
         driver.get(f"{self.BASE}feed")
@@ -280,6 +288,7 @@ class TestFeedPagesInline:
 class TestDataPagesInline:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/data")
     def test_DATA_01_main_data_page_methods(self, setup):
         driver = setup
         driver.get(f"{self.BASE}data")
@@ -287,23 +296,27 @@ class TestDataPagesInline:
         links = driver.find_elements(By.XPATH, "//a[contains(@href, '/data/api') or contains(@href, '/data/trino')]")
         assert links
 
+    @pytest.mark.pages("/data/aircraft")
     def test_DATA_02_aircraft_alerts(self, setup):
         driver = setup
         driver.get(f"{self.BASE}data/aircraft")
         search = driver.find_elements(By.XPATH, "//input[contains(@placeholder, 'Search') or contains(@id, 'search')]")
         assert driver.page_source
 
+    @pytest.mark.pages("/data/api")
     def test_DATA_03_api_docs_navigation(self, setup):
         driver = setup
         driver.get(f"{self.BASE}data/api")
         assert '/states/all' in driver.page_source or 'API' in driver.page_source
 
+    @pytest.mark.pages("/data/tools")
     def test_DATA_04_tools_page_links(self, setup):
         driver = setup
         driver.get(f"{self.BASE}data/tools")
         links = driver.find_elements(By.XPATH, "//a[contains(@href, 'github') or contains(@href, 'pypi')]")
         assert links
 
+    @pytest.mark.pages("/data/scientific")
     def test_DATA_05_scientific_datasets(self, setup):
         driver = setup
         driver.get(f"{self.BASE}data/scientific")
@@ -314,11 +327,13 @@ class TestDataPagesInline:
 class TestNonFunctionalInline:
     BASE = Config.BASE_URL
 
+    @pytest.mark.pages("/")
     def test_NF_01_browser_compatibility_smoke(self, setup):
         driver = setup
         driver.get(self.BASE)
         assert 'OpenSky' in driver.title or driver.page_source
 
+    @pytest.mark.pages("/", "/data/api", "/feed")
     def test_NF_02_page_load_performance(self, setup):
         driver = setup
         pages = [self.BASE, f"{self.BASE}data/api", f"{self.BASE}feed"]
@@ -332,6 +347,7 @@ class TestNonFunctionalInline:
                 times.append(None)
         assert any(t is not None for t in times)
 
+    @pytest.mark.pages("/")
     def test_NF_03_https_and_mixed_content(self, setup):
         driver = setup
         driver.get(self.BASE)
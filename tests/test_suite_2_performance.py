@@ -1,32 +1,21 @@
 import time
 import json
-import shutil
-import subprocess
-from pathlib import Path
 
 import pytest
 import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 
 from config.config import Config
-from tests.test_logger import get_logger, log_step, log_check, slow_down
-from utils.web_audit import head_or_get
+from pages.base_page import BasePage
+from tests.test_logger import get_logger, log_step, log_check
+from utils import perf_history
+from utils.load_engine import SCENARIOS, run_scenario
+from utils.rate_limiter import thread_waited_s
+from utils.perf_stats import summarize
+from utils.web_audit import bytes_transferred, head_or_get
 
 logger = get_logger(__name__)
 
 
-def _create_chrome(headless=True):
-    opts = Options()
-    if headless:
-        opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--disable-gpu")
-    driver = webdriver.Chrome(options=opts)
-    return driver
-
-
 def _emulate_network(driver, latency_ms=70, download_mbps=12, upload_mbps=3):
     # CDP expects bytes/sec
     download_bps = int(download_mbps * 1024 * 1024 / 8)
@@ -44,137 +33,147 @@ def _emulate_network(driver, latency_ms=70, download_mbps=12, upload_mbps=3):
 
 
 def _collect_performance_metrics(driver):
+    # Buffered observers are required: Chrome does not expose LCP via getEntriesByType.
     script = """
-    (function(){
-      function sum(arr, key){return arr.reduce((s,i)=>s+(i[key]||0),0)}
-      let lcpEntries = performance.getEntriesByType('largest-contentful-paint') || [];
-      let lcp = lcpEntries.length? lcpEntries[lcpEntries.length-1].renderTime || lcpEntries[lcpEntries.length-1].startTime : 0;
-      let layoutShifts = performance.getEntriesByType('layout-shift') || [];
-      let cls = layoutShifts.reduce((s,e)=> s + (e.value||0), 0);
-      let longTasks = performance.getEntriesByType('longtask') || [];
-      let tbt = longTasks.reduce((s,e)=> s + Math.max(0,(e.duration-50)), 0);
-      let resources = performance.getEntriesByType('resource') || [];
-      let transfer = resources.reduce((s,r)=> s + (r.transferSize||0), 0);
-      return {lcp: lcp, cls: cls, tbt: tbt, transferSize: transfer, nav: performance.timing.toJSON(), resourcesCount: resources.length};
-    })();
+    var done = arguments[arguments.length - 1];
+    var out = {lcp: 0, cls: 0, tbt: 0};
+    function observe(type, cb) {
+      try {
+        new PerformanceObserver(function(list){ list.getEntries().forEach(cb); })
+          .observe({type: type, buffered: true});
+      } catch (e) {}
+    }
+    observe('largest-contentful-paint', function(e){ out.lcp = e.renderTime || e.startTime; });
+    observe('layout-shift', function(e){ if (!e.hadRecentInput) out.cls += (e.value || 0); });
+    observe('longtask', function(e){ out.tbt += Math.max(0, e.duration - 50); });
+    setTimeout(function(){
+      var resources = performance.getEntriesByType('resource') || [];
+      var navEntry = (performance.getEntriesByType('navigation') || [])[0];
+      out.transferSize = resources.reduce(function(s, r){ return s + (r.transferSize || 0); }, 0)
+        + (navEntry ? (navEntry.transferSize || 0) : 0);
+      out.nav = performance.timing.toJSON();
+      out.resourcesCount = resources.length;
+      done(out);
+    }, 100);
     """
     try:
-        metrics = driver.execute_script(script)
+        metrics = driver.execute_async_script(script)
         return metrics or {}
     except Exception:
         return {}
 
 
+def _sample_page_loads(driver, url, *, iterations, warmup, cold, network):
+    """Load ``url`` warmup+iterations times and return per-metric samples (warmup discarded).
+
+    cold=True clears the HTTP cache and cookies before every load; otherwise the
+    cache stays warm across iterations. Load time comes from navigation timing, so
+    the metric collection itself is not counted. Every kept sample is also
+    appended to the perf history under ``network``.
+    """
+    samples = {"load_s": [], "lcp_s": [], "tbt_s": [], "cls": [], "transfer_kb": []}
+    for i in range(warmup + iterations):
+        if cold:
+            try:
+                driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except Exception:
+                pass
+        driver.get(url)
+        metrics = _collect_performance_metrics(driver)
+        if i < warmup:
+            continue
+
+        nav = metrics.get("nav") or {}
+        load_ms = (nav.get("loadEventEnd") or 0) - (nav.get("navigationStart") or 0)
+        load_s = load_ms / 1000.0 if load_ms > 0 else BasePage(driver).get_page_load_time()
+        lcp_raw = metrics.get("lcp")
+        samples["load_s"].append(load_s)
+        samples["lcp_s"].append(lcp_raw / 1000.0 if isinstance(lcp_raw, (int, float)) and lcp_raw > 0 else load_s)
+        samples["tbt_s"].append(float(metrics.get("tbt") or 0.0) / 1000.0)
+        samples["cls"].append(float(metrics.get("cls") or 0.0))
+        samples["transfer_kb"].append(float(metrics.get("transferSize") or 0) / 1024.0)
+
+    page = perf_history.page_key(url)
+    for name, values in samples.items():
+        for value in values:
+            perf_history.record(name, value, page=page, network=network)
+    return {name: summarize(name, values) for name, values in samples.items()}
+
+
+def _check_budget(summary, threshold, unit, *, strict):
+    """Fail only when the median's confidence interval lies entirely above the threshold."""
+    logger.info(f"  ├─ {summary.describe(unit)} (budget {threshold}{unit})")
+    if summary.clearly_exceeds(threshold):
+        message = f"{summary.name} median {summary.median:.3f}{unit} clearly exceeds {threshold}{unit}"
+        if strict:
+            pytest.fail(message)
+        logger.info(f"[FINDING] {message}")
+    elif summary.median > threshold:
+        logger.info(f"  ├─ {summary.name} over budget but within noise (CI {summary.median_ci})")
+
+
 @pytest.mark.performance
-def test_perf_01_homepage_cold_load_tti(settings):
+@pytest.mark.fresh_browser
+def test_perf_01_homepage_cold_load_tti(driver, settings):
     """PERF-01 Homepage Cold Load (First Visit)
 
-    Emulate 4G 70ms RTT, clear cache, load once and measure LCP, TBT, CLS, total transfer size.
+    Emulate 4G 70ms RTT, clear cache before every load and sample LCP, TBT, CLS,
+    load time and total transfer size over --perf-iterations runs.
     Success criteria captured from user CSV.
     """
-    driver = _create_chrome(headless=True)
-    try:
-        _emulate_network(driver, latency_ms=70, download_mbps=12)
-        # clear cache / service workers
-        try:
-            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
-            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
-        except Exception:
-            pass
-
-        start = time.time()
-        logger.info("  ├─ Loading homepage with 4G throttling...")
-        driver.get(Config.BASE_URL)
-        # wait a bit for observers to record
-        time.sleep(2)
-        metrics = _collect_performance_metrics(driver) or {}
-        load_time = time.time() - start
-
-        # heuristics / approximations
-        lcp_raw = metrics.get("lcp")
-        lcp = (lcp_raw / 1000.0) if isinstance(lcp_raw, (int, float)) and lcp_raw > 0 else load_time
-        tbt_raw = metrics.get("tbt") or 0
-        tbt = (tbt_raw / 1000.0) if isinstance(tbt_raw, (int, float)) else 0.0
-        cls = float(metrics.get("cls") or 0.0)
-        transfer = metrics.get("transferSize") or 0
-        total_kb = (transfer / 1024.0) if isinstance(transfer, (int, float)) else 0.0
-
-        logger.info(f"  ├─ Measured: Load {load_time:.2f}s, LCP {lcp:.2f}s, TBT {tbt:.2f}s, CLS {cls:.3f}, {total_kb:.0f}KB")
-        slow_down(0.5)
-
-        # Make performance assertions strict in all runs to surface regressions.
-        # Tightened thresholds intentionally to reveal issues during QA.
-        assert lcp <= 1.5, f"LCP too high: {lcp}s"
-        logger.info(f"  ├─ ✅ LCP OK: {lcp:.2f}s ≤ 1.5s")
-        # use load_time as proxy TTI
-        assert load_time <= 2.0, f"Load time (proxy TTI) too high: {load_time}s"
-        logger.info(f"  ├─ ✅ Load time OK: {load_time:.2f}s ≤ 2.0s")
-        assert tbt <= 0.05, f"TBT too high: {tbt}s"
-        logger.info(f"  ├─ ✅ TBT OK: {tbt:.2f}s ≤ 0.05s")
-        assert cls <= 0.05, f"CLS too high: {cls}"
-        logger.info(f"  ├─ ✅ CLS OK: {cls:.3f} ≤ 0.05")
-        assert total_kb <= 1000.0, f"Total transfer > 1.0MB: {total_kb}KB"
-        logger.info(f"  ├─ ✅ Transfer OK: {total_kb:.0f}KB ≤ 1000KB")
-    finally:
-        driver.quit()
+    _emulate_network(driver, latency_ms=70, download_mbps=12)
+    logger.info(f"  ├─ Sampling {settings.perf_iterations} cold loads with 4G throttling...")
+    stats = _sample_page_loads(
+        driver, Config.BASE_URL, iterations=settings.perf_iterations, warmup=settings.perf_warmup, cold=True,
+        network="4g-cold",
+    )
+
+    # Strict in all runs to surface regressions; the CI keeps single noisy loads from failing.
+    _check_budget(stats["lcp_s"], 1.5, "s", strict=True)
+    # use load_time as proxy TTI
+    _check_budget(stats["load_s"], 2.0, "s", strict=True)
+    _check_budget(stats["tbt_s"], 0.05, "s", strict=True)
+    _check_budget(stats["cls"], 0.05, "", strict=True)
+    _check_budget(stats["transfer_kb"], 1000.0, "KB", strict=True)
 
 
 @pytest.mark.performance
-def test_perf_02_homepage_warm_load_cache_enabled(settings):
+def test_perf_02_homepage_warm_load_cache_enabled(driver, settings):
     """PERF-02 Homepage Warm Load (Repeat View)
 
-    Load the homepage once to populate cache, then reload and measure.
+    Warmup loads populate the cache, then repeat views are sampled.
     """
-    driver = _create_chrome(headless=True)
-    try:
-        _emulate_network(driver, latency_ms=70, download_mbps=12)
-        driver.get(Config.BASE_URL)
-        time.sleep(1)
-        # second load (cache enabled)
-        start = time.time()
-        driver.get(Config.BASE_URL)
-        time.sleep(1)
-        load_time = time.time() - start
-        metrics = _collect_performance_metrics(driver) or {}
-        lcp_raw = metrics.get("lcp")
-        lcp = (lcp_raw / 1000.0) if isinstance(lcp_raw, (int, float)) and lcp_raw > 0 else load_time
-
-        if settings.audit_strict:
-            assert lcp <= 1.0, f"Warm LCP too high: {lcp}s"
-            assert load_time <= 1.2, f"Warm load TTI proxy too high: {load_time}s"
-        else:
-            if lcp > 1.0:
-                logger.info(f"[FINDING] warm LCP too high: {lcp:.2f}s (threshold 1.0s)")
-            if load_time > 1.2:
-                logger.info(f"[FINDING] warm load time too high: {load_time:.2f}s (threshold 1.2s)")
-    finally:
-        driver.quit()
+    _emulate_network(driver, latency_ms=70, download_mbps=12)
+    stats = _sample_page_loads(
+        driver, Config.BASE_URL, iterations=settings.perf_iterations, warmup=max(1, settings.perf_warmup), cold=False,
+        network="4g-warm",
+    )
+    _check_budget(stats["lcp_s"], 1.0, "s", strict=settings.audit_strict)
+    _check_budget(stats["load_s"], 1.2, "s", strict=settings.audit_strict)
 
 
 @pytest.mark.performance
-def test_perf_06_api_docs_on_slow_3g(settings):
+def test_perf_06_api_docs_on_slow_3g(driver, settings):
     """PERF-06 API Docs Page on slow 3G
 
     Simulate slow 3G and assert LCP ≤ 2.5s on the target docs page.
     """
-    driver = _create_chrome(headless=True)
-    try:
-        # slow 3G ~ 400 kbps, 400 ms RTT
-        _emulate_network(driver, latency_ms=400, download_mbps=0.4, upload_mbps=0.2)
-        target = Config.BASE_URL.rstrip('/') + '/data/api-docs'
-        driver.get(target)
-        time.sleep(2)
-        metrics = _collect_performance_metrics(driver) or {}
-        lcp_raw = metrics.get("lcp")
-        lcp = (lcp_raw / 1000.0) if isinstance(lcp_raw, (int, float)) and lcp_raw > 0 else None
-        if lcp is None:
-            pytest.skip('LCP not available from this environment')
-        if settings.audit_strict:
-            assert lcp <= 2.5, f"API docs LCP too high on slow 3G: {lcp}s"
-        elif lcp > 2.5:
-            logger.info(f"[FINDING] API docs LCP too high on slow 3G: {lcp:.2f}s (threshold 2.5s)")
-    finally:
-        driver.quit()
+    # slow 3G ~ 400 kbps, 400 ms RTT
+    _emulate_network(driver, latency_ms=400, download_mbps=0.4, upload_mbps=0.2)
+    target = Config.BASE_URL.rstrip('/') + '/data/api-docs'
+    driver.get(target)
+    BasePage(driver).wait_for_network_idle(timeout=15)
+    metrics = _collect_performance_metrics(driver) or {}
+    lcp_raw = metrics.get("lcp")
+    lcp = (lcp_raw / 1000.0) if isinstance(lcp_raw, (int, float)) and lcp_raw > 0 else None
+    if lcp is None:
+        pytest.skip('LCP not available from this environment')
+    perf_history.record("lcp_s", lcp, page=perf_history.page_key(target), network="slow-3g")
+    if settings.audit_strict:
+        assert lcp <= 2.5, f"API docs LCP too high on slow 3G: {lcp}s"
+    elif lcp > 2.5:
+        logger.info(f"[FINDING] API docs LCP too high on slow 3G: {lcp:.2f}s (threshold 2.5s)")
 
 
 @pytest.mark.performance
@@ -182,46 +181,82 @@ def test_perf_11_404_page_speed(settings):
     """PERF-11 Broken Link / 404 Page Speed
 
     Single-request check: response time < 500 ms and payload < 50 KB.
-    For load scenarios run the k6 script provided in tests/perf_scripts.
+    Load scenarios live in utils.load_engine (see test_perf_load_scenario).
     """
     url = Config.BASE_URL.rstrip('/') + '/this-page-does-not-exist-2025'
     start = time.time()
-    r = head_or_get(url, timeout=10)
-    elapsed = (time.time() - start) * 1000.0
+    paced = thread_waited_s()
+    # Streamed GET: the timing stops at the response headers, the body is read below.
+    r = head_or_get(url, timeout=10, use_cache=False, with_body=True)
+    # Time spent in the client-side rate limiter is not the server's.
+    elapsed = (time.time() - start - (thread_waited_s() - paced)) * 1000.0
+    perf_history.record("response_ms", elapsed, page="404-probe")
     if r.status_code in (403, 429):
+        r.close()
         pytest.skip(f"404 probe blocked by WAF/CDN (HTTP {r.status_code})")
     assert r.status_code == 404 or r.status_code == 200
+    payload = len(r.content)
+    logger.info(f"404 probe: {payload} bytes ({bytes_transferred(r)} on the wire) in {elapsed:.0f} ms")
     if settings.audit_strict:
         assert elapsed <= 500, f"404 page response too slow: {elapsed} ms"
-        assert len(r.content) <= 50 * 1024, f"404 payload too large: {len(r.content)} bytes"
+        assert payload <= 50 * 1024, f"404 payload too large: {payload} bytes"
     else:
         if elapsed > 500:
             logger.info(f"[FINDING] 404 response slow: {elapsed:.0f} ms ({url})")
-        if len(r.content) > 50 * 1024:
-            logger.info(f"[FINDING] 404 payload large: {len(r.content)} bytes ({url})")
-
-
-def _k6_available():
-    return shutil.which('k6') is not None
+        if payload > 50 * 1024:
+            logger.info(f"[FINDING] 404 payload large: {payload} bytes ({url})")
 
 
-@pytest.mark.skipif(not _k6_available(), reason="k6 not installed; see tests/perf_scripts for k6 scenarios")
-def test_perf_k6_run_smoke():
-    """Run a small k6 smoke scenario (if k6 is installed).
+@pytest.mark.load
+@pytest.mark.load_scenario
+@pytest.mark.parametrize("scenario_key", sorted(SCENARIOS))
+def test_perf_load_scenario(scenario_key, settings, record_property):
+    """Run a scenario ported from tests/perf_scripts on the native load engine.
 
-    This is a convenience wrapper that will run a short k6 JS file from tests/perf_scripts.
-    Use the full k6 scripts for real load testing on a properly provisioned runner.
+    The smoke profile keeps each scenario's shape but caps VUs/duration
+    (--load-max-vus, --load-max-duration); --load-profile=full runs it as written.
+    Thresholds fail the test in the full profile or with --audit-strict.
     """
-    script = Path(__file__).parent / 'perf_scripts' / 'perf_03_concurrent_homepage.js'
-    assert script.exists(), f"Missing k6 script: {script}"
-    proc = subprocess.run(['k6', 'run', str(script)], capture_output=True, text=True, timeout=600)
-    print(proc.stdout)
-    assert proc.returncode == 0
+    scenario = SCENARIOS[scenario_key]
+    if settings.load_profile == "smoke":
+        scenario = scenario.scaled(
+            max_vus=settings.load_max_vus, max_duration_s=settings.load_max_duration_s, think_scale=0.01
+        )
+    log_step(logger, 1, f"{scenario.name}: {scenario.max_vus} VUs for {scenario.duration_s:.0f}s ({settings.load_profile})")
+    # No rate limiter: the scenario's VUs and think times are the load model, and a
+    # client-side ceiling would make the latencies describe the limiter, not the site.
+    result = run_scenario(scenario, {"base_url": settings.base_url, "map_url": settings.map_url})
+    log_step(logger, 2, "Checking thresholds")
+
+    logger.info(f"[LOAD] {result.summary()}")
+    for q in (50, 90, 95, 99):
+        record_property(f"p{q}_ms", round(result.percentile_ms(q), 1))
+    record_property("requests", result.requests)
+    record_property("failure_rate", round(result.failure_rate, 5))
+    perf_history.record(
+        "load_p95_ms",
+        result.percentile_ms(95) if result.requests else None,
+        page=scenario.name,
+        network=settings.load_profile,
+    )
+
+    assert result.requests > 0, f"{scenario.name} completed no requests"
+    checks = result.check_thresholds()
+    for check in checks:
+        log_check(logger, check.describe(), passed=check.ok)
+    failed = [check for check in checks if not check.ok]
+    if failed:
+        message = "; ".join(check.describe() for check in failed)
+        if settings.load_profile == "full" or settings.audit_strict:
+            pytest.fail(f"{scenario.name} thresholds crossed: {message}")
+        logger.info(f"[FINDING] {scenario.name} thresholds crossed: {message}")
 import pytest
 import time
 from pages.explorer_page import ExplorerPage
 from config.config import Config
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.support.ui import WebDriverWait
 
 @pytest.mark.performance
 class TestPerformanceSuite:
@@ -237,6 +272,7 @@ class TestPerformanceSuite:
         start_time = time.time()
         map_loaded = explorer_page.is_map_visible()
         load_time = time.time() - start_time
+        perf_history.record("tc08_map_visible_s", load_time, page=perf_history.page_key(settings.map_url))
         assert map_loaded, "Map did not become visible within the timeout."
         assert load_time < Config.MAP_LOAD_THRESHOLD, f"Map load time ({load_time:.2f}s) exceeded threshold."
 
@@ -248,6 +284,7 @@ class TestPerformanceSuite:
         start_time = time.time()
         explorer_page.search_for_flight("AAL")  # American Airlines
         response_time = time.time() - start_time
+        perf_history.record("tc09_search_s", response_time, page=perf_history.page_key(settings.map_url))
         assert response_time < 5.0, f"Search response time ({response_time:.2f}s) was too slow."
 
     def test_10_flight_details_panel_response_time(self, setup, settings):
@@ -263,6 +300,7 @@ class TestPerformanceSuite:
         start_time = time.time()
         details_visible = explorer_page.is_flight_details_panel_visible()
         response_time = time.time() - start_time
+        perf_history.record("tc10_details_panel_s", response_time, page=perf_history.page_key(settings.map_url))
         assert details_visible, "Flight details panel did not appear."
         assert response_time < Config.API_RESPONSE_THRESHOLD, f"Details panel took too long to appear ({response_time:.2f}s)."
 
@@ -280,6 +318,7 @@ class TestPerformanceSuite:
             actions.move_to_element(map_element).double_click().pause(0.2).perform()
             actions.drag_and_drop_by_offset(map_element, 100, 50).pause(0.2).perform()
         total_time = time.time() - start_time
+        perf_history.record("tc11_map_interaction_s", total_time, page=perf_history.page_key(settings.map_url))
         assert total_time < 25, f"Map interaction stress test took too long ({total_time:.2f}s)."
 
     @pytest.mark.load
@@ -287,9 +326,14 @@ class TestPerformanceSuite:
         """TC12: Basic load test by simulating multiple tabs."""
         driver = setup
         original_window = driver.current_window_handle
+        start_time = time.time()
         for _ in range(3):
             driver.execute_script("window.open(arguments[0]);", Config.BASE_URL)
-            time.sleep(1)
+        try:
+            WebDriverWait(driver, 10).until(lambda d: len(d.window_handles) == 4)
+        except TimeoutException:
+            pass
+        perf_history.record("tc12_open_tabs_s", time.time() - start_time, page=perf_history.page_key(Config.BASE_URL))
         assert len(driver.window_handles) == 4, "Failed to open new tabs."
         # Close tabs
         for window in driver.window_handles:
@@ -302,9 +346,11 @@ class TestPerformanceSuite:
     def test_13_page_refresh_stress_test(self, setup):
         """TC13: Stress test by repeatedly refreshing the page."""
         driver = setup
+        page = ExplorerPage(driver)
         start_time = time.time()
         for _ in range(5):
             driver.refresh()
-            time.sleep(0.5)
+            page.wait_for_animation_frames()
         total_time = time.time() - start_time
+        perf_history.record("tc13_refresh_x5_s", total_time, page=perf_history.page_key(driver.current_url))
         assert total_time < 30, f"Page refresh stress test took too long ({total_time:.2f}s)."
@@ -1,11 +1,11 @@
 import os
-import time
 from pathlib import Path
 
 import pytest
 from selenium.webdriver.common.by import By
 
 from config.config import Config
+from pages.base_page import BasePage
 from tests.test_logger import get_logger, log_step, log_check, slow_down
 
 logger = get_logger(__name__)
@@ -67,7 +67,8 @@ def test_cb_matrix(cb_id, expected_browser, os_name, path, desc, request, driver
 
     log_step(logger, 1, f"Loading {url} on {running_browser}")
     driver.get(url)
-    time.sleep(1)
+    ready = BasePage(driver).wait_until_ready()
+    log_check(logger, f"Page ready after {ready.waited_s:.2f}s", passed=ready.satisfied)
 
     # Take screenshot for visual comparison / manual review
     ss_dir = _ensure_screenshot_dir()
@@ -92,7 +93,7 @@ def test_cb_matrix(cb_id, expected_browser, os_name, path, desc, request, driver
         nav_link = driver.find_element(By.CSS_SELECTOR, 'a[href]')
         href = nav_link.get_attribute('href')
         nav_link.click()
-        time.sleep(0.8)
+        BasePage(driver).wait_until_ready(timeout=5)
         clickable = True
         log_check(logger, "Primary link is clickable")
     except Exception:
@@ -1,10 +1,10 @@
-import time
 from pathlib import Path
 
 import pytest
 
 from config.config import Config
 from tests.test_logger import get_logger, log_step, log_check
+from utils.responsive_engine import ResponsiveEngine, Viewport
 
 logger = get_logger(__name__)
 
@@ -31,79 +31,103 @@ def _ensure_resp_screenshots_dir():
     return p
 
 
-def _has_horizontal_scroll(driver):
-    script = "return document.documentElement.scrollWidth > window.innerWidth;"
-    try:
-        return driver.execute_script(script)
-    except Exception:
-        return False
-
-
-def _largest_tap_target_bounding(driver):
-    # find buttons/links and compute max bounding box area/size for tap target heuristic
-    script = """
-    let els = Array.from(document.querySelectorAll('a, button, [role=button], input[type=button], input[type=submit]'));
-    let sizes = els.map(e=>{
-      let r = e.getBoundingClientRect();
-      return {w: r.width, h: r.height, text: e.innerText||e.getAttribute('aria-label')||''};
-    });
-    return sizes;
-    """
-    try:
-        return driver.execute_script(script)
-    except Exception:
-        return []
+def _viewport(case_id, w, h, device):
+    # RWD-11 approximates 125% browser zoom with CSS zoom; RWD-12 forces prefers-color-scheme: dark.
+    if case_id == 'RWD-11':
+        return Viewport(case_id, w, h, device, zoom=1.25)
+    if case_id == 'RWD-12':
+        return Viewport(case_id, w, h, device, color_scheme='dark')
+    return Viewport(case_id, w, h, device)
+
+
+def _selected_cases(session):
+    cases = set()
+    for item in session.items:
+        callspec = getattr(item, 'callspec', None)
+        if callspec is not None and 'case_id' in callspec.params and item.name.startswith('test_responsive_viewports'):
+            cases.add(callspec.params['case_id'])
+    return cases
+
+
+def _runs_whole_module(config):
+    # An xdist worker collects every test but runs only what the scheduler hands it,
+    # so session.items says nothing about its cases unless whole modules are assigned.
+    if not hasattr(config, 'workerinput'):
+        return True
+    return getattr(config.option, 'dist', 'no') in ('loadfile', 'loadscope')
+
 
+class _ResponsiveProbes:
+    """Probes RWD cases with the engine on first use and memoises the results.
 
-def _code_blocks_overflow(driver):
-    # Return True if any <pre> or .code block overflows horizontally
-    script = """
-    let blocks = Array.from(document.querySelectorAll('pre, code, .code'));
-    for (let b of blocks){ if (b.scrollWidth > b.clientWidth) return true; }
-    return false;
+    With ``batch_cases`` every one of them is probed together on the first lookup
+    (more tabs in flight); otherwise each case is probed when its test asks for it.
     """
+
+    def __init__(self, engine, batch_cases=()):
+        self.engine = engine
+        self._batch = set(batch_cases)
+        self._results = {}
+
+    def result(self, case_id, url):
+        key = (case_id, url)
+        if key not in self._results:
+            cases = (self._batch | {case_id}) if self._batch else {case_id}
+            self._batch = set()
+            self._probe(cases)
+        return self._results[key]
+
+    def _probe(self, cases):
+        jobs = []
+        for case_id, w, h, device, pages in RWD_MATRIX:
+            if case_id not in cases:
+                continue
+            viewport = _viewport(case_id, w, h, device)
+            for p in pages:
+                jobs.append((viewport, Config.BASE_URL.rstrip('/') + p))
+        logger.info(f"[RWD] probing {len(jobs)} viewport/page pairs for {', '.join(sorted(cases))}")
+        for r in self.engine.run(jobs):
+            self._results[(r.viewport.case_id, r.url)] = r
+
+
+@pytest.fixture(scope='module')
+def responsive_results(request, driver_pool, settings):
+    """One pooled browser for the module, probing viewports concurrently in tabs."""
+    batch = _selected_cases(request.session) if _runs_whole_module(request.config) else ()
+    driver = driver_pool.acquire()
     try:
-        return driver.execute_script(script)
-    except Exception:
-        return False
+        engine = ResponsiveEngine(driver, max_tabs=settings.responsive_tabs, screenshot_dir=_ensure_resp_screenshots_dir())
+        mode = f"{settings.responsive_tabs} parallel tabs" if engine.cdp else "serial window resizing (no CDP)"
+        logger.info(f"[RWD] probing via {mode}")
+        yield _ResponsiveProbes(engine, batch)
+    finally:
+        driver_pool.release(driver)
 
 
 @pytest.mark.responsive
 @pytest.mark.parametrize('case_id,w,h,device,pages', RWD_MATRIX)
-def test_responsive_viewports(case_id, w, h, device, pages, driver, settings):
+def test_responsive_viewports(request, case_id, w, h, device, pages, responsive_results, settings):
     """Run a set of responsive checks for a given viewport.
 
     Checks include: no horizontal scroll, tap target sizes, code block overflow, and screenshots.
+    Pages are probed by the module-level responsive engine; this test asserts on its results.
     """
-    ss_dir = _ensure_resp_screenshots_dir()
-
     log_step(logger, 1, f"Testing {device} viewport {w}x{h}px")
-    
-    # set viewport
-    try:
-        driver.set_window_size(w, h)
-    except Exception:
-        # some drivers ignore set_window_size in headless; emulation via CDP when available
-        pass
 
     for p in pages:
         url = Config.BASE_URL.rstrip('/') + p
-        log_step(logger, 2, f"Loading {p or 'homepage'}")
-        driver.get(url)
-        time.sleep(1)
-
-        # screenshot
-        fname = ss_dir / f"{case_id}_{w}x{h}_{p.strip('/').replace('/','_') or 'home'}.png"
-        try:
-            log_step(logger, 3, f"Capturing screenshot")
-            driver.save_screenshot(str(fname))
-            log_check(logger, f"Screenshot saved")
-        except Exception:
-            pass
+        result = responsive_results.result(case_id, url)
+        # The probe's tab is gone by now; its screenshot is what a failure report attaches.
+        request.node.failure_screenshot = result.screenshot
+        log_step(logger, 2, f"Checking {p or 'homepage'}")
+        log_check(logger, "Page ready", passed=result.ready)
+        assert result.error is None, f"Responsive probe failed for {case_id} on {p}: {result.error}"
+        if result.screenshot is not None:
+            log_check(logger, f"Screenshot saved: {result.screenshot.name}")
 
         # check horizontal scroll
-        log_step(logger, 4, f"Checking for horizontal scroll")
-        has_scroll = _has_horizontal_scroll(driver)
+        log_step(logger, 3, f"Checking for horizontal scroll")
+        has_scroll = result.horizontal_scroll
         if has_scroll:
             logger.info(f"[FINDING] Horizontal scroll detected for {case_id} at {w}x{h} on {p}")
             if settings.audit_strict:
@@ -112,46 +136,25 @@ def test_responsive_viewports(case_id, w, h, device, pages, driver, settings):
             log_check(logger, f"No horizontal scroll")
 
         # tap targets: ensure at least one primary control has width/height >= 44px
-        log_step(logger, 5, f"Verifying tap targets >= 44px")
-        sizes = _largest_tap_target_bounding(driver)
-        ok_tap = False
-        for s in sizes:
-            try:
-                if (s.get('w', 0) >= 44 and s.get('h', 0) >= 44):
-                    ok_tap = True
-                    break
-            except Exception:
-                continue
-        assert ok_tap, f"No tap targets >=44px detected for {case_id} at {w}x{h} on {p}"
+        log_step(logger, 4, f"Verifying tap targets >= 44px")
+        assert result.tap_target_ok, (
+            f"No tap targets >=44px detected for {case_id} at {w}x{h} on {p} "
+            f"(largest {result.largest_tap_target[0]:.0f}x{result.largest_tap_target[1]:.0f})"
+        )
         log_check(logger, f"Tap targets >= 44px found")
 
         # code blocks overflow check for pages where code is expected
         if '/data/api-docs' in p or '/feed' in p:
-            overflow = _code_blocks_overflow(driver)
-            if overflow:
+            if result.code_overflow:
                 logger.info(f"[FINDING] Code block overflow detected for {case_id} at {w}x{h} on {p}")
                 if settings.audit_strict:
-                    assert not overflow, f"Code block overflow detected for {case_id} at {w}x{h} on {p}"
-
-        # zoom / accessibility checks (approximate): when case is RWD-11 we check for layout break
-        if case_id == 'RWD-11':
-            # attempt to simulate browser zoom by increasing page scale via JS
-            try:
-                driver.execute_script("document.body.style.zoom='125%';")
-                time.sleep(0.5)
-                has_scroll_zoom = _has_horizontal_scroll(driver)
-                assert not has_scroll_zoom, f"Layout breaks under zoom for {case_id} on {p}"
-            finally:
-                driver.execute_script("document.body.style.zoom='100%';")
-
-        # dark mode forced (best-effort): try to emulate prefers-color-scheme if available
+                    assert not result.code_overflow, f"Code block overflow detected for {case_id} at {w}x{h} on {p}"
+
+        # zoom / accessibility checks (approximate): the probe re-measures under 125% CSS zoom
+        if case_id == 'RWD-11' and result.zoom_horizontal_scroll is not None:
+            assert not result.zoom_horizontal_scroll, f"Layout breaks under zoom for {case_id} on {p}"
+
+        # dark mode forced (best-effort): emulated per tab before navigation
         if case_id == 'RWD-12':
-            try:
-                driver.execute_cdp_cmd('Emulation.setEmulatedMedia', {'features': [{'name': 'prefers-color-scheme', 'value': 'dark'}]})
-                time.sleep(0.5)
-                # sample background & foreground colors
-                colors = driver.execute_script("return {bg:getComputedStyle(document.documentElement).backgroundColor, fg:getComputedStyle(document.documentElement).color};")
-                assert colors and ('rgb' in colors.get('bg','') or 'rgba' in colors.get('bg',''))
-            except Exception:
-                # not all drivers support CDP for emulation; skip strict failure
-                pass
+            bg = result.colors.get('bg', '')
+            log_check(logger, f"Dark mode colors bg={bg} fg={result.colors.get('fg', '')}", passed='rgb' in bg)
@@ -1,7 +1,8 @@
 import pytest
 
 from tests.test_logger import get_logger, log_step
-from utils.web_audit import check_urls, collect_dom_urls, is_internal_url
+from utils.site_crawler import SiteCrawler
+from utils.web_audit import check_urls, collect_dom_urls, collect_page_urls, is_internal_url
 
 logger = get_logger(__name__)
 
@@ -20,13 +21,20 @@ PAGES = [
 @pytest.mark.links
 @pytest.mark.audit
 @pytest.mark.parametrize("path,desc", PAGES)
-def test_links_01_internal_links_not_broken(driver, settings, path, desc):
+def test_links_01_internal_links_not_broken(request, settings, path, desc):
     url = settings.base_url.rstrip("/") + path
-    log_step(logger, 1, f"Loading {desc}: {url}")
-    driver.get(url)
 
-    log_step(logger, 2, "Collecting DOM URLs (a/script/link/img)")
-    collected = collect_dom_urls(driver, base_url=settings.base_url)
+    def render(page_url: str) -> dict[str, list[str]]:
+        # Only client-rendered (or HTTP-blocked) pages pay for a browser.
+        logger.info(f"{desc} is client-rendered; collecting URLs in the browser")
+        driver = request.getfixturevalue("driver")
+        driver.get(page_url)
+        return collect_dom_urls(driver, base_url=settings.base_url)
+
+    log_step(logger, 1, f"Collecting URLs (a/script/link/img) from {desc}: {url}")
+    collected = collect_page_urls(
+        url, base_url=settings.base_url, render=render, timeout=settings.link_check_timeout_s
+    )
     urls = collected["links"]
 
     # Internal only by default; external links tend to be noisy and out of scope.
@@ -38,13 +46,15 @@ def test_links_01_internal_links_not_broken(driver, settings, path, desc):
     else:
         to_check = internal
 
-    log_step(logger, 3, f"Checking {min(len(to_check), settings.link_check_max)} URLs")
+    log_step(logger, 2, f"Checking {min(len(to_check), settings.link_check_max)} URLs")
     results = check_urls(
         to_check,
         timeout=settings.link_check_timeout_s,
         max_urls=settings.link_check_max,
         delay_s=settings.link_check_delay_s,
         require_https=False,
+        max_workers=settings.link_check_workers,
+        per_host=settings.link_check_per_host,
     )
 
     broken = [r for r in results if not r.ok]
@@ -54,3 +64,33 @@ def test_links_01_internal_links_not_broken(driver, settings, path, desc):
     if settings.audit_strict:
         assert not broken, f"Broken links/resources on {url}: {[(b.url, b.status_code) for b in broken]}"
 
+
+@pytest.mark.links
+@pytest.mark.audit
+def test_links_02_site_crawl(request, settings):
+    def render(url: str) -> dict[str, list[str]]:
+        # One browser for the whole crawl (the crawler renders one page at a time),
+        # only for pages the HTML parser cannot handle.
+        driver = request.getfixturevalue("driver")
+        driver.get(url)
+        return collect_dom_urls(driver, base_url=url)
+
+    log_step(logger, 1, f"Crawling {settings.base_url} (max {settings.crawl_max_pages} pages, depth {settings.crawl_max_depth})")
+    crawler = SiteCrawler(
+        settings.base_url,
+        render=render,
+        max_depth=settings.crawl_max_depth,
+        max_pages=settings.crawl_max_pages,
+        check_external=settings.check_external_links,
+        workers=settings.link_check_workers,
+        timeout=settings.link_check_timeout_s,
+        checkpoint_path=settings.crawl_checkpoint,
+    )
+    result = crawler.crawl(resume=settings.crawl_resume)
+
+    log_step(logger, 2, f"{result.stats.describe()} complete={result.complete} in {result.elapsed_s:.1f}s")
+    if result.broken:
+        details = [(b.result.url, b.result.status_code, b.referrer) for b in result.broken[:10]]
+        logger.info(f"[FINDING] broken links/resources found by the crawl: {details}")
+    if settings.audit_strict:
+        assert not result.broken, f"Broken links/resources: {[(b.result.url, b.result.status_code) for b in result.broken]}"
@@ -1,7 +1,6 @@
-import time
-
 import pytest
 
+from pages.base_page import BasePage
 from tests.test_logger import get_logger, log_step
 
 logger = get_logger(__name__)
@@ -42,7 +41,7 @@ def test_js_01_no_console_errors_on_key_pages(driver, settings, path, desc):
     url = settings.base_url.rstrip("/") + path
     log_step(logger, 1, f"Loading {desc}: {url}")
     driver.get(url)
-    time.sleep(1.0)
+    BasePage(driver).wait_until_ready()
 
     severe = _browser_severe_logs(driver)
     collected = _collected_js_errors(driver)
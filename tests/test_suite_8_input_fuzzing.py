@@ -1,8 +1,7 @@
-import time
-
 import pytest
 from selenium.webdriver.common.by import By
 
+from pages.base_page import BasePage
 from tests.test_logger import get_logger, log_step, log_check
 
 logger = get_logger(__name__)
@@ -23,13 +22,14 @@ def test_input_01_map_search_rejects_dom_xss(driver, settings, payload):
     url = settings.map_url
     log_step(logger, 1, f"Loading map: {url}")
     driver.get(url)
-    time.sleep(2)
+    page = BasePage(driver)
+    page.wait_until_ready()
 
     log_step(logger, 2, "Typing payload into search input")
     search = driver.find_element(By.ID, "search_input")
     search.clear()
     search.send_keys(payload)
-    time.sleep(1.0)
+    page.wait_for_dom_quiet(timeout=5)
 
     log_step(logger, 3, "Ensuring no alert was triggered")
     alert_present = False
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from tests.test_logger import get_logger, log_step
+from utils.url_cache import UrlVerdictCache, cache_key
+
+logger = get_logger(__name__)
+
+
+def _wait_for(predicate, timeout_s: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.mark.nonfunctional
+def test_url_cache_key_normalization():
+    assert cache_key("HTTPS://Example.org:443#top") == "https://example.org/"
+    assert cache_key("http://example.org:8080/a?q=1") == "http://example.org:8080/a?q=1"
+
+
+@pytest.mark.nonfunctional
+def test_url_cache_ttl_and_lru_eviction():
+    cache = UrlVerdictCache(ttl_s=0.2, max_entries=2)
+    calls = []
+
+    def fetch(url):
+        return lambda: calls.append(url) or f"verdict {url}"
+
+    log_step(logger, 1, "Hits are served from the cache; uncacheable values are refetched")
+    assert cache.get_or_fetch("https://a.test/", fetch("a")) == "verdict a"
+    assert cache.get_or_fetch("https://A.test:443/#x", fetch("a")) == "verdict a"
+    cache.get_or_fetch("https://u.test/", fetch("u"), cacheable=lambda _value: False)
+    cache.get_or_fetch("https://u.test/", fetch("u"), cacheable=lambda _value: False)
+    assert calls == ["a", "u", "u"]
+
+    log_step(logger, 2, "The least recently used entry is evicted over max_entries")
+    cache.get_or_fetch("https://b.test/", fetch("b"))
+    cache.get_or_fetch("https://a.test/", fetch("a"))  # a is now the most recent
+    cache.get_or_fetch("https://c.test/", fetch("c"))  # evicts b
+    cache.get_or_fetch("https://a.test/", fetch("a"))
+    cache.get_or_fetch("https://b.test/", fetch("b"))
+    assert calls == ["a", "u", "u", "b", "c", "b"]
+    assert cache.stats().evictions == 2 and cache.stats().size == 2
+
+    log_step(logger, 3, "Expired entries are fetched again")
+    time.sleep(0.25)
+    cache.get_or_fetch("https://b.test/", fetch("b"))
+    assert calls[-1] == "b" and len(calls) == 7
+
+    log_step(logger, 4, "Shrinking max_entries evicts immediately")
+    cache.configure(ttl_s=0.2, max_entries=0)
+    assert cache.stats().size == 0 and not cache.enabled
+
+
+@pytest.mark.nonfunctional
+def test_url_cache_coalesces_concurrent_fetches():
+    cache = UrlVerdictCache(ttl_s=60, max_entries=16)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(threading.get_ident())
+        assert release.wait(5)
+        return object()
+
+    log_step(logger, 1, "Four threads ask for the same URL while the first fetch is in flight")
+    results = [None] * 4
+
+    def worker(n):
+        results[n] = cache.get_or_fetch("https://a.test/page", fetch)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats().coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    log_step(logger, 2, "One fetch, one shared result")
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = cache.stats()
+    assert (stats.misses, stats.coalesced, stats.hits) == (1, 3, 0)
+
+
+@pytest.mark.nonfunctional
+def test_url_cache_propagates_errors_to_waiters_without_caching():
+    cache = UrlVerdictCache(ttl_s=60, max_entries=16)
+    release = threading.Event()
+
+    def failing():
+        assert release.wait(5)
+        raise ConnectionError("boom")
+
+    errors = []
+
+    def worker():
+        try:
+            cache.get_or_fetch("https://a.test/", failing)
+        except ConnectionError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats().coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert cache.get_or_fetch("https://a.test/", lambda: "ok") == "ok"
@@ -0,0 +1,88 @@
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from tests.test_logger import get_logger, log_step
+from utils import web_audit
+from utils.validator_store import ValidatorStore
+from utils.web_audit import head_or_get
+
+logger = get_logger(__name__)
+
+URL = "https://example.test/docs/"
+
+
+def _response(status: int, url: str = URL, headers: dict | None = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp.request = requests.Request("HEAD", url).prepare()
+    resp._content = b""
+    resp._content_consumed = True
+    return resp
+
+
+class _ScriptedSession:
+    """Replies from a script and records the method and headers of each request."""
+
+    def __init__(self, *replies: requests.Response):
+        self.replies = list(replies)
+        self.sent: list[tuple[str, dict]] = []
+
+    def _reply(self, method: str, headers: dict) -> requests.Response:
+        self.sent.append((method, dict(headers)))
+        return self.replies.pop(0)
+
+    def head(self, url, **kwargs):
+        return self._reply("HEAD", kwargs.get("headers") or {})
+
+    def get(self, url, **kwargs):
+        return self._reply("GET", kwargs.get("headers") or {})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ValidatorStore(tmp_path / "validators.sqlite")
+    monkeypatch.setattr(web_audit, "_validator_store", store)
+    yield store
+    store.close()
+
+
+@pytest.mark.nonfunctional
+def test_validator_store_rebuilds_verdict_from_304(store):
+    validators = {"ETag": '"v1"', "Last-Modified": "Tue, 01 Oct 2024 10:00:00 GMT"}
+    first = _ScriptedSession(_response(200, URL + "index.html", {**validators, "Content-Length": "512", "Server": "a"}))
+
+    log_step(logger, 1, "First check stores the validators and the verdict")
+    assert head_or_get(URL, session=first, use_cache=False).status_code == 200
+    record = store.get(URL)
+    assert record is not None and record.etag == '"v1"' and record.final_url == URL + "index.html"
+
+    log_step(logger, 2, "Next check is conditional; a 304 is turned back into the stored 200")
+    second = _ScriptedSession(_response(304, headers={"Date": "Wed, 02 Oct 2024 10:00:00 GMT", "Server": "b"}))
+    resp = head_or_get(URL, session=second, use_cache=False)
+    method, sent = second.sent[0]
+    assert method == "HEAD"
+    assert sent["If-None-Match"] == '"v1"' and sent["If-Modified-Since"] == validators["Last-Modified"]
+    assert resp.status_code == 200 and resp.url == URL + "index.html"
+    assert resp.reason == "OK (revalidated)"
+    assert resp.headers["ETag"] == '"v1"' and resp.headers["Server"] == "b" and "Date" in resp.headers
+    assert "Content-Length" not in resp.headers
+    assert store.get(URL).checked_at >= record.checked_at
+
+
+@pytest.mark.nonfunctional
+def test_validator_store_skips_partial_and_unvalidated_responses(store):
+    log_step(logger, 1, "HEAD rejected; the ranged GET fallback answers 206 with an ETag")
+    session = _ScriptedSession(_response(405), _response(206, headers={"ETag": '"v2"', "Content-Range": "bytes 0-0/900"}))
+    resp = head_or_get(URL, session=session, use_cache=False, fallback="range")
+    assert resp.status_code == 206
+    assert [method for method, _ in session.sent] == ["HEAD", "GET"]
+    assert session.sent[1][1]["Range"] == "bytes=0-0"
+    assert store.get(URL) is None, "a 206 describes a byte range, not the resource"
+
+    log_step(logger, 2, "Responses without validators and error responses are not stored")
+    head_or_get(URL, session=_ScriptedSession(_response(200, headers={"Server": "a"})), use_cache=False)
+    head_or_get(URL, session=_ScriptedSession(_response(404, headers={"ETag": '"v3"'})), use_cache=False)
+    assert store.get(URL) is None
@@ -0,0 +1,125 @@
+"""Background pipeline for failure artifacts (write/compress, then upload).
+
+The pytest report hook only snapshots what it needs from the browser and hands
+the rest to this pipeline, so a failing test does not block the next one while
+files are written or Jira uploads run. Each stage has a bounded queue (``submit``
+blocks when it is full, which caps memory held by pending screenshots) and a
+small thread pool; ``close`` drains both stages.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from utils.perf_stats import percentile
+
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    waits_s: list[float] = field(default_factory=list)
+    run_s: list[float] = field(default_factory=list)
+    failures: int = 0
+    max_depth: int = 0
+
+    def describe(self) -> str:
+        if not self.waits_s:
+            return f"{self.name}: idle"
+        return (
+            f"{self.name}: jobs={len(self.waits_s)} failed={self.failures} max_depth={self.max_depth} "
+            f"queue wait p50={percentile(self.waits_s, 50) * 1000:.0f}ms "
+            f"p95={percentile(self.waits_s, 95) * 1000:.0f}ms max={max(self.waits_s) * 1000:.0f}ms "
+            f"run p50={percentile(self.run_s, 50) * 1000:.0f}ms max={max(self.run_s) * 1000:.0f}ms"
+        )
+
+
+class _Stage:
+    def __init__(self, name: str, workers: int, maxsize: int, on_error: Callable[[str, str, BaseException], None]):
+        self.stats = StageStats(name)
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._on_error = on_error
+        self._threads = [
+            threading.Thread(target=self._work, name=f"artifacts-{name}-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, label: str, fn: Callable[[], Any]) -> None:
+        self._queue.put((label, fn, time.monotonic()))
+        with self._lock:
+            self.stats.max_depth = max(self.stats.max_depth, self._queue.qsize())
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            label, fn, enqueued = item
+            started = time.monotonic()
+            failed = False
+            try:
+                fn()
+            except BaseException as exc:  # keep the worker alive whatever a job raises
+                failed = True
+                self._on_error(self.stats.name, label, exc)
+            finally:
+                with self._lock:
+                    self.stats.waits_s.append(started - enqueued)
+                    self.stats.run_s.append(time.monotonic() - started)
+                    self.stats.failures += int(failed)
+
+    def close(self, timeout_s: float) -> bool:
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout_s
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
+
+
+class ArtifactPipeline:
+    """Two-stage worker pool: ``write`` jobs, optionally followed by ``upload`` jobs."""
+
+    def __init__(
+        self,
+        *,
+        write_workers: int = 2,
+        upload_workers: int = 2,
+        maxsize: int = 16,
+        on_error: Callable[[str, str, BaseException], None] | None = None,
+    ):
+        on_error = on_error or (lambda stage, label, exc: None)
+        self._write = _Stage("write", write_workers, maxsize, on_error)
+        self._upload = _Stage("upload", upload_workers, maxsize, on_error)
+        self._closed = False
+
+    def submit(self, label: str, write: Callable[[], Any], upload: Callable[[Any], None] | None = None) -> None:
+        """Queue ``write()``; when ``upload`` is given it runs on the upload stage with write's result."""
+        if self._closed:
+            raise RuntimeError("ArtifactPipeline is closed")
+
+        def job() -> None:
+            result = write()
+            if upload is not None:
+                self._upload.put(label, lambda: upload(result))
+
+        self._write.put(label, job)
+
+    def close(self, timeout_s: float = 120.0) -> bool:
+        """Drain both stages (writes first, since they feed uploads); False if a stage timed out."""
+        if self._closed:
+            return True
+        self._closed = True
+        started = time.monotonic()
+        writes_done = self._write.close(timeout_s)
+        uploads_done = self._upload.close(max(0.0, timeout_s - (time.monotonic() - started)))
+        return writes_done and uploads_done
+
+    def stats(self) -> list[StageStats]:
+        return [self._write.stats, self._upload.stats]
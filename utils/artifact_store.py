@@ -0,0 +1,253 @@
+"""Content-addressed, compressed store for failure artifacts.
+
+Layout under the artifacts directory::
+
+    blobs/<2 hex>/<sha256>.<codec>   one blob per distinct content, shared across tests and runs
+    <test dir>/manifest.json         per-test index: artifact name -> digest, sizes, codec
+    uploads.json                     digest -> Jira issue/attachment it was already uploaded as
+
+Text blobs are compressed with zstd when ``zstandard`` is installed and gzip
+otherwise; already-compressed media (PNG/JPEG) are stored as-is. ``gc`` enforces
+retention by manifest age and total blob size; blobs no manifest references are
+removed.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+MANIFEST_NAME = "manifest.json"
+_RAW_MEDIA = ("image/png", "image/jpeg", "application/gzip", "application/zip")
+
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    name: str
+    filename: str
+    media_type: str
+    digest: str
+    size: int
+    stored_size: int
+    codec: str
+
+
+@dataclass
+class StoreStats:
+    puts: int = 0
+    deduped: int = 0
+    bytes_in: int = 0
+    bytes_written: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"puts={self.puts} deduped={self.deduped} "
+            f"in={self.bytes_in / 1024:.0f}KB written={self.bytes_written / 1024:.0f}KB"
+        )
+
+
+@dataclass(frozen=True)
+class GcResult:
+    manifests_removed: int
+    blobs_removed: int
+    bytes_freed: int
+    bytes_kept: int
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _remove_manifest(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    try:
+        path.parent.rmdir()
+    except OSError:
+        pass  # the test directory still holds other files
+
+
+class ArtifactStore:
+    def __init__(self, root: Path, *, level: int = 6):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.level = level
+        self.text_codec = "zst" if zstandard is not None else "gz"
+        self.stats = StoreStats()
+        self._lock = threading.Lock()
+
+    # ---- blobs -------------------------------------------------------------
+
+    def _blob_path(self, digest: str, codec: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.{codec}"
+
+    def _find_blob(self, digest: str) -> Path | None:
+        for codec in ("raw", "zst", "gz"):
+            path = self._blob_path(digest, codec)
+            if path.exists():
+                return path
+        return None
+
+    def _compress(self, data: bytes, codec: str) -> bytes:
+        if codec == "zst":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        if codec == "gz":
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        return data
+
+    def put(self, name: str, filename: str, data: bytes, media_type: str) -> ArtifactRef:
+        """Store ``data`` once per distinct content; repeated content only refreshes its mtime."""
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self._find_blob(digest)
+        if existing is not None:
+            os.utime(existing)  # keeps shared blobs alive for size-based eviction
+            with self._lock:
+                self.stats.puts += 1
+                self.stats.deduped += 1
+                self.stats.bytes_in += len(data)
+            codec = existing.suffix.lstrip(".")
+            return ArtifactRef(name, filename, media_type, digest, len(data), existing.stat().st_size, codec)
+
+        codec = "raw" if media_type in _RAW_MEDIA else self.text_codec
+        stored = self._compress(data, codec)
+        _atomic_write(self._blob_path(digest, codec), stored)
+        with self._lock:
+            self.stats.puts += 1
+            self.stats.bytes_in += len(data)
+            self.stats.bytes_written += len(stored)
+        return ArtifactRef(name, filename, media_type, digest, len(data), len(stored), codec)
+
+    def put_text(self, name: str, filename: str, text: str, media_type: str) -> ArtifactRef:
+        return self.put(name, filename, text.encode("utf-8", errors="replace"), media_type)
+
+    def put_json(self, name: str, filename: str, value) -> ArtifactRef:
+        return self.put(name, filename, json.dumps(value, separators=(",", ":")).encode("utf-8"), "application/json")
+
+    def get(self, digest: str) -> bytes:
+        path = self._find_blob(digest)
+        if path is None:
+            raise FileNotFoundError(f"No blob {digest} in {self.blob_dir}")
+        data = path.read_bytes()
+        codec = path.suffix.lstrip(".")
+        if codec == "zst":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst blobs")
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == "gz":
+            return gzip.decompress(data)
+        return data
+
+    # ---- manifests ---------------------------------------------------------
+
+    def write_manifest(self, test_dir: Path, nodeid: str, refs: list[ArtifactRef]) -> Path:
+        manifest = {
+            "nodeid": nodeid,
+            "created": time.time(),
+            "artifacts": {ref.name: asdict(ref) for ref in refs},
+        }
+        path = Path(test_dir) / MANIFEST_NAME
+        _atomic_write(path, json.dumps(manifest, indent=2).encode("utf-8"))
+        return path
+
+    def manifests(self) -> list[Path]:
+        return sorted(p for p in self.root.glob(f"*/{MANIFEST_NAME}") if p.parent != self.blob_dir)
+
+    @staticmethod
+    def read_manifest(path: Path) -> dict:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+
+    def export(self, test_dir: Path, dest: Path) -> list[Path]:
+        """Write the artifacts of one test manifest back out as plain files."""
+        manifest = self.read_manifest(Path(test_dir) / MANIFEST_NAME)
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        written = []
+        for ref in manifest["artifacts"].values():
+            path = dest / ref["filename"]
+            path.write_bytes(self.get(ref["digest"]))
+            written.append(path)
+        return written
+
+    # ---- uploads -----------------------------------------------------------
+
+    def _uploads_path(self) -> Path:
+        return self.root / "uploads.json"
+
+    def _read_uploads(self) -> dict:
+        try:
+            return json.loads(self._uploads_path().read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def upload_record(self, digest: str) -> dict | None:
+        with self._lock:
+            return self._read_uploads().get(digest)
+
+    def record_upload(self, digest: str, issue_key: str, url: str | None) -> None:
+        with self._lock:
+            uploads = self._read_uploads()
+            uploads[digest] = {"issue": issue_key, "url": url, "at": time.time()}
+            _atomic_write(self._uploads_path(), json.dumps(uploads, indent=1).encode("utf-8"))
+
+    # ---- retention ---------------------------------------------------------
+
+    def gc(self, *, max_age_days: float | None = None, max_bytes: int | None = None) -> GcResult:
+        """Drop manifests older than max_age_days, then the oldest until blobs fit max_bytes."""
+        now = time.time()
+        manifests = []
+        for path in self.manifests():
+            try:
+                data = self.read_manifest(path)
+            except (OSError, ValueError):
+                continue
+            manifests.append((float(data.get("created", 0)), path, {a["digest"] for a in data["artifacts"].values()}))
+        manifests.sort()
+
+        removed = 0
+        if max_age_days is not None:
+            cutoff = now - max_age_days * 86400
+            while manifests and manifests[0][0] < cutoff:
+                _created, path, _digests = manifests.pop(0)
+                _remove_manifest(path)
+                removed += 1
+
+        blobs = {p.name.split(".", 1)[0]: p for p in self.blob_dir.glob("*/*") if not p.name.startswith(".tmp-")}
+        sizes = {digest: path.stat().st_size for digest, path in blobs.items()}
+
+        def referenced() -> set[str]:
+            return set().union(*(digests for _c, _p, digests in manifests)) if manifests else set()
+
+        live = referenced()
+        if max_bytes is not None:
+            while manifests and sum(sizes[d] for d in live if d in sizes) > max_bytes:
+                _created, path, _digests = manifests.pop(0)
+                _remove_manifest(path)
+                removed += 1
+                live = referenced()
+
+        freed = blobs_removed = 0
+        for digest, path in blobs.items():
+            if digest not in live:
+                freed += sizes[digest]
+                blobs_removed += 1
+                path.unlink(missing_ok=True)
+        kept = sum(size for digest, size in sizes.items() if digest in live)
+        return GcResult(manifests_removed=removed, blobs_removed=blobs_removed, bytes_freed=freed, bytes_kept=kept)
@@ -0,0 +1,252 @@
+"""Change-impact test selection driven by target-site content fingerprints.
+
+The target pages are the paths the page-driven suites already declare:
+``PAGES`` (suite 6), ``TARGETS`` (suite 7) and the page lists in ``RWD_MATRIX``
+(suite 4), plus the arguments of every ``@pytest.mark.pages(...)`` marker (the
+page-object suites). They are read from the test modules' source with ``ast``,
+so nothing is imported before pytest collects it.
+
+A page fingerprint hashes its normalized HTML (nonces, CSRF tokens and
+whitespace removed) together with the validators (ETag, else Last-Modified,
+else Content-Length) of the scripts, stylesheets and images it references.
+A page's fingerprint is stored in a JSON state file once a run has passed
+its tests; tests whose pages all kept their fingerprint are deselected. Every
+``full_run_every``-th run (and any run without usable state) runs everything.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+
+import requests
+
+from utils.web_audit import get_session, is_http_url, normalize_url
+
+DEFAULT_STATE_PATH = Path("reports") / "change_impact.json"
+TESTS_DIR = Path(__file__).resolve().parents[1] / "tests"
+
+# (test module, module-level constant, how to pull paths out of one entry)
+PAGE_SOURCES = (
+    ("test_suite_6_link_integrity.py", "PAGES", lambda entry: [entry[0]]),
+    ("test_suite_7_client_errors.py", "TARGETS", lambda entry: [entry[0]]),
+    ("test_suite_4_responsive.py", "RWD_MATRIX", lambda entry: list(entry[4])),
+)
+MAX_ASSETS_PER_PAGE = 60
+
+_VOLATILE_HTML = [
+    re.compile(r'\snonce="[^"]*"'),
+    re.compile(r'(name="(?:csrf[^"]*|_token|authenticity_token)"\s+value=")[^"]*"', re.I),
+    re.compile(r'(<meta\s+name="csrf-token"\s+content=")[^"]*"', re.I),
+    re.compile(r"\s+"),
+]
+
+
+def _module_constant(path: Path, name: str):
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise LookupError(f"{name} not found in {path}")
+
+
+def _marker_paths(path: Path) -> list[str]:
+    """String arguments of ``pytest.mark.pages(...)`` calls in a test module."""
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    paths = []
+    for node in ast.walk(tree):
+        func = getattr(node, "func", None)
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(func, ast.Attribute)
+            and func.attr == "pages"
+            and isinstance(func.value, ast.Attribute)
+            and func.value.attr == "mark"
+        ):
+            paths.extend(arg.value for arg in node.args if isinstance(arg, ast.Constant) and isinstance(arg.value, str))
+    return paths
+
+
+def target_paths(tests_dir: Path = TESTS_DIR) -> list[str]:
+    """Every page path the page-driven suites declare, de-duplicated, in declaration order."""
+    paths: dict[str, None] = {}
+    for filename, constant, extract in PAGE_SOURCES:
+        for entry in _module_constant(tests_dir / filename, constant):
+            for path in extract(entry):
+                paths.setdefault(path.strip(), None)
+    for module in sorted(tests_dir.rglob("test_*.py")):
+        for path in _marker_paths(module):
+            paths.setdefault(path.strip(), None)
+    return list(paths)
+
+
+class _AssetParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.assets: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("script", "img") and attrs.get("src"):
+            self.assets.append(attrs["src"])
+        elif tag == "link" and attrs.get("href"):
+            rel = (attrs.get("rel") or "").lower()
+            if any(kind in rel for kind in ("stylesheet", "preload", "modulepreload", "icon")):
+                self.assets.append(attrs["href"])
+
+
+def normalize_html(html: str) -> str:
+    for pattern in _VOLATILE_HTML[:-1]:
+        html = pattern.sub(lambda m: m.group(1) + '"' if m.groups() else "", html)
+    return _VOLATILE_HTML[-1].sub(" ", html).strip()
+
+
+def asset_urls(html: str, page_url: str) -> list[str]:
+    parser = _AssetParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    urls: dict[str, None] = {}
+    for raw in parser.assets:
+        url = normalize_url(page_url, raw)
+        if url and is_http_url(url):
+            urls.setdefault(url.split("#", 1)[0], None)
+    return list(urls)[:MAX_ASSETS_PER_PAGE]
+
+
+def _asset_validator(session: requests.Session, url: str, timeout: float) -> str:
+    try:
+        resp = session.head(url, allow_redirects=True, timeout=timeout)
+    except requests.RequestException as exc:
+        return f"error:{type(exc).__name__}"
+    headers = resp.headers
+    return (
+        f"{resp.status_code}:"
+        + (headers.get("ETag") or headers.get("Last-Modified") or f"len={headers.get('Content-Length', '?')}")
+    )
+
+
+@dataclass(frozen=True)
+class PageFingerprint:
+    url: str
+    fingerprint: str | None  # None when the page could not be fetched (treated as changed)
+    assets: int = 0
+    error: str | None = None
+
+
+def fingerprint_pages(
+    base_url: str,
+    paths: list[str],
+    *,
+    timeout: float = 15.0,
+    workers: int = 8,
+    session: requests.Session | None = None,
+) -> dict[str, PageFingerprint]:
+    """Fingerprint every page (and its sub-resources) concurrently; keyed by path."""
+    http = session or get_session()
+    base = base_url.rstrip("/")
+    validators: dict[str, str] = {}
+
+    def page(path: str) -> tuple[str, str | None, list[str], str | None]:
+        url = base + path
+        try:
+            resp = http.get(url, timeout=timeout)
+        except requests.RequestException as exc:
+            return url, None, [], f"{type(exc).__name__}: {exc}"
+        if resp.status_code >= 400:
+            return url, None, [], f"HTTP {resp.status_code}"
+        html = resp.text
+        digest = hashlib.sha256(normalize_html(html).encode("utf-8")).hexdigest()
+        return url, digest, asset_urls(html, resp.url or url), None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pages = dict(zip(paths, pool.map(page, paths)))
+        wanted = sorted({asset for _url, _digest, assets, _error in pages.values() for asset in assets})
+        validators.update(zip(wanted, pool.map(lambda u: _asset_validator(http, u, timeout), wanted)))
+
+    out: dict[str, PageFingerprint] = {}
+    for path, (url, digest, assets, error) in pages.items():
+        if digest is None:
+            out[path] = PageFingerprint(url=url, fingerprint=None, error=error)
+            continue
+        h = hashlib.sha256(digest.encode("ascii"))
+        for asset in sorted(assets):
+            h.update(f"\n{asset} {validators.get(asset, '?')}".encode("utf-8"))
+        out[path] = PageFingerprint(url=url, fingerprint=h.hexdigest(), assets=len(assets))
+    return out
+
+
+@dataclass
+class ChangeState:
+    """Persisted between runs: fingerprints per page URL and the incremental-run counter."""
+
+    path: Path
+    pages: dict[str, str] = field(default_factory=dict)
+    runs_since_full: int = 0
+    loaded: bool = False
+
+    @classmethod
+    def load(cls, path: Path) -> "ChangeState":
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(path=path)
+        return cls(
+            path=path,
+            pages=dict(data.get("pages") or {}),
+            runs_since_full=int(data.get("runs_since_full", 0)),
+            loaded=True,
+        )
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".change-impact-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"runs_since_full": self.runs_since_full, "pages": dict(sorted(self.pages.items()))}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+@dataclass(frozen=True)
+class Selection:
+    full_run: bool
+    reason: str
+    changed: frozenset[str]  # changed page paths (meaningful when not a full run)
+    fingerprints: dict[str, PageFingerprint]
+
+
+def plan(state: ChangeState, fingerprints: dict[str, PageFingerprint], *, full_run_every: int) -> Selection:
+    changed = frozenset(
+        path for path, fp in fingerprints.items()
+        if fp.fingerprint is None or state.pages.get(fp.url) != fp.fingerprint
+    )
+    if not state.loaded:
+        return Selection(True, "no previous fingerprints", changed, fingerprints)
+    if full_run_every > 0 and state.runs_since_full + 1 >= full_run_every:
+        return Selection(True, f"forced full run (every {full_run_every} runs)", changed, fingerprints)
+    return Selection(False, f"{len(changed)}/{len(fingerprints)} pages changed", changed, fingerprints)
+
+
+def record_run(state: ChangeState, selection: Selection, *, passed_paths: set[str], failed_paths: set[str]) -> None:
+    """Store fingerprints for the pages this run verified.
+
+    A page is verified when at least one of its tests ran and passed and none
+    failed. Pages with a failing test are forgotten (they stay "changed"); pages
+    whose tests did not run (``-k``/``-m``, sharding, skips) keep their old value.
+    """
+    for path, fp in selection.fingerprints.items():
+        if fp.fingerprint is None or path in failed_paths:
+            state.pages.pop(fp.url, None)
+        elif path in passed_paths:
+            state.pages[fp.url] = fp.fingerprint
+    state.runs_since_full = 0 if selection.full_run else state.runs_since_full + 1
+    state.save()
+
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Slot:
+    driver: WebDriver
+    uses: int = 0
+    pooled: bool = True
+
+
+def _switch_to_fresh_context(driver: WebDriver) -> bool:
+    """Move the driver into a new CDP browser context and dispose of the previous one.
+
+    A context has its own cookies, storage, IndexedDB, cache and service workers, so
+    nothing from any origin the last test visited (site, map, auth) survives.
+    Returns False where browser contexts are unavailable.
+    """
+    try:
+        context = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+    except Exception:
+        return False
+    try:
+        target = driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context}
+        )["targetId"]
+        # chromedriver window handles are DevTools target ids.
+        if target not in driver.window_handles:
+            raise RuntimeError("new browser context is not visible to WebDriver")
+    except Exception:
+        try:
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context})
+        except Exception:
+            pass
+        return False
+
+    previous_window = driver.current_window_handle
+    previous_context = getattr(driver, "_pool_browser_context", None)
+    driver.switch_to.window(target)
+    try:
+        if previous_context is not None:
+            # Closes the previous test's pages along with their data.
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": previous_context})
+        else:
+            driver.execute_cdp_cmd("Target.closeTarget", {"targetId": previous_window})
+    except Exception:
+        pass
+    driver._pool_browser_context = context
+    return True
+
+
+def reset_browser_state(driver: WebDriver, *, on_new_page: Callable[[WebDriver], None] | None = None) -> None:
+    """Return a browser to a clean state: cookies, storage, cache, emulation, tabs.
+
+    On Chromium every test gets a fresh browser context; ``on_new_page`` then
+    re-applies per-page setup (e.g. injected scripts) to its new tab. Elsewhere
+    cookies and the current origin's storage are cleared with WebDriver calls.
+    """
+    handles = list(driver.window_handles)
+    for handle in handles[1:]:
+        try:
+            driver.switch_to.window(handle)
+            driver.close()
+        except Exception:
+            continue
+    driver.switch_to.window(handles[0])
+
+    if _switch_to_fresh_context(driver):
+        # Browser-wide state that is not scoped to a context.
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        except Exception:
+            pass
+        if on_new_page is not None:
+            on_new_page(driver)
+    else:
+        try:
+            origin = driver.execute_script("return window.location.origin;")
+        except Exception:
+            origin = None
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            if origin and origin.startswith("http"):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.execute_cdp_cmd(
+                "Network.emulateNetworkConditions",
+                {"offline": False, "latency": 0, "downloadThroughput": -1, "uploadThroughput": -1},
+            )
+            driver.execute_cdp_cmd("Emulation.clearDeviceMetricsOverride", {})
+            driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {"features": []})
+        except Exception:
+            # Non-Chromium drivers: best-effort equivalents.
+            try:
+                driver.delete_all_cookies()
+                driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            except Exception:
+                pass
+
+    driver.get("about:blank")
+
+    # Drop buffered CDP events so the next test's network-idle wait only sees its own requests.
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+
+def page_js_heap_mb(driver: WebDriver) -> float | None:
+    """JS heap used by the driver's current page (a proxy for leaks, not browser RSS)."""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {}).get("metrics", [])
+    except Exception:
+        return None
+    for metric in metrics:
+        if metric.get("name") == "JSHeapUsedSize":
+            return float(metric.get("value") or 0) / (1024 * 1024)
+    return None
+
+
+class DriverPool:
+    """Warm pool of browsers for one process (one per pytest-xdist worker).
+
+    Drivers are reset between tests and recycled after ``max_uses`` checkouts or
+    when the last test's page left more than ``max_memory_mb`` of JS heap in use.
+    A recycled browser is replaced in the background, so the next test does not
+    pay for the launch. ``acquire(fresh=True)`` always launches a new browser that
+    is quit on release (cold-start measurements).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        *,
+        size: int = 1,
+        max_uses: int = 25,
+        max_memory_mb: float | None = None,
+        reset: Callable[[WebDriver], None] = reset_browser_state,
+    ):
+        self._factory = factory
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.max_memory_mb = max_memory_mb or None
+        self._reset = reset
+        self._lock = threading.Lock()
+        self._idle: list[_Slot] = []
+        self._busy: dict[int, _Slot] = {}
+        self._relauncher = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="driverpool-relaunch")
+        self._pending: set[Future] = set()
+        self._closed = False
+        self.launched = 0
+        self.recycled = 0
+
+    def prelaunch(self) -> None:
+        missing = self.size - len(self._idle)
+        if missing <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="driverpool") as pool:
+            slots = list(pool.map(lambda _: self._launch(), range(missing)))
+        with self._lock:
+            self._idle.extend(slots)
+
+    def acquire(self, *, fresh: bool = False) -> WebDriver:
+        if fresh:
+            slot = self._launch(pooled=False)
+        else:
+            with self._lock:
+                slot = self._idle.pop() if self._idle else None
+                pending = list(self._pending) if slot is None else []
+            if pending:
+                # A replacement is already starting; waiting for it beats a second launch.
+                wait(pending, return_when=FIRST_COMPLETED)
+                with self._lock:
+                    slot = self._idle.pop() if self._idle else None
+            if slot is None:
+                slot = self._launch()
+        slot.uses += 1
+        with self._lock:
+            self._busy[id(slot.driver)] = slot
+        return slot.driver
+
+    def release(self, driver: WebDriver, *, discard: bool = False) -> None:
+        with self._lock:
+            slot = self._busy.pop(id(driver), None)
+        if slot is None:
+            _quit(driver)
+            return
+
+        if discard or not slot.pooled or self._should_recycle(slot):
+            _quit(driver)
+            if slot.pooled:
+                self._recycle()
+            return
+
+        try:
+            self._reset(driver)
+        except Exception as exc:
+            logger.warning(f"[POOL] reset failed, recycling browser: {exc}")
+            _quit(driver)
+            self._recycle()
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(slot)
+                return
+        _quit(driver)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._relauncher.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            slots = self._idle + list(self._busy.values())
+            self._idle = []
+            self._busy = {}
+        for slot in slots:
+            _quit(slot.driver)
+
+    def _launch(self, *, pooled: bool = True) -> _Slot:
+        driver = self._factory()
+        with self._lock:
+            self.launched += 1
+        return _Slot(driver=driver, pooled=pooled)
+
+    def _recycle(self) -> None:
+        with self._lock:
+            self.recycled += 1
+            if self._closed:
+                return
+            future = self._relauncher.submit(self._relaunch)
+            self._pending.add(future)
+        future.add_done_callback(self._relaunched)
+
+    def _relaunch(self) -> None:
+        try:
+            slot = self._launch()
+        except Exception as exc:
+            logger.warning(f"[POOL] background relaunch failed: {exc}")
+            return
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(slot)
+                return
+        _quit(slot.driver)
+
+    def _relaunched(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _should_recycle(self, slot: _Slot) -> bool:
+        if slot.uses >= self.max_uses:
+            return True
+        if self.max_memory_mb:
+            heap = page_js_heap_mb(slot.driver)
+            if heap is not None and heap > self.max_memory_mb:
+                logger.info(f"[POOL] recycling browser: page JS heap {heap:.0f}MB > {self.max_memory_mb:.0f}MB")
+                return True
+        return False
+
+
+def _quit(driver: WebDriver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
@@ -0,0 +1,84 @@
+"""Sparse HDR (high dynamic range) histogram for latency recording.
+
+Values are integers (the load engine records microseconds). Buckets follow the
+HdrHistogram layout: each power-of-two range is split into a fixed number of
+linear sub-buckets, so any recorded value is reproduced within the configured
+number of significant digits while memory stays proportional to the number of
+distinct buckets actually hit.
+"""
+from __future__ import annotations
+
+import math
+
+
+class HdrHistogram:
+    def __init__(self, significant_digits: int = 3):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10**significant_digits
+        self._sub_bucket_count = 1 << math.ceil(math.log2(largest_single_unit))
+        self._half_count = self._sub_bucket_count // 2
+        self._half_count_magnitude = self._half_count.bit_length() - 1
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+        self._counts: dict[tuple[int, int], int] = {}
+        self.total_count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> tuple[int, int]:
+        bucket = (value | self._sub_bucket_mask).bit_length() - (self._half_count_magnitude + 1)
+        return bucket, value >> bucket
+
+    @staticmethod
+    def _lowest(bucket: int, sub_bucket: int) -> int:
+        return sub_bucket << bucket
+
+    @staticmethod
+    def _highest(bucket: int, sub_bucket: int) -> int:
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        value = int(value)
+        if value < 0:
+            raise ValueError("HdrHistogram only records non-negative values")
+        key = self._index(value)
+        self._counts[key] = self._counts.get(key, 0) + count
+        if self.total_count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.total_count += count
+        self.total += value * count
+
+    def merge(self, other: "HdrHistogram") -> None:
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for key, count in other._counts.items():
+            self._counts[key] = self._counts.get(key, 0) + count
+        if other.total_count:
+            self.min = other.min if self.total_count == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.total_count += other.total_count
+        self.total += other.total
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.total_count if self.total_count else 0.0
+
+    def value_at_percentile(self, q: float) -> int:
+        """Smallest recorded-equivalent value with at least q% of samples at or below it."""
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(self.total_count * min(max(q, 0.0), 100.0) / 100.0))
+        seen = 0
+        for key in sorted(self._counts, key=lambda k: self._lowest(*k)):
+            seen += self._counts[key]
+            if seen >= target:
+                return min(self._highest(*key), self.max)
+        return self.max
+
+    def buckets(self) -> list[tuple[int, int]]:
+        """(bucket lower bound, count) pairs in value order."""
+        return sorted((self._lowest(*key), count) for key, count in self._counts.items())
@@ -6,6 +6,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from config.config import Config
+from pages.base_page import BasePage
 
 
 class TestHelpers:
@@ -51,13 +52,13 @@ class TestHelpers:
     def scroll_to_bottom(driver):
         """Scroll to bottom of page"""
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(0.5)
+        BasePage(driver).wait_for_animation_frames()
     
     @staticmethod
     def scroll_to_top(driver):
         """Scroll to top of page"""
         driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(0.5)
+        BasePage(driver).wait_for_animation_frames()
     
     @staticmethod
     def get_network_performance(driver):
@@ -0,0 +1,236 @@
+"""Record/replay of ``requests`` traffic for the non-browser audit paths.
+
+Record mode wraps the real transport and appends every request/response pair
+to a compact archive; replay mode serves them from a memory-mapped archive
+with no network access at all.
+
+Archive layout::
+
+    MAGIC | entry* | index | footer
+    entry  = zlib(len(meta) as 4 bytes | meta JSON | body)
+    index  = zlib(JSON {key: [offset, length]})
+    footer = index offset (8 bytes) | index length (8 bytes) | MAGIC
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+import zlib
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from utils.url_cache import cache_key
+
+MAGIC = b"QAHAR1\n"
+_FOOTER = struct.Struct(">QQ")
+# Headers that describe the wire encoding rather than the (decoded) body we store.
+_WIRE_HEADERS = ("content-encoding", "transfer-encoding", "content-length", "connection")
+
+_sessions: "weakref.WeakSet[requests.Session]" = weakref.WeakSet()
+_active_adapter: BaseAdapter | None = None
+_lock = threading.Lock()
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Stable identity of a request: method, normalized URL and JSON body hash.
+
+    Multipart bodies use random boundaries, so they are not hashed.
+    """
+    key = f"{request.method} {cache_key(request.url or '')}"
+    content_type = request.headers.get("Content-Type", "")
+    if request.body and content_type.startswith("application/json"):
+        body = request.body if isinstance(request.body, bytes) else str(request.body).encode("utf-8")
+        key += " " + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+class HttpArchiveWriter:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, bytes] = {}
+        self._statuses: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, resp: requests.Response, body: bytes) -> None:
+        with self._lock:
+            # Keep a full response over a later 304 so replays don't depend on validators.
+            if resp.status_code == 304 and self._statuses.get(key, 304) != 304:
+                return
+            headers = {k: v for k, v in resp.headers.items() if k.lower() not in _WIRE_HEADERS}
+            meta = json.dumps(
+                {"status": resp.status_code, "reason": resp.reason, "url": resp.url, "headers": headers},
+                separators=(",", ":"),
+            ).encode("utf-8")
+            self._entries[key] = zlib.compress(struct.pack(">I", len(meta)) + meta + body)
+            self._statuses[key] = resp.status_code
+
+    def close(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.path.open("wb") as f:
+            f.write(MAGIC)
+            index: dict[str, list[int]] = {}
+            for key, blob in self._entries.items():
+                index[key] = [f.tell(), len(blob)]
+                f.write(blob)
+            index_offset = f.tell()
+            index_blob = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+            f.write(index_blob)
+            f.write(_FOOTER.pack(index_offset, len(index_blob)))
+            f.write(MAGIC)
+
+
+class HttpArchiveReader:
+    """Memory-mapped, lazily decoded view over one or more archive files."""
+
+    def __init__(self, paths: list[Path]):
+        self._maps: list[mmap.mmap] = []
+        self._index: dict[str, tuple[mmap.mmap, int, int]] = {}
+        for path in paths:
+            with Path(path).open("rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            tail = len(MAGIC) + _FOOTER.size
+            if mapped[: len(MAGIC)] != MAGIC or mapped[-len(MAGIC):] != MAGIC:
+                mapped.close()
+                raise ValueError(f"Not an HTTP archive: {path}")
+            index_offset, index_length = _FOOTER.unpack(mapped[-tail:-len(MAGIC)])
+            index = json.loads(zlib.decompress(mapped[index_offset:index_offset + index_length]))
+            for key, (offset, length) in index.items():
+                self._index[key] = (mapped, offset, length)
+            self._maps.append(mapped)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> tuple[dict, bytes] | None:
+        hit = self._index.get(key)
+        if hit is None:
+            return None
+        mapped, offset, length = hit
+        raw = zlib.decompress(mapped[offset:offset + length])
+        (meta_len,) = struct.unpack(">I", raw[:4])
+        meta = json.loads(raw[4:4 + meta_len])
+        return meta, raw[4 + meta_len:]
+
+    def close(self) -> None:
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+        self._index = {}
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, writer: HttpArchiveWriter, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        body = resp.content
+        self.writer.add(request_key(request), resp, body)
+        return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, reader: HttpArchiveReader):
+        super().__init__()
+        self.reader = reader
+        self._builder = HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        hit = self.reader.get(request_key(request))
+        if hit is None:
+            raise requests.ConnectionError(f"Not in HTTP archive (replay mode): {request.method} {request.url}")
+        meta, body = hit
+        headers = dict(meta["headers"])
+        headers["Content-Length"] = str(len(body))
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=int(meta["status"]),
+            reason=meta.get("reason"),
+            preload_content=False,
+            decode_content=False,
+        )
+        return self._builder.build_response(request, raw)
+
+    def close(self):
+        self._builder.close()
+
+
+def mount(session: requests.Session) -> requests.Session:
+    """Register a session so record/replay (when active) applies to it."""
+    with _lock:
+        _sessions.add(session)
+        adapter = _active_adapter
+    if adapter is not None:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+
+def _archive_paths(path: Path) -> list[Path]:
+    # The archive itself plus per-worker archives written by pytest-xdist record runs.
+    workers = sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+    return ([path] if path.exists() else []) + workers
+
+
+def clear_archives(path: Path) -> None:
+    """Remove an archive and its per-worker parts before a new recording."""
+    for stale in _archive_paths(Path(path)):
+        stale.unlink()
+
+
+def worker_archive_path(path: Path) -> Path:
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    return path.with_name(f"{path.stem}.{worker}{path.suffix}") if worker else path
+
+
+def activate(mode: str, path: Path) -> BaseAdapter:
+    """Start 'record' or 'replay' for every registered (and future) session."""
+    global _active_adapter
+    path = Path(path)
+    if mode == "record":
+        adapter: BaseAdapter = RecordingAdapter(HttpArchiveWriter(worker_archive_path(path)), pool_maxsize=16)
+    elif mode == "replay":
+        paths = _archive_paths(path)
+        if not paths:
+            raise FileNotFoundError(f"No HTTP archive at {path}")
+        adapter = ReplayAdapter(HttpArchiveReader(paths))
+    else:
+        raise ValueError(f"Unknown HTTP archive mode: {mode}")
+
+    with _lock:
+        _active_adapter = adapter
+        sessions = list(_sessions)
+    for session in sessions:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return adapter
+
+
+def deactivate() -> None:
+    """Flush a recording (if any) and restore the normal transport."""
+    global _active_adapter
+    with _lock:
+        adapter = _active_adapter
+        _active_adapter = None
+        sessions = list(_sessions)
+    if adapter is None:
+        return
+    if isinstance(adapter, RecordingAdapter):
+        adapter.writer.close()
+    elif isinstance(adapter, ReplayAdapter):
+        adapter.reader.close()
+    for session in sessions:
+        plain = HTTPAdapter(pool_connections=32, pool_maxsize=16)
+        session.mount("http://", plain)
+        session.mount("https://", plain)
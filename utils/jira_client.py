@@ -1,10 +1,30 @@
+"""Jira Cloud REST client plus a failure filer that groups, dedupes and batches issues.
+
+``JiraClient`` keeps one pooled ``requests.Session`` and uploads attachments
+concurrently. ``FailureFiler`` files test failures by *signature* (test without
+parametrization + normalized assertion message): a signature that already has
+an open issue gets a comment instead of a new issue. In batch mode failures are
+queued and filed at session end with the bulk create endpoint.
+
+Point ``JIRA_BASE_URL`` at ``python -m utils.jira_stub`` to exercise it locally.
+"""
 from __future__ import annotations
 
+import hashlib
 import os
-from dataclasses import dataclass
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
+
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limiter import RateLimitedSession
 
-import requests
+BULK_CREATE_MAX = 50  # Jira's limit per /issue/bulk call
+SIGNATURE_LABEL_PREFIX = "autotest-sig-"
 
 
 @dataclass(frozen=True)
@@ -17,12 +37,22 @@ class JiraIssueCreateRequest:
 
 
 class JiraClient:
-    def __init__(self, base_url: str, email: str, api_token: str):
+    def __init__(self, base_url: str, email: str, api_token: str, *, max_workers: int = 4):
         self.base_url = base_url.rstrip("/")
-        self._auth = (email, api_token)
+        self.max_workers = max(1, max_workers)
+        # Paced like every other client; throttled POSTs are not replayed, so a 503 after
+        # Jira already created an issue cannot create a duplicate.
+        session = RateLimitedSession()
+        session.auth = (email, api_token)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # Not mounted into http_archive: filing is a side effect, not traffic to record or
+        # replay (multipart boundaries are random, so replayed uploads would never match).
+        self._session = session
 
     @staticmethod
-    def from_env() -> "JiraClient":
+    def from_env(*, max_workers: int = 4) -> "JiraClient":
         base_url = os.getenv("JIRA_BASE_URL")
         email = os.getenv("JIRA_EMAIL")
         api_token = os.getenv("JIRA_API_TOKEN")
@@ -30,35 +60,286 @@ class JiraClient:
             raise RuntimeError(
                 "Missing Jira env vars. Set JIRA_BASE_URL, JIRA_EMAIL, JIRA_API_TOKEN."
             )
-        return JiraClient(base_url=base_url, email=email, api_token=api_token)
+        return JiraClient(base_url=base_url, email=email, api_token=api_token, max_workers=max_workers)
 
-    def create_issue(self, req: JiraIssueCreateRequest) -> str:
-        if not req.project_key:
-            raise ValueError("Jira project key missing (use --jira-project).")
+    def close(self) -> None:
+        self._session.close()
 
+    def create_issue(self, req: JiraIssueCreateRequest) -> str:
         url = f"{self.base_url}/rest/api/3/issue"
-        description_adf = _text_to_adf(req.description)
-        payload = {
-            "fields": {
-                "project": {"key": req.project_key},
-                "issuetype": {"name": req.issue_type},
-                "summary": req.summary,
-                "description": description_adf,
-                "labels": req.labels or [],
-            }
-        }
-        resp = requests.post(url, json=payload, auth=self._auth, timeout=30)
+        resp = self._session.post(url, json={"fields": _issue_fields(req)}, timeout=30)
         resp.raise_for_status()
         data = resp.json()
         return data["key"]
 
-    def add_attachment(self, issue_key: str, file_path: Path) -> None:
+    def create_issues(self, reqs: list[JiraIssueCreateRequest]) -> list[str | None]:
+        """Create issues with the bulk endpoint; keys are returned in input order (None where Jira rejected one)."""
+        keys: list[str | None] = []
+        url = f"{self.base_url}/rest/api/3/issue/bulk"
+        for start in range(0, len(reqs), BULK_CREATE_MAX):
+            chunk = reqs[start:start + BULK_CREATE_MAX]
+            payload = {"issueUpdates": [{"fields": _issue_fields(req)} for req in chunk]}
+            resp = self._session.post(url, json=payload, timeout=60)
+            if resp.status_code != 400:  # 400 still carries per-element errors when every element failed
+                resp.raise_for_status()
+            data = resp.json()
+            failed = {int(err.get("failedElementNumber", -1)) for err in data.get("errors") or []}
+            created = iter(data.get("issues") or [])
+            for i in range(len(chunk)):
+                keys.append(None if i in failed else next(created, {}).get("key"))
+        return keys
+
+    def add_comment(self, issue_key: str, text: str) -> None:
+        url = f"{self.base_url}/rest/api/3/issue/{issue_key}/comment"
+        resp = self._session.post(url, json={"body": _text_to_adf(text)}, timeout=30)
+        resp.raise_for_status()
+
+    def search_issue_keys(self, jql: str, *, fields: list[str] | None = None, max_results: int = 100) -> list[dict]:
+        """Run a JQL search; returns the raw issue dicts (key + requested fields)."""
+        url = f"{self.base_url}/rest/api/3/search/jql"
+        payload = {"jql": jql, "fields": fields or ["key"], "maxResults": max_results}
+        resp = self._session.post(url, json=payload, timeout=30)
+        resp.raise_for_status()
+        return resp.json().get("issues") or []
+
+    def add_attachment(self, issue_key: str, file_path: Path) -> list[dict]:
+        return self.add_attachment_bytes(issue_key, file_path.name, file_path.read_bytes())
+
+    def add_attachment_bytes(self, issue_key: str, filename: str, content: bytes) -> list[dict]:
+        """Upload one attachment; returns Jira's attachment metadata (id, content URL, ...)."""
         url = f"{self.base_url}/rest/api/3/issue/{issue_key}/attachments"
         headers = {"X-Atlassian-Token": "no-check"}
-        with file_path.open("rb") as f:
-            files = {"file": (file_path.name, f)}
-            resp = requests.post(url, headers=headers, files=files, auth=self._auth, timeout=60)
-            resp.raise_for_status()
+        files = {"file": (filename, content)}
+        resp = self._session.post(url, headers=headers, files=files, timeout=60)
+        resp.raise_for_status()
+        try:
+            return resp.json()
+        except ValueError:
+            return []
+
+    def add_attachments(self, issue_key: str, attachments: list["Attachment"]) -> list[list[dict] | BaseException]:
+        """Upload attachments concurrently on the pooled session; per-attachment result or exception."""
+        def upload(att: Attachment):
+            try:
+                meta = self.add_attachment_bytes(issue_key, att.filename, att.read())
+            except Exception as exc:
+                return exc
+            if att.on_uploaded is not None:
+                att.on_uploaded(issue_key, meta)
+            return meta
+
+        if len(attachments) <= 1:
+            return [upload(att) for att in attachments]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(attachments))) as pool:
+            return list(pool.map(upload, attachments))
+
+
+def _issue_fields(req: JiraIssueCreateRequest) -> dict:
+    if not req.project_key:
+        raise ValueError("Jira project key missing (use --jira-project).")
+    return {
+        "project": {"key": req.project_key},
+        "issuetype": {"name": req.issue_type},
+        "summary": req.summary,
+        "description": _text_to_adf(req.description),
+        "labels": req.labels or [],
+    }
+
+
+# ---- failure filing ----------------------------------------------------------
+
+_VOLATILE = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\d+(\.\d+)?"), "N"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def failure_signature(nodeid: str, message: str | None) -> str:
+    """Stable id for "the same failure": test (minus parameters) + assertion text with volatile parts masked."""
+    test = nodeid.split("[", 1)[0]
+    text = (message or "").strip().splitlines()[0] if (message or "").strip() else ""
+    for pattern, repl in _VOLATILE:
+        text = pattern.sub(repl, text)
+    digest = hashlib.sha1(f"{test}\n{text[:500]}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+@dataclass(frozen=True)
+class Attachment:
+    filename: str
+    read: Callable[[], bytes]
+    key: str | None = None  # content id; the same key is uploaded once per issue
+    on_uploaded: Callable[[str, list[dict]], None] | None = None
+
+
+@dataclass(frozen=True)
+class Failure:
+    nodeid: str
+    message: str | None
+    summary: str
+    description: str
+    attachments: list[Attachment] = field(default_factory=list)
+
+    @property
+    def signature(self) -> str:
+        return failure_signature(self.nodeid, self.message)
+
+
+@dataclass
+class FilerStats:
+    created: int = 0
+    commented: int = 0
+    uploads: int = 0
+    upload_failures: int = 0
+    skipped_uploads: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"created={self.created} commented={self.commented} uploads={self.uploads} "
+            f"upload_failures={self.upload_failures} skipped_uploads={self.skipped_uploads}"
+        )
+
+
+class FailureFiler:
+    """Files failures as Jira issues, one issue per signature.
+
+    ``report`` files immediately (thread-safe; concurrent reports of one signature
+    produce one issue), or queues when ``batch`` is set; ``flush`` files the queue
+    with one search and bulk creates.
+    """
+
+    def __init__(
+        self,
+        client: JiraClient,
+        *,
+        project_key: str | None,
+        issue_type: str = "Bug",
+        labels: list[str] | None = None,
+        batch: bool = False,
+    ):
+        self.client = client
+        self.project_key = project_key
+        self.issue_type = issue_type
+        self.labels = list(labels or [])
+        self.batch = batch
+        self.stats = FilerStats()
+        self._issues: dict[str, str] = {}  # signature -> issue key (this session or found by search)
+        self._pending: dict[str, list[Failure]] = {}
+        self._uploaded_keys: set[tuple[str, str]] = set()  # (issue key, attachment key)
+        self._lock = threading.Lock()
+        self._signature_locks: dict[str, threading.Lock] = {}
+
+    def report(self, failure: Failure) -> str | None:
+        """File (or queue) one failure; returns the issue key when filed now."""
+        signature = failure.signature
+        if self.batch:
+            with self._lock:
+                self._pending.setdefault(signature, []).append(failure)
+            return None
+
+        with self._lock:
+            sig_lock = self._signature_locks.setdefault(signature, threading.Lock())
+        with sig_lock:
+            issue_key = self._issues.get(signature) or self._find_open_issues([signature]).get(signature)
+            if issue_key is None:
+                issue_key = self.client.create_issue(self._create_request(signature, [failure]))
+                self._count(created=1)
+            else:
+                self.client.add_comment(issue_key, _comment_text([failure]))
+                self._count(commented=1)
+            with self._lock:
+                self._issues[signature] = issue_key
+        self._upload(issue_key, failure.attachments)
+        return issue_key
+
+    def flush(self) -> dict[str, str]:
+        """File every queued failure group; returns signature -> issue key."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return {}
+
+        known = {sig: self._issues[sig] for sig in pending if sig in self._issues}
+        known.update(self._find_open_issues([sig for sig in pending if sig not in known]))
+        for signature, key in known.items():
+            self.client.add_comment(key, _comment_text(pending[signature]))
+            self._count(commented=1)
+
+        new = [sig for sig in pending if sig not in known]
+        keys = self.client.create_issues([self._create_request(sig, pending[sig]) for sig in new])
+        filed = dict(known)
+        for signature, key in zip(new, keys):
+            if key is not None:
+                filed[signature] = key
+                self._count(created=1)
+        with self._lock:
+            self._issues.update(filed)
+
+        for signature, key in filed.items():
+            self._upload(key, [att for failure in pending[signature] for att in failure.attachments])
+        return filed
+
+    def _create_request(self, signature: str, failures: list[Failure]) -> JiraIssueCreateRequest:
+        first = failures[0]
+        description = first.description
+        if len(failures) > 1:
+            description += "\nAlso failing with the same signature:\n" + "".join(
+                f"- {f.nodeid}\n" for f in failures[1:]
+            )
+        return JiraIssueCreateRequest(
+            project_key=self.project_key,
+            issue_type=self.issue_type,
+            summary=first.summary,
+            description=description,
+            labels=self.labels + [SIGNATURE_LABEL_PREFIX + signature],
+        )
+
+    def _find_open_issues(self, signatures: list[str]) -> dict[str, str]:
+        if not signatures or not self.project_key:
+            return {}
+        labels = ", ".join(f'"{SIGNATURE_LABEL_PREFIX}{sig}"' for sig in signatures)
+        jql = (
+            f'project = "{self.project_key}" AND labels in ({labels}) '
+            f"AND statusCategory != Done ORDER BY created DESC"
+        )
+        found: dict[str, str] = {}
+        wanted = set(signatures)
+        for issue in self.client.search_issue_keys(jql, fields=["labels"], max_results=max(50, len(signatures) * 2)):
+            for label in (issue.get("fields") or {}).get("labels") or []:
+                sig = label[len(SIGNATURE_LABEL_PREFIX):] if label.startswith(SIGNATURE_LABEL_PREFIX) else None
+                if sig in wanted and sig not in found:
+                    found[sig] = issue["key"]
+        return found
+
+    def _upload(self, issue_key: str, attachments: list[Attachment]) -> None:
+        todo, skipped = [], 0
+        with self._lock:
+            for att in attachments:
+                if att.key is not None and (issue_key, att.key) in self._uploaded_keys:
+                    skipped += 1
+                    continue
+                if att.key is not None:
+                    self._uploaded_keys.add((issue_key, att.key))
+                todo.append(att)
+        results = self.client.add_attachments(issue_key, todo) if todo else []
+        failures = sum(isinstance(r, BaseException) for r in results)
+        self._count(uploads=len(results) - failures, upload_failures=failures, skipped_uploads=skipped)
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+
+
+def _comment_text(failures: list[Failure]) -> str:
+    lines = ["Failed again:", ""]
+    for failure in failures:
+        lines.append(f"- {failure.nodeid}")
+    lines.append("")
+    lines.append(failures[0].description)
+    return "\n".join(lines)
 
 
 def _text_to_adf(text: str) -> dict:
@@ -0,0 +1,202 @@
+"""In-memory stub of the Jira Cloud endpoints ``utils.jira_client`` uses.
+
+Covers issue create, bulk create, JQL search (``project``/``labels in``/
+``statusCategory`` clauses only), comments and attachments, and records every
+request so a run can be inspected afterwards.
+
+CLI:
+    python -m utils.jira_stub --port 8766
+    JIRA_BASE_URL=http://127.0.0.1:8766 JIRA_EMAIL=qa@example.com JIRA_API_TOKEN=x \
+        pytest --jira-create-on-fail --jira-project QA
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ISSUE_PATH = re.compile(r"^/rest/api/3/issue/([A-Z][A-Z0-9]*-\d+)/(comment|attachments)$")
+_FILENAME = re.compile(rb'filename="([^"]*)"')
+
+
+@dataclass
+class StubIssue:
+    key: str
+    fields: dict
+    comments: list[dict] = field(default_factory=list)
+    attachments: list[dict] = field(default_factory=list)
+    done: bool = False
+
+
+@dataclass
+class JiraState:
+    issues: dict[str, StubIssue] = field(default_factory=dict)
+    requests: list[tuple[str, str]] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    _counters: dict[str, int] = field(default_factory=dict)
+
+    def create(self, fields: dict) -> StubIssue:
+        project = (fields.get("project") or {}).get("key")
+        if not project or not fields.get("summary"):
+            raise ValueError("project and summary are required")
+        with self.lock:
+            number = self._counters.get(project, 0) + 1
+            self._counters[project] = number
+            issue = StubIssue(key=f"{project}-{number}", fields=fields)
+            self.issues[issue.key] = issue
+        return issue
+
+    def search(self, jql: str) -> list[StubIssue]:
+        project = re.search(r'project\s*=\s*"?([A-Z][A-Z0-9]*)"?', jql)
+        labels = re.search(r"labels\s+in\s*\(([^)]*)\)", jql)
+        wanted = {label.strip().strip('"') for label in labels.group(1).split(",")} if labels else None
+        open_only = "statusCategory != Done" in jql
+        with self.lock:
+            issues = list(self.issues.values())
+        matches = [
+            issue for issue in issues
+            if (project is None or issue.key.startswith(project.group(1) + "-"))
+            and (wanted is None or wanted & set(issue.fields.get("labels") or []))
+            and not (open_only and issue.done)
+        ]
+        return sorted(matches, key=lambda issue: int(issue.key.rsplit("-", 1)[1]), reverse=True)
+
+
+def _make_handler(state: JiraState):
+    class JiraHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            return
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with state.lock:
+                state.requests.append(("POST", self.path))
+            if not self.headers.get("Authorization"):
+                self._json(401, {"errorMessages": ["Authentication required"]})
+                return
+
+            if self.path == "/rest/api/3/issue":
+                try:
+                    issue = state.create(json.loads(body)["fields"])
+                except (KeyError, ValueError) as e:
+                    self._json(400, {"errorMessages": [str(e)]})
+                    return
+                self._json(201, {"id": issue.key, "key": issue.key})
+            elif self.path == "/rest/api/3/issue/bulk":
+                self._bulk(json.loads(body))
+            elif self.path == "/rest/api/3/search/jql":
+                query = json.loads(body)
+                issues = state.search(query.get("jql", ""))[: int(query.get("maxResults", 50))]
+                self._json(200, {"issues": [{"key": i.key, "fields": {"labels": i.fields.get("labels") or []}} for i in issues]})
+            else:
+                self._issue_action(body)
+
+        def _bulk(self, payload: dict) -> None:
+            issues, errors = [], []
+            for n, update in enumerate(payload.get("issueUpdates") or []):
+                try:
+                    issue = state.create(update["fields"])
+                except (KeyError, ValueError) as e:
+                    errors.append({"status": 400, "elementErrors": {"errorMessages": [str(e)]}, "failedElementNumber": n})
+                    continue
+                issues.append({"id": issue.key, "key": issue.key})
+            self._json(201 if issues else 400, {"issues": issues, "errors": errors})
+
+        def _issue_action(self, body: bytes) -> None:
+            match = _ISSUE_PATH.match(self.path)
+            issue = state.issues.get(match.group(1)) if match else None
+            if issue is None:
+                self._json(404, {"errorMessages": ["Issue does not exist"]})
+                return
+            if match.group(2) == "comment":
+                with state.lock:
+                    issue.comments.append(json.loads(body)["body"])
+                self._json(201, {"id": str(len(issue.comments))})
+                return
+            if self.headers.get("X-Atlassian-Token") != "no-check":
+                self._json(403, {"errorMessages": ["XSRF check failed"]})
+                return
+            name = _FILENAME.search(body)
+            meta = {
+                "id": f"{issue.key}-a{len(issue.attachments) + 1}",
+                "filename": name.group(1).decode("utf-8", "replace") if name else "file",
+                "size": len(body),
+            }
+            meta["content"] = f"http://{self.headers.get('Host')}/attachment/{meta['id']}"
+            with state.lock:
+                issue.attachments.append(meta)
+            self._json(200, [meta])
+
+        def _json(self, status: int, payload) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return JiraHandler
+
+
+class JiraStubServer:
+    """Threaded stub Jira; usable as a context manager. ``state`` holds what was filed."""
+
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 0):
+        self.state = JiraState()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self.state))
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "JiraStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="jira-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "JiraStubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve an in-memory stub of the Jira REST API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = JiraStubServer(host=args.host, port=args.port)
+    print(f"Jira stub serving {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    for issue in server.state.issues.values():
+        print(f"{issue.key}: {issue.fields.get('summary')} comments={len(issue.comments)} attachments={len(issue.attachments)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
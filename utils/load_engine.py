@@ -0,0 +1,468 @@
+"""asyncio load generator for the scenarios in tests/perf_scripts (no k6 needed).
+
+Each virtual user (VU) is a coroutine with its own keep-alive connections,
+speaking HTTP/1.1 over asyncio streams. Ramping follows k6 ``stages`` (linear
+interpolation between targets), latencies go into an HDR histogram and
+thresholds use k6 syntax, e.g. ``{"http_req_duration": ["p(95)<1200"],
+"http_req_failed": ["rate<0.01"]}``.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import ssl
+import time
+from dataclasses import dataclass, field, replace
+from urllib.parse import urljoin, urlsplit
+
+from utils.hdr_histogram import HdrHistogram
+from utils.rate_limiter import RateLimiter
+
+USER_AGENT = "opensky-qa-load/1.0"
+_MAX_REDIRECTS = 5
+_READ_CHUNK = 64 * 1024
+
+
+@dataclass(frozen=True)
+class Stage:
+    duration_s: float
+    target: int
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One k6-style scenario.
+
+    ``paths`` are resolved against the ``base_url`` passed at run time (absolute
+    URLs are used as-is); ``url_key`` picks which configured URL is the base.
+    """
+
+    name: str
+    paths: tuple[str, ...]
+    stages: tuple[Stage, ...]
+    start_vus: int = 0
+    think_time_s: tuple[float, float] = (0.0, 0.0)
+    timeout_s: float = 60.0
+    thresholds: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    headers: dict[str, str] = field(default_factory=dict)
+    cache_bust: bool = False
+    url_key: str = "base_url"
+
+    @property
+    def duration_s(self) -> float:
+        return sum(stage.duration_s for stage in self.stages)
+
+    @property
+    def max_vus(self) -> int:
+        return max([self.start_vus, *(stage.target for stage in self.stages)])
+
+    def target_vus(self, elapsed_s: float) -> int:
+        previous, start = self.start_vus, 0.0
+        for stage in self.stages:
+            if elapsed_s < start + stage.duration_s:
+                fraction = (elapsed_s - start) / stage.duration_s if stage.duration_s else 1.0
+                return round(previous + (stage.target - previous) * fraction)
+            previous, start = stage.target, start + stage.duration_s
+        return previous
+
+    def scaled(self, *, max_vus: int, max_duration_s: float, think_scale: float) -> "Scenario":
+        """Shrink the scenario (same shape) for smoke runs."""
+        vu_factor = min(1.0, max_vus / self.max_vus) if self.max_vus else 1.0
+        time_factor = min(1.0, max_duration_s / self.duration_s) if self.duration_s else 1.0
+        lo, hi = self.think_time_s
+        return replace(
+            self,
+            start_vus=max(1, round(self.start_vus * vu_factor)) if self.start_vus else 0,
+            stages=tuple(
+                Stage(stage.duration_s * time_factor, max(1, round(stage.target * vu_factor)) if stage.target else 0)
+                for stage in self.stages
+            ),
+            think_time_s=(lo * think_scale, hi * think_scale),
+        )
+
+
+def constant_vus(name: str, paths: tuple[str, ...], *, vus: int, duration_s: float, **kwargs) -> Scenario:
+    return Scenario(name=name, paths=paths, stages=(Stage(duration_s, vus),), start_vus=vus, **kwargs)
+
+
+# Ports of tests/perf_scripts/*.js with their original load shapes and thresholds.
+SCENARIOS: dict[str, Scenario] = {
+    "perf_03": Scenario(
+        name="perf_03_concurrent_homepage",
+        paths=("",),
+        stages=(Stage(300, 500), Stage(600, 500), Stage(120, 0)),
+        think_time_s=(2.0, 5.0),
+        thresholds={"http_req_duration": ("p(95)<2000",), "http_req_failed": ("rate<0.001",)},
+    ),
+    "perf_04": constant_vus(
+        "perf_04_feed_guides",
+        ("/feed", "/feed/raspberry", "/feed/debian", "/feed/docker"),
+        vus=300,
+        duration_s=600,
+        think_time_s=(15.0, 45.0),
+        thresholds={"http_req_duration": ("p(99)<4000",), "http_req_failed": ("rate==0",)},
+    ),
+    "perf_05": constant_vus(
+        "perf_05_deb_downloads",
+        ("/files/firmware/opensky-feeder_latest_armhf.deb",),
+        vus=200,
+        duration_s=180,
+        timeout_s=120.0,
+        thresholds={"http_req_failed": ("rate==0",)},
+    ),
+    "perf_07": Scenario(
+        name="perf_07_spike_map",
+        paths=("",),
+        stages=(Stage(10, 1000), Stage(30, 1000), Stage(20, 0)),
+        thresholds={"http_req_duration": ("p(95)<2800",), "http_req_failed": ("rate<0.005",)},
+        url_key="map_url",
+    ),
+    "perf_08": constant_vus(
+        "perf_08_soak",
+        ("/", "/feed", "/data", "/about", "/account"),
+        vus=50,
+        duration_s=24 * 3600,
+        think_time_s=(30.0, 90.0),
+        thresholds={"http_req_failed": ("rate<0.01",)},
+    ),
+    # After a purge every request is an edge miss; cache-busting reproduces that without purge access.
+    "perf_09": constant_vus(
+        "perf_09_cdn_purge",
+        ("",),
+        vus=100,
+        duration_s=120,
+        thresholds={"http_req_duration": ("p(95)<1200",)},
+        headers={"Cache-Control": "no-cache", "Pragma": "no-cache"},
+        cache_bust=True,
+    ),
+    "perf_12": constant_vus(
+        "perf_12_rss_endurance",
+        ("/feed",),
+        vus=50,
+        duration_s=1800,
+        thresholds={"http_req_duration": ("p(99)<800",)},
+    ),
+}
+
+
+# ---- Thresholds -----------------------------------------------------------
+
+_THRESHOLD_RE = re.compile(r"^\s*(p\((\d+(?:\.\d+)?)\)|avg|min|max|med|rate|count)\s*(<=|>=|==|!=|<|>)\s*([0-9.eE+-]+)\s*$")
+_OPS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+
+@dataclass(frozen=True)
+class ThresholdResult:
+    metric: str
+    expression: str
+    observed: float
+    ok: bool
+
+    def describe(self) -> str:
+        return f"{'✓' if self.ok else '✗'} {self.metric}: {self.expression} (observed {self.observed:.4g})"
+
+
+def evaluate_threshold(result: "LoadResult", metric: str, expression: str) -> ThresholdResult:
+    """Evaluate one k6 threshold expression. Tag filters such as ``{static:0}`` are ignored."""
+    base_metric = metric.split("{", 1)[0].strip()
+    match = _THRESHOLD_RE.match(expression)
+    if not match:
+        raise ValueError(f"Unsupported threshold expression: {expression!r}")
+    aggregate, pct, op, limit = match.groups()
+
+    if base_metric == "http_req_duration":
+        hist = result.histogram
+        if pct is not None:
+            observed = result.percentile_ms(float(pct))
+        elif aggregate == "avg":
+            observed = hist.mean / 1000.0
+        elif aggregate == "min":
+            observed = hist.min / 1000.0
+        elif aggregate == "max":
+            observed = hist.max / 1000.0
+        elif aggregate == "med":
+            observed = result.percentile_ms(50)
+        else:
+            raise ValueError(f"{aggregate} is not defined for {base_metric}")
+    elif base_metric == "http_req_failed":
+        if aggregate != "rate":
+            raise ValueError(f"{base_metric} supports only rate thresholds")
+        observed = result.failure_rate
+    elif base_metric == "http_reqs":
+        if aggregate == "count":
+            observed = float(result.requests)
+        elif aggregate == "rate":
+            observed = result.rps
+        else:
+            raise ValueError(f"{aggregate} is not defined for {base_metric}")
+    else:
+        raise ValueError(f"Unknown metric: {metric}")
+    return ThresholdResult(metric, expression, observed, _OPS[op](observed, float(limit)))
+
+
+# ---- Results --------------------------------------------------------------
+
+@dataclass
+class LoadResult:
+    scenario: Scenario
+    histogram: HdrHistogram = field(default_factory=HdrHistogram)
+    requests: int = 0
+    failures: int = 0
+    bytes_received: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+    duration_s: float = 0.0
+    peak_vus: int = 0
+
+    def add(self, latency_s: float, status: str, nbytes: int, failed: bool) -> None:
+        self.histogram.record(int(latency_s * 1_000_000))
+        self.requests += 1
+        self.failures += int(failed)
+        self.bytes_received += nbytes
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration_s if self.duration_s else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        return self.histogram.value_at_percentile(q) / 1000.0
+
+    def check_thresholds(self) -> list[ThresholdResult]:
+        return [
+            evaluate_threshold(self, metric, expression)
+            for metric, expressions in self.scenario.thresholds.items()
+            for expression in expressions
+        ]
+
+    def summary(self) -> str:
+        statuses = " ".join(f"{k}={v}" for k, v in sorted(self.statuses.items()))
+        return (
+            f"{self.scenario.name}: reqs={self.requests} ({self.rps:.1f}/s) failed={self.failure_rate:.2%} "
+            f"vus_max={self.peak_vus} p50={self.percentile_ms(50):.0f}ms p90={self.percentile_ms(90):.0f}ms "
+            f"p95={self.percentile_ms(95):.0f}ms p99={self.percentile_ms(99):.0f}ms max={self.histogram.max / 1000:.0f}ms "
+            f"recv={self.bytes_received / 1024 / 1024:.1f}MB [{statuses}]"
+        )
+
+
+# ---- HTTP/1.1 client ------------------------------------------------------
+
+class _Connections:
+    """Keep-alive connections owned by one VU, keyed by (scheme, host, port)."""
+
+    def __init__(self, ssl_context: ssl.SSLContext):
+        self._ssl = ssl_context
+        self._open: dict[tuple[str, str, int], tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+    async def get(self, scheme: str, host: str, port: int):
+        key = (scheme, host, port)
+        conn = self._open.get(key)
+        if conn is not None and not conn[1].is_closing():
+            return conn
+        conn = await asyncio.open_connection(
+            host, port, ssl=self._ssl if scheme == "https" else None, server_hostname=host if scheme == "https" else None
+        )
+        self._open[key] = conn
+        return conn
+
+    def drop(self, scheme: str, host: str, port: int) -> None:
+        conn = self._open.pop((scheme, host, port), None)
+        if conn is not None:
+            conn[1].close()
+
+    def close(self) -> None:
+        for _reader, writer in self._open.values():
+            writer.close()
+        self._open.clear()
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> tuple[int, bool]:
+    """Drain the body without keeping it; returns (bytes read, connection reusable)."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        total = 0
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return total, True
+            remaining = size
+            while remaining:
+                chunk = await reader.read(min(remaining, _READ_CHUNK))
+                if not chunk:
+                    raise ConnectionError("connection closed mid-chunk")
+                remaining -= len(chunk)
+            total += size
+            await reader.readline()
+    if "content-length" in headers:
+        remaining = int(headers["content-length"])
+        total = remaining
+        while remaining:
+            chunk = await reader.read(min(remaining, _READ_CHUNK))
+            if not chunk:
+                raise ConnectionError("connection closed mid-body")
+            remaining -= len(chunk)
+        return total, True
+    total = 0
+    while chunk := await reader.read(_READ_CHUNK):
+        total += len(chunk)
+    return total, False
+
+
+async def _fetch(conns: _Connections, url: str, headers: dict[str, str]) -> tuple[int, int, str | None]:
+    """GET ``url`` following redirects; returns (final status, bytes received, Retry-After)."""
+    received = 0
+    for _ in range(_MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host_header = parts.netloc.rsplit("@", 1)[-1]
+        request = [f"GET {target} HTTP/1.1", f"Host: {host_header}", f"User-Agent: {USER_AGENT}",
+                   "Accept: */*", "Accept-Encoding: gzip, deflate", "Connection: keep-alive"]
+        request += [f"{k}: {v}" for k, v in headers.items()]
+        payload = ("\r\n".join(request) + "\r\n\r\n").encode("latin-1")
+
+        for attempt in range(2):
+            reader, writer = await conns.get(scheme, host, port)
+            try:
+                writer.write(payload)
+                await writer.drain()
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionError("empty response")
+                break
+            except (ConnectionError, OSError):
+                # A pooled keep-alive connection may have been closed by the server; retry once fresh.
+                conns.drop(scheme, host, port)
+                if attempt:
+                    raise
+        status = int(status_line.split()[1])
+        response_headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            nbytes, reusable = 0, True
+        else:
+            nbytes, reusable = await _read_body(reader, response_headers)
+        received += nbytes
+        if not reusable or response_headers.get("connection", "").lower() == "close":
+            conns.drop(scheme, host, port)
+
+        location = response_headers.get("location")
+        if status in (301, 302, 303, 307, 308) and location:
+            url = urljoin(url, location)
+            continue
+        return status, received, response_headers.get("retry-after")
+    return status, received, None
+
+
+# ---- Runner ---------------------------------------------------------------
+
+class LoadRunner:
+    def __init__(
+        self,
+        scenario: Scenario,
+        urls: dict[str, str],
+        *,
+        verify_tls: bool = True,
+        seed: int | None = None,
+        limiter: RateLimiter | None = None,
+    ):
+        self.scenario = scenario
+        self.limiter = limiter if limiter is not None and limiter.enabled else None
+        base = urls.get(scenario.url_key) or urls["base_url"]
+        self.targets = [p if urlsplit(p).scheme else urljoin(base, p.lstrip("/")) if p else base for p in scenario.paths]
+        self.result = LoadResult(scenario)
+        self._rng = random.Random(seed)
+        self._ssl = ssl.create_default_context()
+        if not verify_tls:
+            self._ssl.check_hostname = False
+            self._ssl.verify_mode = ssl.CERT_NONE
+
+    async def _vu(self, stop: asyncio.Event) -> None:
+        conns = _Connections(self._ssl)
+        scenario = self.scenario
+        try:
+            while not stop.is_set():
+                url = self._rng.choice(self.targets)
+                if scenario.cache_bust:
+                    url += ("&" if "?" in url else "?") + f"_cb={self._rng.getrandbits(48):x}"
+                if self.limiter is not None:
+                    # Pacing happens before the clock starts: only server time is measured.
+                    await self.limiter.wait_async(url)
+                start = time.perf_counter()
+                try:
+                    status, nbytes, retry_after = await asyncio.wait_for(
+                        _fetch(conns, url, scenario.headers), scenario.timeout_s
+                    )
+                    self.result.add(time.perf_counter() - start, str(status), nbytes, status >= 400)
+                    if self.limiter is not None:
+                        self.limiter.feedback(url, status, retry_after)
+                except (asyncio.TimeoutError, ConnectionError, OSError, ValueError, IndexError) as exc:
+                    conns.close()
+                    self.result.add(time.perf_counter() - start, type(exc).__name__, 0, True)
+
+                lo, hi = scenario.think_time_s
+                if hi > 0:
+                    try:
+                        await asyncio.wait_for(stop.wait(), self._rng.uniform(lo, hi))
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            conns.close()
+
+    async def run(self, *, tick_s: float = 0.1, graceful_stop_s: float = 10.0) -> LoadResult:
+        scenario = self.scenario
+        vus: list[tuple[asyncio.Task, asyncio.Event]] = []
+        retired: list[asyncio.Task] = []
+        started = time.monotonic()
+        while (elapsed := time.monotonic() - started) < scenario.duration_s:
+            target = scenario.target_vus(elapsed)
+            while len(vus) < target:
+                stop = asyncio.Event()
+                vus.append((asyncio.create_task(self._vu(stop)), stop))
+            while len(vus) > target:
+                # Ramp-down: the VU finishes its current iteration, like k6's gracefulRampDown.
+                task, stop = vus.pop()
+                stop.set()
+                retired.append(task)
+            self.result.peak_vus = max(self.result.peak_vus, len(vus))
+            await asyncio.sleep(tick_s)
+
+        for _task, stop in vus:
+            stop.set()
+        pending = [task for task in [*retired, *(task for task, _stop in vus)] if not task.done()]
+        if pending:
+            _done, still_running = await asyncio.wait(pending, timeout=graceful_stop_s)
+            for task in still_running:
+                task.cancel()
+            await asyncio.gather(*still_running, return_exceptions=True)
+        self.result.duration_s = time.monotonic() - started
+        return self.result
+
+
+def run_scenario(
+    scenario: Scenario,
+    urls: dict[str, str],
+    *,
+    verify_tls: bool = True,
+    seed: int | None = None,
+    limiter: RateLimiter | None = None,
+) -> LoadResult:
+    """Run ``scenario`` to completion on a fresh event loop (paced per host by ``limiter`` if given)."""
+    return asyncio.run(LoadRunner(scenario, urls, verify_tls=verify_tls, seed=seed, limiter=limiter).run())
@@ -0,0 +1,240 @@
+"""Local mirror of the captured OpenSky snapshots for offline, deterministic runs.
+
+Serves the repo's ``*.htm`` snapshots (plus any captured sub-resources under an
+assets directory) with realistic caching/security headers, optional injected
+latency and a bandwidth cap.
+
+CLI:
+    python -m utils.mirror_server --port 8765 --latency-ms 70 --bandwidth-kbps 12000
+    pytest --base-url http://127.0.0.1:8765/ --map-url http://127.0.0.1:8765/map/
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mimetypes
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# URL path -> snapshot file (relative to the repo root).
+SNAPSHOT_ROUTES: dict[str, str] = {
+    "/": "OpenSky.htm",
+    "/map/": "map.htm",
+    "/account": "account.htm",
+    "/login": "login.htm",
+    "/auth/registration": "Sign in.htm",
+}
+
+_BASE_HEADERS = {
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "SAMEORIGIN",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+}
+
+_NOT_FOUND_BODY = b"<!DOCTYPE html><html><head><title>404 Not Found</title></head><body><h1>Not Found</h1></body></html>"
+
+
+@dataclass(frozen=True)
+class _Resource:
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: str
+    cache_control: str
+
+
+@dataclass
+class MirrorSite:
+    """What to serve and how: routes, optional assets dir, latency and bandwidth."""
+
+    routes: dict[str, Path] = field(
+        default_factory=lambda: {route: ROOT / name for route, name in SNAPSHOT_ROUTES.items()}
+    )
+    assets_dir: Path | None = None
+    latency_ms: float = 0.0
+    bandwidth_kbps: float = 0.0
+    _cache: dict[Path, _Resource] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def resolve(self, path: str) -> _Resource | None:
+        path = unquote(urlsplit(path).path) or "/"
+        file_path = self.routes.get(path) or self.routes.get(path.rstrip("/") or "/")
+        if file_path is None and self.assets_dir is not None:
+            candidate = (self.assets_dir / path.lstrip("/")).resolve()
+            if candidate.is_file() and self.assets_dir.resolve() in candidate.parents:
+                file_path = candidate
+        if file_path is None or not file_path.is_file():
+            return None
+        return self._load(file_path)
+
+    def _load(self, file_path: Path) -> _Resource:
+        with self._lock:
+            cached = self._cache.get(file_path)
+            if cached is not None:
+                return cached
+        body = file_path.read_bytes()
+        if file_path.suffix in (".htm", ".html"):
+            content_type = "text/html; charset=utf-8"
+            cache_control = "no-cache"
+        else:
+            content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+            cache_control = "public, max-age=31536000, immutable"
+        resource = _Resource(
+            body=body,
+            content_type=content_type,
+            etag='"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+            last_modified=formatdate(file_path.stat().st_mtime, usegmt=True),
+            cache_control=cache_control,
+        )
+        with self._lock:
+            self._cache[file_path] = resource
+        return resource
+
+
+def _make_handler(site: MirrorSite):
+    class MirrorHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def version_string(self):
+            return "nginx"
+
+        def log_message(self, *args):
+            return
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def _serve(self, *, send_body: bool) -> None:
+            if site.latency_ms:
+                time.sleep(site.latency_ms / 1000.0)
+
+            resource = site.resolve(self.path)
+            if resource is None:
+                self._respond(404, _NOT_FOUND_BODY, {"Content-Type": "text/html; charset=utf-8"}, send_body)
+                return
+
+            headers = {
+                "Content-Type": resource.content_type,
+                "ETag": resource.etag,
+                "Last-Modified": resource.last_modified,
+                "Cache-Control": resource.cache_control,
+            }
+            if self._not_modified(resource):
+                self._respond(304, b"", headers, send_body=False)
+                return
+            self._respond(200, resource.body, headers, send_body)
+
+        def _not_modified(self, resource: _Resource) -> bool:
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match:
+                return resource.etag in [tag.strip() for tag in if_none_match.split(",")]
+            if_modified_since = self.headers.get("If-Modified-Since")
+            if if_modified_since:
+                try:
+                    return parsedate_to_datetime(resource.last_modified) <= parsedate_to_datetime(if_modified_since)
+                except (TypeError, ValueError):
+                    return False
+            return False
+
+        def _respond(self, status: int, body: bytes, headers: dict[str, str], send_body: bool) -> None:
+            self.send_response(status)
+            for key, value in {**_BASE_HEADERS, **headers}.items():
+                self.send_header(key, value)
+            if status != 304:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body and body:
+                self._write_throttled(body)
+
+        def _write_throttled(self, body: bytes) -> None:
+            if not site.bandwidth_kbps:
+                self.wfile.write(body)
+                return
+            bytes_per_s = site.bandwidth_kbps * 1024 / 8
+            chunk = max(1024, int(bytes_per_s / 20))
+            for offset in range(0, len(body), chunk):
+                piece = body[offset:offset + chunk]
+                self.wfile.write(piece)
+                time.sleep(len(piece) / bytes_per_s)
+
+    return MirrorHandler
+
+
+class MirrorServer:
+    """Threaded HTTP server around a MirrorSite; usable as a context manager."""
+
+    def __init__(self, site: MirrorSite | None = None, *, host: str = "127.0.0.1", port: int = 0):
+        self.site = site or MirrorSite()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self.site))
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def map_url(self) -> str:
+        return self.base_url + "map/"
+
+    def start(self) -> "MirrorServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mirror-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MirrorServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve the captured OpenSky snapshots locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--assets-dir", default=None, help="Directory of captured sub-resources (URL path layout)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected delay before each response")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0.0, help="Per-connection bandwidth cap (0 = unlimited)")
+    args = parser.parse_args()
+
+    site = MirrorSite(
+        assets_dir=Path(args.assets_dir) if args.assets_dir else None,
+        latency_ms=args.latency_ms,
+        bandwidth_kbps=args.bandwidth_kbps,
+    )
+    server = MirrorServer(site, host=args.host, port=args.port)
+    print(f"Mirror serving {server.base_url} (map: {server.map_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,27 @@
+"""Dependency-free Markdown -> PDF rendering for the project and run reports.
+
+``markdown_to_pdf`` parses the document into blocks (headings, paragraphs,
+lists, code blocks, tables, PNG images) and lays them out page by page:
+text is word-wrapped against cached Helvetica/Courier glyph metrics, tables
+repeat their header row across page breaks, and images are embedded once
+per file. Pages are produced by a generator and streamed to ``PdfWriter``,
+so only the page being laid out (and one image at a time) is in memory.
+
+The table of contents is laid out after the content, in the same pass: each
+entry is exactly one line, so its page count follows from the number of
+headings, and the TOC pages are moved to the front of the page tree.
+"""
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
+import struct
+import unicodedata
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 
 
 PDF_A4 = (595.28, 841.89)  # points
@@ -14,6 +34,117 @@ class PdfStyle:
     leading: int = 14
     margin_left: int = 50
     margin_top: int = 50
+    margin_right: int = 50
+    margin_bottom: int = 50
+    heading_sizes: tuple[int, int, int] = (18, 14, 12)
+    code_size: float = 8.5
+    code_leading: float = 10.5
+    table_size: float = 9
+    table_leading: float = 11
+    paragraph_gap: float = 5
+    image_dpi: float = 96
+
+
+# ---- font metrics --------------------------------------------------------------
+
+# Standard 14 fonts, WinAnsiEncoding. Widths (1/1000 em) for ASCII 32..126 from the Adobe AFMs.
+_FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Courier"}
+_ASCII = [chr(c) for c in range(32, 127)]
+_HELVETICA = dict(zip(_ASCII, [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]))
+_HELVETICA_BOLD = dict(zip(_ASCII, [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]))
+# WinAnsi punctuation outside ASCII (same width in both weights unless listed twice).
+_PUNCTUATION = {
+    "‘": (222, 278), "’": (222, 278), "“": (333, 500), "”": (333, 500),
+    "•": (350, 350), "–": (556, 556), "—": (1000, 1000), "…": (1000, 1000),
+    "€": (556, 556), "«": (556, 556), "»": (556, 556), "°": (400, 400),
+    " ": (278, 278), "©": (737, 737), "®": (737, 737), "×": (584, 584),
+    "·": (278, 278),
+}
+_COURIER_WIDTH = 600
+
+
+@lru_cache(maxsize=None)
+def _char_width(ch: str, font: str) -> int:
+    if font == "F3":
+        return _COURIER_WIDTH
+    bold = font == "F2"
+    table = _HELVETICA_BOLD if bold else _HELVETICA
+    if ch in table:
+        return table[ch]
+    if ch in _PUNCTUATION:
+        return _PUNCTUATION[ch][bold]
+    try:
+        ch.encode("cp1252")
+    except UnicodeEncodeError:
+        return table["?"]  # rendered as "?"
+    # Accented letters: width of the base letter.
+    base = unicodedata.normalize("NFKD", ch)[:1]
+    return table.get(base, table["?"] if not ch.isalpha() else table["o"])
+
+
+@lru_cache(maxsize=65536)
+def _word_width(word: str, font: str) -> int:
+    """Width of ``word`` in 1/1000 em; cached per (word, font) since report text repeats heavily."""
+    return sum(_char_width(ch, font) for ch in word)
+
+
+def text_width(text: str, font: str, size: float) -> float:
+    return _word_width(text, font) * size / 1000.0
+
+
+def _break_word(word: str, font: str, size: float, width: float) -> list[str]:
+    pieces, current, current_w = [], "", 0.0
+    for ch in word:
+        w = _char_width(ch, font) * size / 1000.0
+        if current and current_w + w > width:
+            pieces.append(current)
+            current, current_w = "", 0.0
+        current += ch
+        current_w += w
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def wrap_text(text: str, font: str, size: float, width: float) -> list[str]:
+    """Greedy word wrap to ``width`` points; words longer than a line are broken by character."""
+    space = _char_width(" ", font) * size / 1000.0
+    lines: list[str] = []
+    current: list[str] = []
+    current_w = 0.0
+    for word in text.split():
+        w = text_width(word, font, size)
+        if w > width:
+            if current:
+                lines.append(" ".join(current))
+            *full, last = _break_word(word, font, size, width)
+            lines.extend(full)
+            current, current_w = [last], text_width(last, font, size)
+            continue
+        needed = w if not current else current_w + space + w
+        if current and needed > width:
+            lines.append(" ".join(current))
+            current, current_w = [word], w
+        else:
+            current.append(word)
+            current_w = needed
+    if current:
+        lines.append(" ".join(current))
+    return lines or [""]
 
 
 def _pdf_escape(text: str) -> str:
@@ -25,211 +156,743 @@ def _pdf_escape(text: str) -> str:
     )
 
 
-def _build_page_stream(lines: list[tuple[int, str]], *, style: PdfStyle, page_size=PDF_A4) -> bytes:
-    """Render a list of (font_size, text) lines as a single PDF content stream."""
-    width, height = page_size
-    x = style.margin_left
-    y = height - style.margin_top
-
-    out: list[str] = ["BT"]
-    out.append(f"/F1 {style.font_size} Tf")
-    out.append(f"{x:.2f} {y:.2f} Td")
-    out.append(f"{style.leading} TL")
-
-    current_size = style.font_size
-    first = True
-    for font_size, text in lines:
-        safe = _pdf_escape(text)
-        if font_size != current_size:
-            current_size = font_size
-            out.append(f"/F1 {current_size} Tf")
-        if first:
-            out.append(f"({safe}) Tj")
-            first = False
-        else:
-            out.append("T*")
-            out.append(f"({safe}) Tj")
+def _pdf_string(text: str) -> bytes:
+    return b"(" + _pdf_escape(text).encode("cp1252", errors="replace") + b")"
+
 
-    out.append("ET")
-    return ("\n".join(out)).encode("latin-1", errors="replace")
+# ---- markdown blocks -----------------------------------------------------------
+
+@dataclass(frozen=True)
+class Heading:
+    level: int
+    text: str
 
 
-def _paginate_markdown(md: str, *, lines_per_page: int = 46) -> tuple[list[list[tuple[int, str]]], list[tuple[int, str, int]]]:
-    """Return pages and heading index: (level, title, page_number_1_based)."""
-    pages: list[list[tuple[int, str]]] = [[]]
-    headings: list[tuple[int, str, int]] = []
+@dataclass(frozen=True)
+class Paragraph:
+    text: str
+
+
+@dataclass(frozen=True)
+class ListItem:
+    level: int
+    marker: str
+    text: str
 
-    def push_line(font_size: int, text: str) -> None:
-        if len(pages[-1]) >= lines_per_page:
-            pages.append([])
-        pages[-1].append((font_size, text))
 
-    for raw in md.splitlines():
-        line = raw.rstrip()
+@dataclass(frozen=True)
+class CodeBlock:
+    lines: list[str]
+
+
+@dataclass(frozen=True)
+class Table:
+    header: list[str]
+    rows: list[list[str]]
+
+
+@dataclass(frozen=True)
+class Image:
+    alt: str
+    path: str
+
+
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_IMAGE = re.compile(r"^!\[([^\]]*)\]\(([^)\s]+)(?:\s+\"[^\"]*\")?\)\s*$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$")
+_INLINE = [
+    (re.compile(r"!?\[([^\]]*)\]\(([^)\s]+)\)"), r"\1 (\2)"),
+    (re.compile(r"\*\*(.+?)\*\*|__(.+?)__"), lambda m: m.group(1) or m.group(2)),
+    (re.compile(r"`([^`]*)`"), r"\1"),
+]
+
+
+def _inline(text: str) -> str:
+    """Strip inline markup the renderer does not style (bold, code spans); links keep their URL."""
+    for pattern, repl in _INLINE:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def _split_row(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [_inline(cell.strip()) for cell in line.split("|")]
+
+
+def parse_markdown(md: str) -> Iterator:
+    """Yield layout blocks for a Markdown-ish document (headings, paragraphs, lists, code, tables, images)."""
+    lines = md.splitlines()
+    paragraph: list[str] = []
+    i = 0
+
+    def flush():
+        if paragraph:
+            text = _inline(" ".join(part.strip() for part in paragraph))
+            paragraph.clear()
+            return Paragraph(text)
+        return None
+
+    while i < len(lines):
+        line = lines[i].rstrip()
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            block = flush()
+            if block:
+                yield block
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith("```"):
+                code.append(lines[i].rstrip().expandtabs(4))
+                i += 1
+            yield CodeBlock(code)
+            i += 1
+            continue
+
+        if not stripped:
+            block = flush()
+            if block:
+                yield block
+            i += 1
+            continue
+
         if line.startswith("#"):
             level = len(line) - len(line.lstrip("#"))
             title = line[level:].strip()
             if title:
-                # Ensure headings don't end up as the last line of a page.
-                if len(pages[-1]) >= lines_per_page - 2:
-                    pages.append([])
-                if level == 1:
-                    push_line(18, title)
-                    push_line(11, "")
-                elif level == 2:
-                    push_line(14, title)
-                else:
-                    push_line(12, title)
-                headings.append((level, title, len(pages)))
+                block = flush()
+                if block:
+                    yield block
+                yield Heading(min(level, 3), _inline(title))
+                i += 1
                 continue
 
-        if not line.strip():
-            push_line(11, "")
+        image = _IMAGE.match(stripped)
+        if image:
+            block = flush()
+            if block:
+                yield block
+            yield Image(alt=image.group(1), path=image.group(2))
+            i += 1
+            continue
+
+        if stripped.startswith("|") and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1].strip()):
+            block = flush()
+            if block:
+                yield block
+            header = _split_row(stripped)
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_split_row(lines[i]))
+                i += 1
+            yield Table(header, rows)
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item:
+            block = flush()
+            if block:
+                yield block
+            marker = item.group(2)
+            yield ListItem(
+                level=len(item.group(1).expandtabs(4)) // 2,
+                marker="•" if marker in "-*+" else marker,
+                text=_inline(item.group(3)),
+            )
+            i += 1
+            continue
+
+        paragraph.append(line)
+        i += 1
+
+    block = flush()
+    if block:
+        yield block
+
+
+# ---- layout --------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class PngInfo:
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    interlace: int
+
+
+def read_png_info(path: Path) -> PngInfo | None:
+    """Read the IHDR chunk only (layout needs dimensions, not pixels)."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(29)
+    except OSError:
+        return None
+    if len(head) < 29 or head[:8] != b"\x89PNG\r\n\x1a\n" or head[12:16] != b"IHDR":
+        return None
+    width, height, bit_depth, color_type, _compression, _filter, interlace = struct.unpack(">IIBBBBB", head[16:29])
+    return PngInfo(width, height, bit_depth, color_type, interlace)
+
+
+@dataclass
+class LaidOutPage:
+    number: int  # 1-based, among the pages of this layout
+    content: bytes
+    images: dict[str, Path] = field(default_factory=dict)  # XObject name -> PNG path
+    links: list[tuple[tuple[float, float, float, float], int, float]] = field(default_factory=list)
+
+
+class _Layout:
+    """Cursor-based page builder; finished pages are queued in ``done``."""
+
+    def __init__(self, style: PdfStyle, page_size=PDF_A4, *, base_dir: Path | None = None):
+        self.style = style
+        self.page_w, self.page_h = page_size
+        self.left = style.margin_left
+        self.width = self.page_w - style.margin_left - style.margin_right
+        self.top = self.page_h - style.margin_top
+        self.bottom = style.margin_bottom
+        self.base_dir = base_dir
+        self.done: deque[LaidOutPage] = deque()
+        self.headings: list[tuple[int, str, int, float]] = []  # level, title, page, y
+        self.page_number = 0
+        self._png_cache: dict[Path, PngInfo | None] = {}
+        self._start_page()
+
+    # -- page management
+
+    def _start_page(self) -> None:
+        self.page_number += 1
+        self.ops: list[bytes] = []
+        self.images: dict[str, Path] = {}
+        self.links: list = []
+        self.y = self.top
+
+    def finish_page(self) -> None:
+        self.done.append(LaidOutPage(self.page_number, b"\n".join(self.ops), self.images, self.links))
+        self._start_page()
+
+    def finish(self) -> None:
+        if self.ops:
+            self.finish_page()
+
+    def ensure(self, height: float) -> None:
+        if self.ops and self.y - height < self.bottom:
+            self.finish_page()
+
+    # -- drawing primitives
+
+    def text(self, x: float, baseline: float, font: str, size: float, text: str) -> None:
+        self.ops.append(b"BT /%s %g Tf %.2f %.2f Td %s Tj ET" % (font.encode(), size, x, baseline, _pdf_string(text)))
+
+    def fill_rect(self, x: float, y: float, w: float, h: float, gray: float) -> None:
+        self.ops.append(b"q %.2f g %.2f %.2f %.2f %.2f re f Q" % (gray, x, y, w, h))
+
+    def stroke_line(self, x1: float, y1: float, x2: float, y2: float, gray: float = 0.6) -> None:
+        self.ops.append(b"q 0.5 w %.2f G %.2f %.2f m %.2f %.2f l S Q" % (gray, x1, y1, x2, y2))
+
+    def text_lines(self, lines: list[str], *, x: float, font: str, size: float, leading: float) -> None:
+        for line in lines:
+            self.ensure(leading)
+            self.y -= leading
+            self.text(x, self.y + (leading - size) / 2 + size * 0.2, font, size, line)
+
+    # -- blocks
+
+    def add(self, block) -> None:
+        style = self.style
+        if isinstance(block, Heading):
+            size = style.heading_sizes[block.level - 1]
+            leading = size * 1.3
+            gap = size * 0.6 if self.ops else 0
+            # Keep the heading with at least two lines of what follows.
+            self.ensure(gap + leading + 2 * style.leading)
+            if self.ops:
+                self.y -= gap
+            self.headings.append((block.level, block.text, self.page_number, self.y))
+            self.text_lines(wrap_text(block.text, "F2", size, self.width), x=self.left, font="F2", size=size, leading=leading)
+            self.y -= size * 0.3
+        elif isinstance(block, Paragraph):
+            self.text_lines(
+                wrap_text(block.text, "F1", style.font_size, self.width),
+                x=self.left, font="F1", size=style.font_size, leading=style.leading,
+            )
+            self.y -= style.paragraph_gap
+        elif isinstance(block, ListItem):
+            self._list_item(block)
+        elif isinstance(block, CodeBlock):
+            self._code_block(block)
+        elif isinstance(block, Table):
+            self._table(block)
+        elif isinstance(block, Image):
+            self._image(block)
+
+    def _list_item(self, item: ListItem) -> None:
+        style = self.style
+        indent = 16 * (item.level + 1)
+        lines = wrap_text(item.text, "F1", style.font_size, self.width - indent)
+        self.ensure(style.leading)
+        marker_x = self.left + indent - 4 - text_width(item.marker, "F1", style.font_size)
+        first_baseline = self.y - style.leading + (style.leading - style.font_size) / 2 + style.font_size * 0.2
+        self.text(marker_x, first_baseline, "F1", style.font_size, item.marker)
+        self.text_lines(lines, x=self.left + indent, font="F1", size=style.font_size, leading=style.leading)
+        self.y -= 2
+
+    def _code_block(self, block: CodeBlock) -> None:
+        style = self.style
+        pad = 4
+        max_chars = max(1, int((self.width - 2 * pad) / (_COURIER_WIDTH * style.code_size / 1000.0)))
+        lines = []
+        for line in block.lines or [""]:
+            lines.extend([line[i:i + max_chars] for i in range(0, len(line), max_chars)] or [""])
+        self.ensure(style.code_leading + pad)
+        self.y -= pad / 2
+        for line in lines:
+            self.ensure(style.code_leading)
+            self.fill_rect(self.left, self.y - style.code_leading, self.width, style.code_leading, 0.94)
+            self.y -= style.code_leading
+            self.text(self.left + pad, self.y + style.code_size * 0.35, "F3", style.code_size, line)
+        self.y -= style.paragraph_gap + pad / 2
+
+    def _column_widths(self, table: Table, columns: int) -> list[float]:
+        size, pad = self.style.table_size, 8
+        natural = [0.0] * columns
+        for row in [table.header] + table.rows:
+            for c, cell in enumerate(row[:columns]):
+                font = "F2" if row is table.header else "F1"
+                natural[c] = max(natural[c], text_width(cell, font, size) + pad)
+        if sum(natural) <= self.width:
+            return natural
+        # Water-fill: narrow columns keep their natural width, wide ones share the rest equally.
+        widths = [0.0] * columns
+        remaining, open_cols = self.width, list(range(columns))
+        while open_cols:
+            share = remaining / len(open_cols)
+            narrow = [c for c in open_cols if natural[c] <= share]
+            if not narrow:
+                for c in open_cols:
+                    widths[c] = share
+                break
+            for c in narrow:
+                widths[c] = natural[c]
+                remaining -= natural[c]
+                open_cols.remove(c)
+        return widths
+
+    def _table(self, table: Table) -> None:
+        style = self.style
+        columns = max(len(table.header), *(len(r) for r in table.rows)) if table.rows else len(table.header)
+        widths = self._column_widths(table, columns)
+        size, leading, pad = style.table_size, style.table_leading, 3
+        max_lines = max(1, int((self.top - self.bottom - 2 * pad) / leading) - 2)
+
+        def layout_row(cells: list[str], font: str) -> list[list[str]]:
+            cells = cells + [""] * (columns - len(cells))
+            return [wrap_text(cell, font, size, max(1.0, w - 8))[:max_lines] for cell, w in zip(cells, widths)]
+
+        header = layout_row(table.header, "F2")
+
+        def draw_row(cell_lines: list[list[str]], font: str, shade: float | None) -> None:
+            height = max(len(lines) for lines in cell_lines) * leading + 2 * pad
+            top = self.y
+            if shade is not None:
+                self.fill_rect(self.left, top - height, sum(widths), height, shade)
+            x = self.left
+            for lines, w in zip(cell_lines, widths):
+                for n, line in enumerate(lines):
+                    baseline = top - pad - (n + 1) * leading + (leading - size) / 2 + size * 0.2
+                    self.text(x + 4, baseline, font, size, line)
+                self.stroke_line(x, top, x, top - height)
+                x += w
+            self.stroke_line(x, top, x, top - height)
+            self.stroke_line(self.left, top - height, x, top - height)
+            self.y -= height
+
+        def header_height() -> float:
+            return max(len(lines) for lines in header) * leading + 2 * pad
+
+        self.ensure(header_height() + leading + 2 * pad)
+        self.stroke_line(self.left, self.y, self.left + sum(widths), self.y)
+        draw_row(header, "F2", 0.88)
+        for row in table.rows:
+            cell_lines = layout_row(row, "F1")
+            height = max(len(lines) for lines in cell_lines) * leading + 2 * pad
+            if self.y - height < self.bottom:
+                self.finish_page()
+                self.stroke_line(self.left, self.y, self.left + sum(widths), self.y)
+                draw_row(header, "F2", 0.88)
+            draw_row(cell_lines, "F1", None)
+        self.y -= style.paragraph_gap
+
+    def _resolve(self, path: str) -> Path:
+        candidate = Path(path)
+        if not candidate.is_absolute() and self.base_dir is not None:
+            candidate = self.base_dir / candidate
+        return candidate
+
+    def _image(self, block: Image) -> None:
+        style = self.style
+        path = self._resolve(block.path)
+        if path not in self._png_cache:
+            self._png_cache[path] = read_png_info(path)
+        info = self._png_cache[path]
+        if info is None:
+            self.add(Paragraph(f"[image unavailable: {block.path}]"))
+            return
+        scale = 72.0 / style.image_dpi
+        w, h = info.width * scale, info.height * scale
+        max_h = (self.top - self.bottom) * 0.85
+        fit = min(1.0, self.width / w, max_h / h)
+        w, h = w * fit, h * fit
+        caption = wrap_text(block.alt, "F1", style.table_size, self.width) if block.alt else []
+        self.ensure(h + 4 + len(caption) * style.table_leading)
+        name = f"Im{len(self.images) + 1}"
+        self.images[name] = path
+        self.y -= h
+        self.ops.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q" % (w, h, self.left, self.y, name.encode()))
+        self.y -= 4
+        self.text_lines(caption, x=self.left, font="F1", size=style.table_size, leading=style.table_leading)
+        self.y -= style.paragraph_gap
+
+    # -- table of contents
+
+    def toc_capacity(self, first_page: bool) -> int:
+        avail = self.top - self.bottom
+        if first_page:
+            avail -= self._toc_title_height()
+        return max(1, int(avail // self.style.leading))
+
+    def _toc_title_height(self) -> float:
+        size = self.style.heading_sizes[0]
+        return size * 1.3 + size * 0.3
+
+    def toc_page_count(self, entries: int) -> int:
+        first = self.toc_capacity(True)
+        if entries <= first:
+            return 1
+        rest = self.toc_capacity(False)
+        return 1 + -(-(entries - first) // rest)
+
+    def toc(self, title: str, headings: list[tuple[int, str, int, float]], page_offset: int) -> None:
+        """Lay out TOC entries (one line each, page numbers shifted by ``page_offset``)."""
+        style = self.style
+        self.add(Heading(1, title))
+        capacity = self.toc_capacity(True)
+        used = 0
+        size = style.font_size
+        right = self.left + self.width
+        for level, text, page, target_y in headings:
+            if used == capacity:
+                self.finish_page()
+                capacity, used = self.toc_capacity(False), 0
+            indent = 14 * (level - 1)
+            number = str(page + page_offset)
+            number_w = text_width(number, "F1", size)
+            room = self.width - indent - number_w - 24
+            if text_width(text, "F1", size) > room:
+                while text and text_width(text + "…", "F1", size) > room:
+                    text = text[:-1]
+                text = text.rstrip() + "…"
+            title_w = text_width(text, "F1", size)
+            dot_w = _char_width(".", "F1") * size / 1000.0
+            dots = "." * max(0, int((self.width - indent - title_w - number_w - 12) / dot_w))
+            self.y -= style.leading
+            baseline = self.y + (style.leading - size) / 2 + size * 0.2
+            self.text(self.left + indent, baseline, "F1", size, f"{text} {dots}")
+            self.text(right - number_w, baseline, "F1", size, number)
+            self.links.append(((self.left, self.y, right, self.y + style.leading), page, target_y))
+            used += 1
+
+
+def layout_pages(blocks: Iterable, layout: _Layout) -> Iterator[LaidOutPage]:
+    """Lay blocks out and yield each page as soon as it is complete."""
+    for block in blocks:
+        layout.add(block)
+        while layout.done:
+            yield layout.done.popleft()
+    layout.finish()
+    while layout.done:
+        yield layout.done.popleft()
+
+
+# ---- images --------------------------------------------------------------------
+
+class _ImageEmbedder:
+    """Writes each PNG once as an image XObject and remembers its object id."""
+
+    def __init__(self, writer: "PdfWriter"):
+        self.writer = writer
+        self._ids: dict[Path, int] = {}
+
+    def object_id(self, path: Path) -> int:
+        obj_id = self._ids.get(path)
+        if obj_id is None:
+            obj_id = self._ids[path] = self._embed(path)
+        return obj_id
+
+    def _embed(self, path: Path) -> int:
+        info = read_png_info(path)
+        if info is not None and info.interlace == 0 and info.color_type in (0, 2, 3) and info.bit_depth <= 8:
+            return self._embed_png_direct(path, info)
+        return self._embed_decoded(path)
+
+    def _embed_png_direct(self, path: Path, info: PngInfo) -> int:
+        """Copy the IDAT zlib stream as-is; PNG row filters map onto the PDF PNG predictor."""
+        idat, palette = [], b""
+        with open(path, "rb") as f:
+            f.seek(8)
+            while True:
+                head = f.read(8)
+                if len(head) < 8:
+                    break
+                length, kind = struct.unpack(">I4s", head)
+                data = f.read(length)
+                f.seek(4, 1)  # CRC
+                if kind == b"IDAT":
+                    idat.append(data)
+                elif kind == b"PLTE":
+                    palette = data
+                elif kind == b"IEND":
+                    break
+        colors = {0: 1, 2: 3, 3: 1}[info.color_type]
+        if info.color_type == 3:
+            color_space = b"[/Indexed /DeviceRGB %d <%s>]" % (len(palette) // 3 - 1, palette.hex().encode())
         else:
-            push_line(11, line)
+            color_space = b"/DeviceGray" if colors == 1 else b"/DeviceRGB"
+        extra = (
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %b /BitsPerComponent %d "
+            b"/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors %d /BitsPerComponent %d /Columns %d >> "
+            % (info.width, info.height, color_space, info.bit_depth, colors, info.bit_depth, info.width)
+        )
+        return self.writer.add_stream(b"".join(idat), extra, compress=False)
+
+    def _embed_decoded(self, path: Path) -> int:
+        """Alpha, 16-bit or interlaced PNGs (and other formats) are decoded with Pillow."""
+        from PIL import Image as PILImage
+
+        with PILImage.open(path) as img:
+            img.load()
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            rgb = img.convert("RGBA" if has_alpha else "RGB")
+        smask = b""
+        if has_alpha:
+            alpha = rgb.getchannel("A")
+            smask_id = self.writer.add_stream(
+                alpha.tobytes(),
+                b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray /BitsPerComponent 8 "
+                % alpha.size,
+            )
+            smask = b"/SMask %d 0 R " % smask_id
+            rgb = rgb.convert("RGB")
+        return self.writer.add_stream(
+            rgb.tobytes(),
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB /BitsPerComponent 8 %b"
+            % (rgb.size[0], rgb.size[1], smask),
+        )
 
-    # Remove trailing empty page
-    if pages and not any(t.strip() for _, t in pages[-1]):
-        pages.pop()
-    return pages, headings
 
+# ---- document ------------------------------------------------------------------
 
-def _render_toc(headings: list[tuple[int, str, int]], *, lines_per_page: int) -> str:
-    lines: list[str] = ["# Table des matières", ""]
-    for level, title, page in headings:
-        if level == 1:
-            indent = ""
-        elif level == 2:
-            indent = "  "
-        else:
-            indent = "    "
-        dots = "." * max(4, 60 - len(title) - len(indent))
-        lines.append(f"{indent}{title} {dots} {page}")
-    lines.append("")
-    return "\n".join(lines)
+def _font_dict(base_font: str) -> bytes:
+    # Every string is written as cp1252, including code blocks set in Courier.
+    return b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base_font.encode()
 
 
-def markdown_to_pdf(md: str, output_path: Path) -> Path:
-    """Create a small, dependency-free PDF from a Markdown-ish document.
+def markdown_to_pdf(
+    md: str,
+    output_path: Path,
+    *,
+    base_dir: Path | None = None,
+    toc_title: str = "Table des matières",
+    style: PdfStyle = PdfStyle(),
+) -> Path:
+    """Create a dependency-free PDF from a Markdown-ish document.
 
     Supported Markdown:
-    - headings (#, ##, ###)
-    - plain paragraphs
+    - headings (#, ##, ###), listed in the table of contents
+    - paragraphs (wrapped), ``-``/``*``/``1.`` lists, fenced code blocks
+    - pipe tables with a ``---`` separator row
+    - ``![alt](path.png)`` images, resolved against ``base_dir``
     """
-    # Two-pass: build content pages, then build TOC pages and re-paginate with TOC inserted.
-    content_pages, headings = _paginate_markdown(md)
-    toc_md = _render_toc(headings, lines_per_page=46)
-    toc_pages, _ = _paginate_markdown(toc_md)
-
-    # Adjust heading page numbers for the inserted TOC pages
-    adjusted_headings = [(lvl, title, page + len(toc_pages)) for (lvl, title, page) in headings]
-    toc_md = _render_toc(adjusted_headings, lines_per_page=46)
-    toc_pages, _ = _paginate_markdown(toc_md)
-
-    all_pages = toc_pages + content_pages
-    _write_pdf(output_path, all_pages)
+    with PdfWriter(output_path) as pdf:
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), pdf.add_object(_font_dict(base))) for name, base in _FONTS.items())
+        images = _ImageEmbedder(pdf)
+
+        def write(page: LaidOutPage, page_ids: list[int] | None = None) -> int:
+            xobjects = b"".join(b"/%s %d 0 R " % (name.encode(), images.object_id(path)) for name, path in page.images.items())
+            resources = b"/Font << %b >> " % fonts + (b"/XObject << %b>> " % xobjects if xobjects else b"")
+            annots = b""
+            if page_ids is not None and page.links:
+                annots = b" ".join(
+                    b"<< /Type /Annot /Subtype /Link /Border [0 0 0] /Rect [%.2f %.2f %.2f %.2f] /Dest [%d 0 R /XYZ null %.2f null] >>"
+                    % (*rect, page_ids[target - 1], y)
+                    for rect, target, y in page.links
+                )
+            return pdf.add_page(page.content, resources=resources, annots=annots)
+
+        layout = _Layout(style, base_dir=base_dir)
+        content_ids = [write(page) for page in layout_pages(parse_markdown(md), layout)]
+
+        headings = layout.headings
+        if headings:
+            toc = _Layout(style, base_dir=base_dir)
+            toc.toc(toc_title, headings, page_offset=toc.toc_page_count(len(headings)))
+            toc_ids = [write(page, content_ids) for page in layout_pages((), toc)]
+            pdf.set_page_order(toc_ids + content_ids)
     return output_path
 
 
-def _write_pdf(path: Path, pages: list[list[tuple[int, str]]]) -> None:
-    # Minimal PDF writer (objects + xref). Single font, single content stream per page.
-    style = PdfStyle()
-    w, h = PDF_A4
-
-    objects: list[bytes] = []
-
-    def add_object(obj: bytes) -> int:
-        objects.append(obj)
-        return len(objects)
-
-    # 1: Catalog, 2: Pages, 3: Font, then per page: Page + Contents
-    font_obj = add_object(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+class PdfWriter:
+    """Streaming PDF writer.
 
-    page_kids: list[int] = []
-    contents_objs: list[int] = []
-    page_objs: list[int] = []
-
-    for page_lines in pages:
-        stream = _build_page_stream(page_lines, style=style)
-        contents = b"<< /Length %d >>\nstream\n%b\nendstream" % (len(stream), stream)
-        contents_id = add_object(contents)
-        contents_objs.append(contents_id)
+    Objects go to the file as soon as they are added, with their offsets kept
+    for the cross-reference table; content streams are FlateDecode-compressed.
+    With ``object_streams`` (PDF 1.5) small dictionaries such as page objects are
+    packed into compressed object streams and the xref is written as a
+    compressed cross-reference stream.
+    """
 
-        page_dict = (
-            b"<< /Type /Page /Parent 2 0 R "
-            b"/MediaBox [0 0 %b %b] "
-            b"/Resources << /Font << /F1 %d 0 R >> >> "
-            b"/Contents %d 0 R >>"
-            % (str(w).encode(), str(h).encode(), font_obj, contents_id)
+    PAGES_ID = 1
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        page_size=PDF_A4,
+        compress: bool = True,
+        object_streams: bool = True,
+        objects_per_stream: int = 100,
+    ):
+        self.path = Path(path)
+        self.page_size = page_size
+        self.compress = compress
+        self.object_streams = object_streams
+        self.objects_per_stream = max(1, objects_per_stream)
+        self._next_id = self.PAGES_ID + 1
+        # object id -> (1, offset) for objects in the file, (2, stream id, index) inside an object stream
+        self._xref: dict[int, tuple[int, int, int]] = {}
+        self._pending: list[tuple[int, bytes]] = []
+        self._kids: list[int] = []
+        self._order: list[int] | None = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: BinaryIO = open(self.path, "wb")
+        self._file.write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n" if object_streams else b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self) -> "PdfWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def reserve(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def add_object(self, body: bytes, *, obj_id: int | None = None) -> int:
+        """Add a non-stream object; packed into an object stream when enabled."""
+        obj_id = obj_id or self.reserve()
+        if self.object_streams:
+            self._pending.append((obj_id, body))
+            if len(self._pending) >= self.objects_per_stream:
+                self._flush_object_stream()
+        else:
+            self._write_indirect(obj_id, body)
+        return obj_id
+
+    def add_stream(self, data: bytes, extra: bytes = b"", *, obj_id: int | None = None, compress: bool | None = None) -> int:
+        """Write a stream object straight to the file (compressed unless told otherwise)."""
+        obj_id = obj_id or self.reserve()
+        if self.compress if compress is None else compress:
+            data = zlib.compress(data, 6)
+            extra = b"/Filter /FlateDecode " + extra
+        self._write_indirect(obj_id, b"<< %b/Length %d >>\nstream\n%b\nendstream" % (extra, len(data), data))
+        return obj_id
+
+    def add_page(self, content: bytes, *, resources: bytes, annots: bytes = b"") -> int:
+        w, h = self.page_size
+        contents_id = self.add_stream(content)
+        page_id = self.add_object(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %b %b] /Resources << %b>> /Contents %d 0 R%b >>"
+            % (
+                self.PAGES_ID, str(w).encode(), str(h).encode(), resources, contents_id,
+                b" /Annots [%b]" % annots if annots else b"",
+            )
         )
-        page_id = add_object(page_dict)
-        page_objs.append(page_id)
-        page_kids.append(page_id)
-
-    kids_ref = b"[ " + b" ".join(f"{pid} 0 R".encode() for pid in page_kids) + b" ]"
-    pages_obj = b"<< /Type /Pages /Kids %b /Count %d >>" % (kids_ref, len(page_kids))
-    # Insert Pages object at index 2 (object number 2)
-    objects.insert(1, pages_obj)  # now object numbers shift by +1 for items after insertion
-
-    # Fix up: font_obj/contents/page ids assumed sequential; rebuild cleanly instead for correctness.
-    # (Keep the public API stable; internal writer is simple.)
-    objects = []
-
-    xref_offsets: list[int] = []
-
-    def add(obj: bytes) -> int:
-        objects.append(obj)
-        return len(objects)
-
-    catalog_id = add(b"<< /Type /Catalog /Pages 2 0 R >>")
-    pages_id = add(b"<< /Type /Pages /Kids [] /Count 0 >>")  # placeholder
-    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
-
-    page_ids: list[int] = []
-    for page_lines in pages:
-        stream = _build_page_stream(page_lines, style=style)
-        contents = b"<< /Length %d >>\nstream\n%b\nendstream" % (len(stream), stream)
-        contents_id = add(contents)
-
-        page_dict = (
-            b"<< /Type /Page /Parent 2 0 R "
-            b"/MediaBox [0 0 %b %b] "
-            b"/Resources << /Font << /F1 %d 0 R >> >> "
-            b"/Contents %d 0 R >>"
-            % (str(w).encode(), str(h).encode(), font_id, contents_id)
+        self._kids.append(page_id)
+        return page_id
+
+    def set_page_order(self, page_ids: list[int]) -> None:
+        """Reorder the page tree (e.g. a TOC written last but shown first)."""
+        if sorted(page_ids) != sorted(self._kids):
+            raise ValueError("set_page_order needs exactly the pages that were added")
+        self._order = list(page_ids)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        kids = self._order or self._kids
+        kids_ref = b" ".join(b"%d 0 R" % kid for kid in kids)
+        self.add_object(b"<< /Type /Pages /Kids [%b] /Count %d >>" % (kids_ref, len(kids)), obj_id=self.PAGES_ID)
+        catalog_id = self.add_object(b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES_ID)
+        if self.object_streams:
+            self._flush_object_stream()
+            self._write_xref_stream(catalog_id)
+        else:
+            self._write_xref_table(catalog_id)
+        self._file.close()
+
+    # ---- internals ---------------------------------------------------------
+
+    def _write_indirect(self, obj_id: int, body: bytes) -> None:
+        self._xref[obj_id] = (1, self._file.tell(), 0)
+        self._file.write(b"%d 0 obj\n%b\nendobj\n" % (obj_id, body))
+
+    def _flush_object_stream(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        stream_id = self.reserve()
+        header, body, offset = [], [], 0
+        for index, (obj_id, obj) in enumerate(pending):
+            header.append(b"%d %d" % (obj_id, offset))
+            body.append(obj)
+            offset += len(obj) + 1
+            self._xref[obj_id] = (2, stream_id, index)
+        head = b" ".join(header) + b"\n"
+        data = head + b"\n".join(body) + b"\n"
+        self.add_stream(data, b"/Type /ObjStm /N %d /First %d " % (len(pending), len(head)), obj_id=stream_id)
+
+    def _write_xref_table(self, catalog_id: int) -> None:
+        size = self._next_id
+        xref_start = self._file.tell()
+        rows = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+        for obj_id in range(1, size):
+            entry = self._xref.get(obj_id)
+            rows.append(b"%010d 00000 n \n" % entry[1] if entry else b"0000000000 65535 f \n")
+        rows.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, catalog_id, xref_start))
+        self._file.write(b"".join(rows))
+
+    def _write_xref_stream(self, catalog_id: int) -> None:
+        xref_id = self.reserve()
+        size = self._next_id
+        xref_start = self._file.tell()
+        self._xref[xref_id] = (1, xref_start, 0)
+        rows = [struct.pack(">BIH", 0, 0, 65535)]
+        for obj_id in range(1, size):
+            kind, a, b = self._xref.get(obj_id, (0, 0, 65535))
+            rows.append(struct.pack(">BIH", kind, a, b))
+        data = zlib.compress(b"".join(rows), 6)
+        self._file.write(
+            b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root %d 0 R /Filter /FlateDecode /Length %d >>\n"
+            b"stream\n%b\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n"
+            % (xref_id, size, catalog_id, len(data), data, xref_start)
         )
-        page_id = add(page_dict)
-        page_ids.append(page_id)
-
-    kids_ref = b"[ " + b" ".join(f"{pid} 0 R".encode() for pid in page_ids) + b" ]"
-    objects[pages_id - 1] = b"<< /Type /Pages /Kids %b /Count %d >>" % (kids_ref, len(page_ids))
-
-    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
-    body = bytearray()
-    body.extend(header)
-
-    # xref entry 0 is the free object
-    xref_offsets.append(0)
-    for idx, obj in enumerate(objects, start=1):
-        xref_offsets.append(len(body))
-        body.extend(f"{idx} 0 obj\n".encode("ascii"))
-        body.extend(obj)
-        body.extend(b"\nendobj\n")
-
-    xref_start = len(body)
-    body.extend(f"xref\n0 {len(objects)+1}\n".encode("ascii"))
-    body.extend(b"0000000000 65535 f \n")
-    for off in xref_offsets[1:]:
-        body.extend(f"{off:010d} 00000 n \n".encode("ascii"))
-
-    trailer = (
-        b"trailer\n"
-        b"<< /Size %d /Root %d 0 R >>\n"
-        b"startxref\n%d\n%%EOF\n"
-        % (len(objects) + 1, catalog_id, xref_start)
-    )
-    body.extend(trailer)
-
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_bytes(bytes(body))
-
@@ -0,0 +1,212 @@
+"""Columnar history of performance metrics with regression detection.
+
+Each run writes one file (Parquet when an engine such as pyarrow is installed,
+gzip CSV otherwise) under the history directory, keyed by commit, browser,
+network profile and page. Under pytest-xdist every worker writes its own part
+with the controller's ``run_id``, so the parts still count as one run.
+``detect_regressions`` compares the current run with a rolling baseline of
+earlier runs instead of fixed thresholds.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from urllib.parse import urlsplit
+
+from utils.perf_stats import median_shift_ci, percentile
+
+COLUMNS = ["run_id", "timestamp", "commit", "browser", "network", "page", "metric", "value"]
+KEY = ["browser", "network", "page", "metric"]
+
+
+@dataclass(frozen=True)
+class Regression:
+    browser: str
+    network: str
+    page: str
+    metric: str
+    baseline_median: float
+    current_median: float
+    shift_ci: tuple[float, float]
+    baseline_runs: int
+
+    def describe(self) -> str:
+        lo, hi = self.shift_ci
+        pct = (self.current_median / self.baseline_median - 1) * 100 if self.baseline_median else float("inf")
+        return (
+            f"{self.metric} on {self.page} [{self.browser}/{self.network}]: "
+            f"{self.baseline_median:.3f} -> {self.current_median:.3f} (+{pct:.0f}%, "
+            f"shift CI [{lo:.3f}, {hi:.3f}], baseline {self.baseline_runs} runs)"
+        )
+
+
+def page_key(url: str) -> str:
+    """Host + path of a URL; query strings and fragments do not split history."""
+    parts = urlsplit(url)
+    return f"{parts.netloc.lower()}{parts.path or '/'}" if parts.netloc else url
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def current_commit() -> str:
+    env = os.getenv("GIT_COMMIT") or os.getenv("GITHUB_SHA")
+    if env:
+        return env[:12]
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"], capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+class PerfHistory:
+    def __init__(
+        self, directory: Path, *, commit: str, browser: str, run_id: str | None = None, part: str = ""
+    ):
+        self.directory = Path(directory)
+        self.commit = commit
+        self.browser = browser
+        self.run_id = run_id or new_run_id()
+        self.part = part
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, metric: str, value: float, *, page: str, network: str = "none") -> None:
+        if value is None:
+            return
+        with self._lock:
+            self._rows.append(
+                {
+                    "run_id": self.run_id,
+                    "timestamp": time.time(),
+                    "commit": self.commit,
+                    "browser": self.browser,
+                    "network": network,
+                    "page": page,
+                    "metric": metric,
+                    "value": float(value),
+                }
+            )
+
+    def rows(self) -> list[dict]:
+        with self._lock:
+            return list(self._rows)
+
+    def flush(self) -> Path | None:
+        import pandas as pd
+
+        rows = self.rows()
+        if not rows:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        path = self.directory / f"run-{self.run_id}{'-' + self.part if self.part else ''}.parquet"
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            path = path.with_suffix(".csv.gz")
+            df.to_csv(path, index=False, compression="gzip")
+        return path
+
+    def load(self):
+        import pandas as pd
+
+        frames = []
+        for path in sorted(self.directory.glob("run-*")):
+            try:
+                if path.suffix == ".parquet":
+                    frames.append(pd.read_parquet(path))
+                elif path.name.endswith(".csv.gz"):
+                    frames.append(pd.read_csv(path, dtype={"commit": str}))
+            except (ImportError, ValueError, OSError):
+                continue
+        if not frames:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def detect_regressions(
+        self,
+        *,
+        window: int = 10,
+        min_effect: float = 0.05,
+        min_samples: int = 3,
+        confidence: float = 0.95,
+    ) -> list[Regression]:
+        """Flag metrics whose median rose significantly vs. the last ``window`` runs.
+
+        The current run is read back from the directory, so call this after every
+        part (including xdist workers') has been flushed.
+        A regression needs the bootstrap CI of the median shift to exclude zero and
+        a relative slowdown of at least ``min_effect``.
+        """
+        runs = self.load()
+        current = runs[runs["run_id"] == self.run_id]
+        history = runs[runs["run_id"] != self.run_id]
+        if current.empty or history.empty:
+            return []
+
+        regressions: list[Regression] = []
+        for key, group in current.groupby(KEY):
+            browser, network, page, metric = key
+            past = history[
+                (history["browser"] == browser)
+                & (history["network"] == network)
+                & (history["page"] == page)
+                & (history["metric"] == metric)
+            ]
+            recent_runs = (
+                past.groupby("run_id")["timestamp"].max().sort_values().tail(window).index
+            )
+            baseline = past[past["run_id"].isin(recent_runs)]["value"].tolist()
+            values = group["value"].tolist()
+            if len(baseline) < min_samples or not values:
+                continue
+
+            base_median = percentile(baseline, 50)
+            cur_median = percentile(values, 50)
+            if cur_median < base_median * (1 + min_effect):
+                continue
+            lo, hi = median_shift_ci(baseline, values, confidence=confidence)
+            if lo > 0:
+                regressions.append(
+                    Regression(
+                        browser=browser,
+                        network=network,
+                        page=page,
+                        metric=metric,
+                        baseline_median=base_median,
+                        current_median=cur_median,
+                        shift_ci=(lo, hi),
+                        baseline_runs=len(recent_runs),
+                    )
+                )
+        return regressions
+
+
+_active: PerfHistory | None = None
+
+
+def activate(history: PerfHistory | None) -> None:
+    global _active
+    _active = history
+
+
+def active() -> PerfHistory | None:
+    return _active
+
+
+def record(metric: str, value: float | None, *, page: str, network: str = "none") -> None:
+    """Append a metric to the session history; a no-op when history is disabled."""
+    history = _active
+    if history is not None and value is not None:
+        history.record(metric, value, page=page, network=network)
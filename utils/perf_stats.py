@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]."""
+    if not samples:
+        raise ValueError("percentile of empty sample")
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    rank = (len(ordered) - 1) * (q / 100.0)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return float(ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower))
+
+
+def bootstrap_ci(
+    samples: Sequence[float],
+    statistic: Callable[[Sequence[float]], float],
+    *,
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: int = 0,
+) -> tuple[float, float]:
+    """Percentile bootstrap confidence interval for ``statistic`` over ``samples``."""
+    if len(samples) < 2:
+        value = statistic(samples)
+        return value, value
+    rng = random.Random(seed)
+    n = len(samples)
+    estimates = sorted(statistic([samples[rng.randrange(n)] for _ in range(n)]) for _ in range(resamples))
+    alpha = (1.0 - confidence) / 2.0
+    return percentile(estimates, alpha * 100), percentile(estimates, (1 - alpha) * 100)
+
+
+@dataclass(frozen=True)
+class SampleSummary:
+    name: str
+    n: int
+    median: float
+    p90: float
+    p99: float
+    median_ci: tuple[float, float]
+    p90_ci: tuple[float, float]
+
+    def clearly_exceeds(self, threshold: float, *, stat: str = "median") -> bool:
+        """True only when the whole confidence interval lies above ``threshold``."""
+        lower, _upper = self.median_ci if stat == "median" else self.p90_ci
+        return lower > threshold
+
+    def describe(self, unit: str = "") -> str:
+        lo, hi = self.median_ci
+        return (
+            f"{self.name}: median {self.median:.3f}{unit} "
+            f"[{lo:.3f}, {hi:.3f}] p90 {self.p90:.3f}{unit} p99 {self.p99:.3f}{unit} (n={self.n})"
+        )
+
+
+def summarize(name: str, samples: Sequence[float], *, confidence: float = 0.95, seed: int = 0) -> SampleSummary:
+    values = [float(s) for s in samples]
+    return SampleSummary(
+        name=name,
+        n=len(values),
+        median=percentile(values, 50),
+        p90=percentile(values, 90),
+        p99=percentile(values, 99),
+        median_ci=bootstrap_ci(values, lambda xs: percentile(xs, 50), confidence=confidence, seed=seed),
+        p90_ci=bootstrap_ci(values, lambda xs: percentile(xs, 90), confidence=confidence, seed=seed),
+    )
+
+
+def median_shift_ci(
+    baseline: Sequence[float],
+    current: Sequence[float],
+    *,
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: int = 0,
+) -> tuple[float, float]:
+    """Bootstrap CI for median(current) - median(baseline)."""
+    rng = random.Random(seed)
+    nb, nc = len(baseline), len(current)
+    shifts = sorted(
+        percentile([current[rng.randrange(nc)] for _ in range(nc)], 50)
+        - percentile([baseline[rng.randrange(nb)] for _ in range(nb)], 50)
+        for _ in range(resamples)
+    )
+    alpha = (1.0 - confidence) / 2.0
+    return percentile(shifts, alpha * 100), percentile(shifts, (1 - alpha) * 100)
@@ -0,0 +1,299 @@
+"""Per-host adaptive rate limiting with Retry-After aware retries.
+
+Every host gets a token bucket. Its refill rate adapts AIMD-style: each
+successful response adds ``increase / rate`` req/s (roughly +``increase`` req/s
+per second of traffic), and a throttling response (429, 503, or a WAF's 403)
+multiplies it by ``decrease``, at most once per ``decrease_cooldown_s`` so a
+burst of rejections counts as one signal. ``Retry-After`` (delta-seconds or an
+HTTP date) puts the bucket into debt, which pauses every caller for that host.
+
+Throttled idempotent requests are retried with full-jitter exponential backoff,
+or after ``Retry-After`` when the server sent one. 403 is retried once: it is as
+often a real "forbidden" as a WAF. POSTs are never replayed.
+
+``RateLimitedSession`` applies all of this to requests (``utils.web_audit``,
+``utils.jira_client``). The asyncio load engine paces with ``wait_async`` and
+reports statuses with ``feedback`` but never retries, so its latencies stay honest.
+Replayed traffic (``--http-replay``) is not limited. Response-time measurements
+subtract ``thread_waited_s()`` so pacing and backoff do not count as latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+THROTTLE_STATUSES = frozenset({403, 429, 503})
+RETRY_STATUSES = frozenset({429, 503})
+# A throttled POST may still have been applied (e.g. a gateway 503 after Jira created the issue).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def parse_retry_after(value: str | None, *, now: float | None = None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class TokenBucket:
+    """Token bucket with reservations: callers take a token now and sleep off any debt."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        *,
+        min_rate: float,
+        max_rate: float,
+        increase: float,
+        decrease: float,
+        decrease_cooldown_s: float,
+        clock=time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_cooldown_s = decrease_cooldown_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+        self._last_decrease = float("-inf")
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must wait before sending."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1.0
+            return max(0.0, -self._tokens / self.rate)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after_s: float | None) -> bool:
+        """Back off; returns False when this was folded into a recent decrease."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            decreased = now - self._last_decrease >= self.decrease_cooldown_s
+            if decreased:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            if retry_after_s:
+                # Debt of retry_after_s worth of tokens: nobody sends before it elapses.
+                self._tokens = min(self._tokens, 0.0) - retry_after_s * self.rate
+            return decreased
+
+
+@dataclass
+class LimiterStats:
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    waited_s: float = 0.0
+
+    def describe(self) -> str:
+        return (
+            f"requests={self.requests} throttled={self.throttled} "
+            f"retries={self.retries} waited={self.waited_s:.1f}s"
+        )
+
+
+class RateLimiter:
+    """Registry of per-host buckets plus the retry policy; see ``configure`` for the knobs."""
+
+    def __init__(self, **settings):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+        self.stats = LimiterStats()
+        self.configure(**settings)
+
+    def configure(
+        self,
+        *,
+        rate: float = 8.0,
+        burst: float | None = None,
+        min_rate: float = 0.2,
+        max_rate: float = 50.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        decrease_cooldown_s: float = 1.0,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_cap_s: float = 30.0,
+        max_retry_after_s: float = 60.0,
+    ) -> None:
+        """(Re)configure; existing per-host buckets are dropped. ``rate=0`` disables limiting."""
+        with self._lock:
+            self.rate = float(rate)
+            self.burst = float(burst) if burst else max(1.0, self.rate)
+            self.min_rate = min(min_rate, self.rate) if self.rate > 0 else min_rate
+            self.max_rate = max(max_rate, self.rate)
+            self.increase = increase
+            self.decrease = decrease
+            self.decrease_cooldown_s = decrease_cooldown_s
+            self.max_retries = max(0, int(max_retries))
+            self.backoff_base_s = backoff_base_s
+            self.backoff_cap_s = backoff_cap_s
+            self.max_retry_after_s = max_retry_after_s
+            self._buckets.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = _host(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(
+                    self.rate,
+                    self.burst,
+                    min_rate=self.min_rate,
+                    max_rate=self.max_rate,
+                    increase=self.increase,
+                    decrease=self.decrease,
+                    decrease_cooldown_s=self.decrease_cooldown_s,
+                )
+            return bucket
+
+    def rates(self) -> dict[str, float]:
+        """Current adapted rate (req/s) per host."""
+        with self._lock:
+            return {host: round(bucket.rate, 2) for host, bucket in self._buckets.items()}
+
+    def _reserve(self, url: str) -> float:
+        delay = self.bucket(url).reserve() if self.enabled else 0.0
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.waited_s += delay
+        return delay
+
+    def wait(self, url: str) -> float:
+        delay = self._reserve(url)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url: str) -> None:
+        delay = self._reserve(url)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def feedback(self, url: str, status: int, retry_after: str | None = None) -> bool:
+        """Adapt the host's rate to a response; True when it was a throttling response."""
+        if not self.enabled:
+            return status in THROTTLE_STATUSES
+        bucket = self.bucket(url)
+        if status not in THROTTLE_STATUSES:
+            bucket.on_success()
+            return False
+        wait_s = parse_retry_after(retry_after)
+        bucket.on_throttle(min(wait_s, self.max_retry_after_s) if wait_s is not None else None)
+        with self._lock:
+            self.stats.throttled += 1
+        return True
+
+    def should_retry(self, status: int, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return status in RETRY_STATUSES or (status == 403 and attempt == 0)
+
+    def retry_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Retry-After when given (capped), else full-jitter exponential backoff."""
+        wait_s = parse_retry_after(retry_after)
+        if wait_s is not None:
+            return min(wait_s, self.max_retry_after_s)
+        return random.uniform(0.0, min(self.backoff_cap_s, self.backoff_base_s * (2 ** attempt)))
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.stats.retries += 1
+
+
+# Shared by every session in the process; conftest configures it from the command line.
+LIMITER = RateLimiter()
+
+_thread_waits = threading.local()
+
+
+def thread_waited_s() -> float:
+    """Seconds the calling thread has spent in RateLimitedSession pacing and retry backoff.
+
+    A running total: timings around a request subtract the difference, so they
+    measure the server rather than the limiter.
+    """
+    return getattr(_thread_waits, "total", 0.0)
+
+
+def _add_thread_wait(seconds: float) -> None:
+    _thread_waits.total = thread_waited_s() + seconds
+
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that paces each request (and redirect hop) through a RateLimiter.
+
+    Only ``retry_methods`` (idempotent ones by default) are retried when throttled;
+    other requests are paced and adapt the rate but return the throttled response.
+    """
+
+    def __init__(self, limiter: RateLimiter | None = None, *, retry_methods: frozenset[str] = IDEMPOTENT_METHODS):
+        super().__init__()
+        self.limiter = limiter or LIMITER
+        self.retry_methods = frozenset(m.upper() for m in retry_methods)
+
+    def _replayed(self, url: str) -> bool:
+        from utils import http_archive
+
+        try:
+            return isinstance(self.get_adapter(url), http_archive.ReplayAdapter)
+        except requests.exceptions.InvalidSchema:
+            return False
+
+    def send(self, request, **kwargs):
+        limiter = self.limiter
+        if not limiter.enabled or self._replayed(request.url):
+            return super().send(request, **kwargs)
+        attempt = 0
+        while True:
+            _add_thread_wait(limiter.wait(request.url))
+            resp = super().send(request, **kwargs)
+            retry_after = resp.headers.get("Retry-After")
+            if not limiter.feedback(request.url, resp.status_code, retry_after):
+                return resp
+            if request.method not in self.retry_methods or not limiter.should_retry(resp.status_code, attempt):
+                return resp
+            delay = limiter.retry_delay(attempt, retry_after)
+            resp.close()
+            limiter.record_retry()
+            attempt += 1
+            time.sleep(delay)
+            _add_thread_wait(delay)
+
@@ -1,17 +1,99 @@
+import html
 import json
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 
 
+_STYLE = """    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+        .header { background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }
+        .summary { background: white; padding: 20px; margin: 20px 0; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        .metrics { display: flex; justify-content: space-around; margin: 20px 0; }
+        .metric { text-align: center; padding: 15px; background: #ecf0f1; border-radius: 5px; min-width: 150px; }
+        .metric-value { font-size: 32px; font-weight: bold; color: #2c3e50; }
+        .metric-label { font-size: 14px; color: #7f8c8d; margin-top: 5px; }
+        .passed { color: #27ae60; }
+        .failed { color: #e74c3c; }
+        .skipped { color: #f39c12; }
+        table { width: 100%; background: white; border-collapse: collapse; border-radius: 5px; overflow: hidden; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        th { background: #34495e; color: white; padding: 12px; text-align: left; }
+        td { padding: 10px; border-bottom: 1px solid #ecf0f1; }
+        tr:hover { background: #f8f9fa; }
+        .status-badge { padding: 5px 10px; border-radius: 3px; font-weight: bold; font-size: 12px; }
+        .badge-passed { background: #d4edda; color: #155724; }
+        .badge-failed { background: #f8d7da; color: #721c24; }
+        .badge-skipped { background: #fff3cd; color: #856404; }
+        .pager { margin: 15px 0; }
+        .pager a, .pager span { margin-right: 8px; }
+    </style>
+"""
+
+def _html_head(title):
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+{_STYLE}</head>
+<body>
+"""
+
+_TABLE_HEAD = """    <div class="summary">
+        <h2>Test Results ({first}-{last} of {total})</h2>
+{pager}
+        <table>
+            <thead>
+                <tr>
+                    <th>Test Case</th>
+                    <th>Status</th>
+                    <th>Duration</th>
+                    <th>Error</th>
+                </tr>
+            </thead>
+            <tbody>
+"""
+
+_TABLE_TAIL = """            </tbody>
+        </table>
+{pager}
+    </div>
+</body>
+</html>
+"""
+
+
 class ReportGenerator:
-    """Generate detailed test execution reports"""
+    """Generate detailed test execution reports
+
+    Results are appended to a JSONL file as they arrive (flushed per line, so a
+    crash keeps everything recorded so far) and summarized by running counters;
+    nothing is held in memory per result. JSON and HTML reports are written by
+    streaming the JSONL back, the HTML split into pages of ``page_size`` rows.
+    """
     
-    def __init__(self, output_dir="reports"):
+    def __init__(self, output_dir="reports", page_size=500, results_path=None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.test_results = []
+        self.page_size = max(1, int(page_size))
+        self.results_path = Path(results_path) if results_path else (
+            self.output_dir / f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+        )
         self.start_time = None
         self.end_time = None
+        self.total = 0
+        self.status_counts = Counter()
+        self.total_duration = 0.0
+        self._stream = None
+    
+    @classmethod
+    def resume(cls, results_path, output_dir=None, page_size=500):
+        """Reopen an existing results JSONL (e.g. after a crash) and rebuild the counters"""
+        results_path = Path(results_path)
+        report = cls(output_dir or results_path.parent, page_size=page_size, results_path=results_path)
+        for result in report.iter_results():
+            report._count(result)
+        return report
     
     def start_test_run(self):
         """Mark start of test execution"""
@@ -20,85 +102,163 @@ class ReportGenerator:
     def end_test_run(self):
         """Mark end of test execution"""
         self.end_time = datetime.now()
+        self.close()
+    
+    def close(self):
+        """Close the results stream (reopened on the next add)"""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
     
     def add_test_result(self, test_name, status, duration, error=None, screenshot=None):
         """Add a test result"""
-        self.test_results.append({
+        result = {
             'test_name': test_name,
             'status': status,
             'duration': duration,
             'error': error,
             'screenshot': screenshot,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        if self._stream is None:
+            self._stream = open(self.results_path, 'a', encoding='utf-8', buffering=1)
+        self._stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._count(result)
+    
+    def _count(self, result):
+        self.total += 1
+        self.status_counts[result['status']] += 1
+        self.total_duration += result['duration'] or 0.0
+    
+    def iter_results(self):
+        """Yield recorded results in order, streaming from the JSONL file"""
+        if self._stream is not None:
+            self._stream.flush()
+        if not self.results_path.exists():
+            return
+        with open(self.results_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+    
+    @property
+    def test_results(self):
+        """All results as a list (loads the whole file; prefer iter_results for large runs)"""
+        return list(self.iter_results())
     
     def generate_summary(self):
         """Generate test summary"""
-        total = len(self.test_results)
-        passed = len([r for r in self.test_results if r['status'] == 'PASSED'])
-        failed = len([r for r in self.test_results if r['status'] == 'FAILED'])
-        skipped = len([r for r in self.test_results if r['status'] == 'SKIPPED'])
-        
-        total_duration = sum(r['duration'] for r in self.test_results)
+        total = self.total
+        passed = self.status_counts['PASSED']
         
         return {
             'total_tests': total,
             'passed': passed,
-            'failed': failed,
-            'skipped': skipped,
+            'failed': self.status_counts['FAILED'],
+            'skipped': self.status_counts['SKIPPED'],
             'pass_rate': f"{(passed/total*100):.2f}%" if total > 0 else "0%",
-            'total_duration': f"{total_duration:.2f}s",
+            'total_duration': f"{self.total_duration:.2f}s",
             'start_time': self.start_time.isoformat() if self.start_time else None,
             'end_time': self.end_time.isoformat() if self.end_time else None
         }
     
     def save_json_report(self):
-        """Save report as JSON"""
-        report = {
-            'summary': self.generate_summary(),
-            'test_results': self.test_results
-        }
-        
+        """Save report as JSON (results streamed from the JSONL file)"""
         filename = f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         filepath = self.output_dir / filename
         
-        with open(filepath, 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write('{\n  "summary": ')
+            f.write(json.dumps(self.generate_summary(), indent=2).replace("\n", "\n  "))
+            f.write(',\n  "test_results": [')
+            for i, result in enumerate(self.iter_results()):
+                f.write(("," if i else "") + "\n    " + json.dumps(result))
+            f.write("\n  ]\n}\n")
         
         return filepath
     
     def generate_html_report(self):
-        """Generate HTML report"""
+        """Generate HTML report
+
+        The first page holds the summary and the first ``page_size`` rows; the
+        remaining rows go to ``<name>_pages/page-NNNN.html``, linked by a pager.
+        Rows are written as they are read, never accumulated into one string.
+        """
         summary = self.generate_summary()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filepath = self.output_dir / f"custom_report_{stamp}.html"
+        pages_dir = self.output_dir / f"custom_report_{stamp}_pages"
+        n_pages = max(1, -(-self.total // self.page_size))
         
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Test Execution Report</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }}
-        .header {{ background: #2c3e50; color: white; padding: 20px; border-radius: 5px; }}
-        .summary {{ background: white; padding: 20px; margin: 20px 0; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-        .metrics {{ display: flex; justify-content: space-around; margin: 20px 0; }}
-        .metric {{ text-align: center; padding: 15px; background: #ecf0f1; border-radius: 5px; min-width: 150px; }}
-        .metric-value {{ font-size: 32px; font-weight: bold; color: #2c3e50; }}
-        .metric-label {{ font-size: 14px; color: #7f8c8d; margin-top: 5px; }}
-        .passed {{ color: #27ae60; }}
-        .failed {{ color: #e74c3c; }}
-        .skipped {{ color: #f39c12; }}
-        table {{ width: 100%; background: white; border-collapse: collapse; border-radius: 5px; overflow: hidden; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-        th {{ background: #34495e; color: white; padding: 12px; text-align: left; }}
-        td {{ padding: 10px; border-bottom: 1px solid #ecf0f1; }}
-        tr:hover {{ background: #f8f9fa; }}
-        .status-badge {{ padding: 5px 10px; border-radius: 3px; font-weight: bold; font-size: 12px; }}
-        .badge-passed {{ background: #d4edda; color: #155724; }}
-        .badge-failed {{ background: #f8d7da; color: #721c24; }}
-        .badge-skipped {{ background: #fff3cd; color: #856404; }}
-    </style>
-</head>
-<body>
-    <div class="header">
+        def page_path(n):
+            return filepath if n == 1 else pages_dir / f"page-{n:04d}.html"
+        
+        def link(from_page, to_page):
+            if to_page == 1:
+                return f"../{filepath.name}" if from_page != 1 else filepath.name
+            return f"{pages_dir.name}/page-{to_page:04d}.html" if from_page == 1 else f"page-{to_page:04d}.html"
+        
+        def pager(n):
+            if n_pages == 1:
+                return ""
+            parts = []
+            if n > 1:
+                parts.append(f'<a href="{link(n, n - 1)}">&laquo; prev</a>')
+            for m in sorted({1, n - 2, n - 1, n, n + 1, n + 2, n_pages}):
+                if 1 <= m <= n_pages:
+                    parts.append(f"<span>{m}</span>" if m == n else f'<a href="{link(n, m)}">{m}</a>')
+            if n < n_pages:
+                parts.append(f'<a href="{link(n, n + 1)}">next &raquo;</a>')
+            return f'        <div class="pager">{" ".join(parts)}</div>'
+        
+        def open_page(n):
+            path = page_path(n)
+            path.parent.mkdir(exist_ok=True)
+            f = open(path, 'w', encoding='utf-8')
+            f.write(_html_head("Test Execution Report" + (f" (page {n})" if n > 1 else "")))
+            if n == 1:
+                f.write(self._summary_html(summary))
+            first = (n - 1) * self.page_size + 1
+            f.write(_TABLE_HEAD.format(
+                first=min(first, self.total), last=min(n * self.page_size, self.total), total=self.total, pager=pager(n)
+            ))
+            return f
+        
+        page = 1
+        f = open_page(page)
+        try:
+            for i, result in enumerate(self.iter_results()):
+                if i and i % self.page_size == 0:
+                    f.write(_TABLE_TAIL.format(pager=pager(page)))
+                    f.close()
+                    page += 1
+                    f = open_page(page)
+                f.write(self._row_html(result))
+            f.write(_TABLE_TAIL.format(pager=pager(page)))
+        finally:
+            f.close()
+        
+        return filepath
+    
+    @staticmethod
+    def _row_html(result):
+        status = str(result['status'])
+        error_msg = html.escape(result['error'][:100]) if result['error'] else "-"
+        duration = f"{result['duration']:.2f}s" if result['duration'] is not None else "-"
+        return f"""                <tr>
+                    <td>{html.escape(str(result['test_name']))}</td>
+                    <td><span class="status-badge badge-{html.escape(status.lower())}">{html.escape(status)}</span></td>
+                    <td>{duration}</td>
+                    <td>{error_msg}</td>
+                </tr>
+"""
+    
+    @staticmethod
+    def _summary_html(summary):
+        return f"""    <div class="header">
         <h1>🧪 Automated Test Execution Report</h1>
         <p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
     </div>
@@ -129,48 +289,7 @@ class ReportGenerator:
         </div>
     </div>
     
-    <div class="summary">
-        <h2>Test Results</h2>
-        <table>
-            <thead>
-                <tr>
-                    <th>Test Case</th>
-                    <th>Status</th>
-                    <th>Duration</th>
-                    <th>Error</th>
-                </tr>
-            </thead>
-            <tbody>
-"""
-        
-        for result in self.test_results:
-            status_class = f"badge-{result['status'].lower()}"
-            error_msg = result['error'][:100] if result['error'] else "-"
-            
-            html += f"""
-                <tr>
-                    <td>{result['test_name']}</td>
-                    <td><span class="status-badge {status_class}">{result['status']}</span></td>
-                    <td>{result['duration']:.2f}s</td>
-                    <td>{error_msg}</td>
-                </tr>
-"""
-        
-        html += """
-            </tbody>
-        </table>
-    </div>
-</body>
-</html>
 """
-        
-        filename = f"custom_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        filepath = self.output_dir / filename
-        
-        with open(filepath, 'w') as f:
-            f.write(html)
-        
-        return filepath
 
 
 # ============================================
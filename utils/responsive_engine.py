@@ -0,0 +1,207 @@
+"""Multi-viewport responsive checks using CDP device emulation in parallel tabs.
+
+Each (viewport, URL) job gets its own tab with ``Emulation.setDeviceMetricsOverride``
+(and touch / media emulation where relevant). A batch of tabs navigates at once
+via ``Page.navigate``, so the pages load concurrently; results are then collected
+tab by tab with a single batched probe script and a CDP screenshot.
+
+Browsers without CDP fall back to one viewport at a time via ``set_window_size``.
+"""
+from __future__ import annotations
+
+import base64
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from pages.base_page import BasePage
+
+TAP_TARGET_MIN_PX = 44
+
+# Horizontal scroll, tap targets, code-block overflow, root colors and (optionally)
+# horizontal scroll under CSS zoom, in one round trip.
+PROBE_SCRIPT = """
+var zoom = arguments[0], minTap = arguments[1];
+function hasHScroll() { return document.documentElement.scrollWidth > window.innerWidth; }
+var out = {horizontalScroll: hasHScroll(), tapTargetOk: false, largestTapTarget: [0, 0]};
+var targets = document.querySelectorAll('a, button, [role=button], input[type=button], input[type=submit]');
+for (var i = 0; i < targets.length; i++) {
+  var r = targets[i].getBoundingClientRect();
+  if (r.width >= minTap && r.height >= minTap) out.tapTargetOk = true;
+  if (r.width * r.height > out.largestTapTarget[0] * out.largestTapTarget[1]) out.largestTapTarget = [r.width, r.height];
+}
+out.codeOverflow = Array.prototype.some.call(
+  document.querySelectorAll('pre, code, .code'),
+  function(b) { return b.scrollWidth > b.clientWidth; }
+);
+var root = getComputedStyle(document.documentElement);
+out.colors = {bg: root.backgroundColor, fg: root.color};
+out.zoomHorizontalScroll = null;
+if (zoom && zoom !== 1 && document.body) {
+  var previous = document.body.style.zoom;
+  document.body.style.zoom = Math.round(zoom * 100) + '%';
+  out.zoomHorizontalScroll = hasHScroll();
+  document.body.style.zoom = previous;
+}
+return out;
+"""
+
+
+@dataclass(frozen=True)
+class Viewport:
+    case_id: str
+    width: int
+    height: int
+    device: str
+    zoom: float = 1.0
+    color_scheme: str | None = None
+
+    @property
+    def mobile(self) -> bool:
+        return self.width < 768
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    viewport: Viewport
+    url: str
+    ready: bool
+    horizontal_scroll: bool
+    tap_target_ok: bool
+    largest_tap_target: tuple[float, float]
+    code_overflow: bool
+    zoom_horizontal_scroll: bool | None
+    colors: dict
+    screenshot: Path | None
+    error: str | None = None
+
+
+def _supports_cdp(driver) -> bool:
+    try:
+        driver.execute_cdp_cmd("Browser.getVersion", {})
+        return True
+    except Exception:
+        return False
+
+
+class ResponsiveEngine:
+    def __init__(self, driver, *, max_tabs: int = 4, screenshot_dir: Path | None = None, ready_timeout_s: float = 15.0):
+        self.driver = driver
+        self.max_tabs = max(1, max_tabs)
+        self.screenshot_dir = screenshot_dir
+        self.ready_timeout_s = ready_timeout_s
+        self.cdp = _supports_cdp(driver)
+
+    def run(self, jobs: list[tuple[Viewport, str]]) -> list[ProbeResult]:
+        """Probe every (viewport, url) job; results are returned in job order."""
+        if not self.cdp:
+            return [self._run_serial(viewport, url) for viewport, url in jobs]
+
+        results: list[ProbeResult] = []
+        origin = self.driver.current_window_handle
+        try:
+            for start in range(0, len(jobs), self.max_tabs):
+                batch = jobs[start:start + self.max_tabs]
+                handles = [self._open_tab(viewport, url) for viewport, url in batch]
+                for (viewport, url), handle in zip(batch, handles):
+                    self.driver.switch_to.window(handle)
+                    try:
+                        results.append(self._collect(viewport, url))
+                    finally:
+                        self.driver.close()
+        finally:
+            self.driver.switch_to.window(origin)
+        return results
+
+    def _open_tab(self, viewport: Viewport, url: str) -> str:
+        driver = self.driver
+        driver.switch_to.new_window("tab")
+        driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+            "width": viewport.width,
+            "height": viewport.height,
+            "deviceScaleFactor": 0,
+            "mobile": viewport.mobile,
+        })
+        if viewport.mobile:
+            driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": True, "maxTouchPoints": 5})
+        if viewport.color_scheme:
+            driver.execute_cdp_cmd("Emulation.setEmulatedMedia", {
+                "features": [{"name": "prefers-color-scheme", "value": viewport.color_scheme}],
+            })
+        # Page.navigate returns once the navigation commits, not on load, so tabs load side by side.
+        driver.execute_cdp_cmd("Page.navigate", {"url": url})
+        return driver.current_window_handle
+
+    def _wait_ready(self) -> bool:
+        deadline = time.monotonic() + self.ready_timeout_s
+        while time.monotonic() < deadline:
+            try:
+                if self.driver.execute_script("return document.readyState") == "complete":
+                    break
+            except Exception:
+                pass
+            time.sleep(0.05)
+        else:
+            return False
+        return BasePage(self.driver).wait_for_dom_quiet(quiet_ms=300, timeout=5).satisfied
+
+    def _collect(self, viewport: Viewport, url: str) -> ProbeResult:
+        ready = self._wait_ready()
+        screenshot = None
+        if self.screenshot_dir is not None:
+            try:
+                shot = self.driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "png"})
+                screenshot = self._write_screenshot(viewport, url, base64.b64decode(shot["data"]))
+            except Exception:
+                screenshot = None
+        return self._probe(viewport, url, ready, screenshot)
+
+    def _run_serial(self, viewport: Viewport, url: str) -> ProbeResult:
+        driver = self.driver
+        try:
+            driver.set_window_size(viewport.width, viewport.height)
+        except Exception:
+            pass
+        driver.get(url)
+        ready = BasePage(driver).wait_until_ready(timeout=self.ready_timeout_s).satisfied
+        screenshot = None
+        if self.screenshot_dir is not None:
+            path = self._screenshot_path(viewport, url)
+            try:
+                if driver.save_screenshot(str(path)):
+                    screenshot = path
+            except Exception:
+                screenshot = None
+        return self._probe(viewport, url, ready, screenshot)
+
+    def _probe(self, viewport: Viewport, url: str, ready: bool, screenshot: Path | None) -> ProbeResult:
+        try:
+            data = self.driver.execute_script(PROBE_SCRIPT, viewport.zoom, TAP_TARGET_MIN_PX) or {}
+            error = None
+        except Exception as e:
+            data, error = {}, f"{type(e).__name__}: {e}"
+        largest = data.get("largestTapTarget") or [0, 0]
+        return ProbeResult(
+            viewport=viewport,
+            url=url,
+            ready=ready,
+            horizontal_scroll=bool(data.get("horizontalScroll")),
+            tap_target_ok=bool(data.get("tapTargetOk")),
+            largest_tap_target=(float(largest[0]), float(largest[1])),
+            code_overflow=bool(data.get("codeOverflow")),
+            zoom_horizontal_scroll=data.get("zoomHorizontalScroll"),
+            colors=data.get("colors") or {},
+            screenshot=screenshot,
+            error=error,
+        )
+
+    def _screenshot_path(self, viewport: Viewport, url: str) -> Path:
+        slug = urlsplit(url).path.strip("/").replace("/", "_") or "home"
+        self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+        return self.screenshot_dir / f"{viewport.case_id}_{viewport.width}x{viewport.height}_{slug}.png"
+
+    def _write_screenshot(self, viewport: Viewport, url: str, png: bytes) -> Path:
+        path = self._screenshot_path(viewport, url)
+        path.write_bytes(png)
+        return path
@@ -0,0 +1,540 @@
+"""Bounded crawler for site-wide link integrity.
+
+The frontier is seeded with the base URL, the ``Sitemap:`` entries of
+robots.txt and ``/sitemap.xml`` (sitemap indexes are followed). Internal pages
+are expanded with an extractor returning the ``collect_dom_urls`` dict shape
+(by default ``collect_page_urls``, which parses the raw HTML without a browser
+and calls ``render`` only for pages that need one); every discovered URL (links,
+scripts, stylesheets, images) is checked once with ``head_or_get``. With the
+default extractor an internal page is fetched once: the check is a GET whose
+body is parsed. Only internal URLs are expanded; external ones are checked when
+``check_external`` is set.
+
+Memory stays bounded however large the site is:
+
+- seen URLs live in a fixed-size Bloom filter (a false positive skips a URL,
+  with probability ``seen_error_rate``);
+- the frontier keeps ``max_in_memory`` entries and spills the rest to a JSONL
+  file next to the checkpoint;
+- only broken results are kept; everything else is counted.
+
+Fetches run on an asyncio scheduler over worker threads, so the shared
+requests session (keep-alive, URL cache, validators, HTTP archive) is reused.
+Extraction has its own concurrency limit: 8 for the default extractor, 1 when
+the caller passes ``extract`` or ``render`` (typically driving a single WebDriver)
+unless ``extract_workers`` says otherwise. ``max_depth``, ``max_pages``, ``max_urls`` and
+``host_budget`` bound the work. The crawl state is checkpointed to disk
+periodically and when the crawl stops; ``resume=True`` picks it up.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from utils.rate_limiter import thread_waited_s
+from utils.web_audit import (
+    UrlCheckResult,
+    bytes_transferred,
+    collect_page_urls,
+    get_session,
+    head_or_get,
+    is_http_url,
+    is_internal_url,
+)
+
+Extractor = Callable[[str], "dict[str, list[str]]"]
+
+USER_AGENT = "*"
+CHECKPOINT_VERSION = 1
+MAX_SITEMAPS = 50
+# Never worth rendering: checked with head_or_get only.
+_NON_PAGE_SUFFIXES = (
+    ".pdf", ".zip", ".gz", ".tgz", ".deb", ".rpm", ".tar", ".exe", ".dmg", ".csv", ".json", ".xml",
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".css", ".js", ".mp4", ".webm",
+)
+
+
+def canonical_url(url: str) -> str:
+    """Seen-set key: no fragment, lower-case scheme/host, default port dropped, '/' for an empty path."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set (double hashing over one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4, *, bits: bytes | None = None):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Add ``key``; False when it was (probably) already present."""
+        added = False
+        for p in self._positions(key):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def state(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": base64.b64encode(gzip.compress(bytes(self.bits), mtime=0)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "BloomFilter":
+        bloom = cls(state["capacity"], state["error_rate"], bits=gzip.decompress(base64.b64decode(state["bits"])))
+        bloom.count = int(state.get("count", 0))
+        return bloom
+
+
+@dataclass(frozen=True)
+class FrontierItem:
+    url: str
+    depth: int
+    referrer: str | None
+    page: bool  # expand it (internal link) or only check it (resource / external)
+
+
+class Frontier:
+    """FIFO queue holding at most ``max_in_memory`` items; the rest waits in a JSONL spill file."""
+
+    def __init__(self, spill_path: Path, *, max_in_memory: int = 10_000, spill_offset: int = 0):
+        self.spill_path = Path(spill_path)
+        self.max_in_memory = max(1, max_in_memory)
+        self._memory: deque[FrontierItem] = deque()
+        self._spill_offset = spill_offset
+        self._spilled = self._count_spilled()
+
+    def _count_spilled(self) -> int:
+        try:
+            with open(self.spill_path, "rb") as f:
+                f.seek(self._spill_offset)
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self) -> int:
+        return len(self._memory) + self._spilled
+
+    def push(self, item: FrontierItem) -> None:
+        # Once anything is spilled, new items queue behind it to keep FIFO (= breadth-first) order.
+        if self._spilled or len(self._memory) >= self.max_in_memory:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(item)) + "\n")
+            self._spilled += 1
+        else:
+            self._memory.append(item)
+
+    def push_front(self, item: FrontierItem) -> None:
+        self._memory.appendleft(item)
+
+    def pop(self) -> FrontierItem | None:
+        if not self._memory and self._spilled:
+            self._refill()
+        return self._memory.popleft() if self._memory else None
+
+    def _refill(self) -> None:
+        with open(self.spill_path, "rb") as f:
+            f.seek(self._spill_offset)
+            while len(self._memory) < self.max_in_memory:
+                line = f.readline()
+                if not line:
+                    break
+                self._memory.append(FrontierItem(**json.loads(line)))
+                self._spilled -= 1
+            self._spill_offset = f.tell()
+        if not self._spilled:
+            self.spill_path.unlink(missing_ok=True)
+            self._spill_offset = 0
+
+    def state(self) -> dict:
+        return {"memory": [asdict(item) for item in self._memory], "spill_offset": self._spill_offset}
+
+    @classmethod
+    def from_state(cls, spill_path: Path, state: dict, *, max_in_memory: int) -> "Frontier":
+        frontier = cls(spill_path, max_in_memory=max_in_memory, spill_offset=int(state.get("spill_offset", 0)))
+        frontier._memory.extend(FrontierItem(**item) for item in state.get("memory", []))
+        return frontier
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    checked: int = 0
+    broken: int = 0
+    robots_blocked: int = 0
+    over_budget: int = 0
+    errors: int = 0
+    sitemap_urls: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"pages={self.pages} checked={self.checked} broken={self.broken} "
+            f"robots_blocked={self.robots_blocked} over_budget={self.over_budget} "
+            f"extract_errors={self.errors} sitemap_urls={self.sitemap_urls}"
+        )
+
+
+@dataclass(frozen=True)
+class BrokenLink:
+    result: UrlCheckResult
+    referrer: str | None
+
+
+@dataclass
+class CrawlResult:
+    stats: CrawlStats
+    broken: list[BrokenLink]
+    complete: bool  # False when a budget stopped the crawl with URLs still queued
+    elapsed_s: float
+    hosts: dict[str, int] = field(default_factory=dict)
+
+
+def _looks_like_page(url: str, resp: requests.Response | None) -> bool:
+    if resp is not None:
+        content_type = resp.headers.get("Content-Type", "")
+        if content_type:
+            return "html" in content_type.lower()
+    return not urlsplit(url).path.lower().endswith(_NON_PAGE_SUFFIXES)
+
+
+def _sitemap_locs(body: bytes) -> tuple[list[str], list[str]]:
+    """(page URLs, nested sitemap URLs) from a urlset or sitemapindex document."""
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    pages, sitemaps = [], []
+    try:
+        for _event, elem in ET.iterparse(io.BytesIO(body), events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "loc" and elem.text:
+                pages.append(elem.text.strip())
+            elif tag == "sitemap":
+                # <sitemap><loc> entries of an index point at further sitemaps.
+                if pages:
+                    sitemaps.append(pages.pop())
+            if tag in ("url", "sitemap"):
+                elem.clear()
+    except ET.ParseError:
+        pass
+    return pages, sitemaps
+
+
+class SiteCrawler:
+    def __init__(
+        self,
+        base_url: str,
+        extract: Extractor | None = None,
+        *,
+        render: Extractor | None = None,
+        max_depth: int = 3,
+        max_pages: int = 500,
+        max_urls: int = 5000,
+        host_budget: int = 2000,
+        check_external: bool = False,
+        workers: int = 8,
+        extract_workers: int | None = None,
+        timeout: float = 10.0,
+        use_robots: bool = True,
+        use_sitemaps: bool = True,
+        seen_capacity: int = 100_000,
+        seen_error_rate: float = 1e-4,
+        max_in_memory: int = 10_000,
+        checkpoint_path: Path | None = None,
+        checkpoint_every: int = 50,
+        session: requests.Session | None = None,
+    ):
+        self.base_url = base_url
+        self.extract = extract or self._extract_html
+        self.render = render
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_urls = max_urls
+        self.host_budget = host_budget
+        self.check_external = check_external
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.use_robots = use_robots
+        self.use_sitemaps = use_sitemaps
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.session = session or get_session()
+        if extract_workers is None:
+            extract_workers = 1 if extract is not None or render is not None else 8
+        self._extract_slots = threading.BoundedSemaphore(max(1, extract_workers))
+        self._reuse_body = extract is None
+
+        self.seen = BloomFilter(seen_capacity, seen_error_rate)
+        spill = (self.checkpoint_path or Path(tempfile.gettempdir()) / f"crawl-{os.getpid()}").with_suffix(".frontier.jsonl")
+        self.frontier = Frontier(spill, max_in_memory=max_in_memory)
+        self.stats = CrawlStats()
+        self.broken: list[BrokenLink] = []
+        self.hosts: dict[str, int] = {}
+        self._in_flight: dict[str, FrontierItem] = {}
+        self._robots: RobotFileParser | None = None
+        self._seeded = False
+
+    # ---- frontier ----------------------------------------------------------
+
+    def _internal(self, url: str) -> bool:
+        return is_internal_url(self.base_url, url)
+
+    def enqueue(self, url: str, *, depth: int, referrer: str | None, page: bool) -> bool:
+        if not is_http_url(url):
+            return False
+        key = canonical_url(url)
+        internal = self._internal(key)
+        if not internal and not self.check_external:
+            return False
+        if not self.seen.add(key):
+            return False
+        self.frontier.push(FrontierItem(key, depth, referrer, page and internal and depth <= self.max_depth))
+        return True
+
+    def _seed(self) -> None:
+        self.enqueue(self.base_url, depth=0, referrer=None, page=True)
+        sitemaps: list[str] = []
+        if self.use_robots:
+            self._robots = self._load_robots()
+            if self._robots is not None:
+                sitemaps.extend(self._robots.site_maps() or [])
+        if self.use_sitemaps:
+            sitemaps.append(self.base_url.rstrip("/") + "/sitemap.xml")
+
+        fetched: set[str] = set()
+        queue = deque(sitemaps)
+        while queue and len(fetched) < MAX_SITEMAPS:
+            sitemap = queue.popleft()
+            if sitemap in fetched or not self._internal(sitemap):
+                continue
+            fetched.add(sitemap)
+            try:
+                resp = self.session.get(sitemap, timeout=self.timeout)
+            except requests.RequestException:
+                continue
+            if resp.status_code >= 400:
+                continue
+            pages, nested = _sitemap_locs(resp.content)
+            queue.extend(nested)
+            for url in pages:
+                # Sitemap pages are depth 1: linked from the site, not from a crawled page.
+                self.stats.sitemap_urls += self.enqueue(url, depth=1, referrer=sitemap, page=True)
+        self._seeded = True
+
+    def _load_robots(self) -> RobotFileParser | None:
+        robots_url = self.base_url.rstrip("/") + "/robots.txt"
+        try:
+            resp = self.session.get(robots_url, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if resp.status_code >= 400:
+            return None
+        parser = RobotFileParser(robots_url)
+        parser.parse(resp.text.splitlines())
+        return parser
+
+    def _extract_html(self, url: str, response: requests.Response | None = None) -> dict[str, list[str]]:
+        return collect_page_urls(
+            url, base_url=url, render=self.render, timeout=self.timeout, session=self.session, response=response
+        )
+
+    def _allowed(self, url: str) -> bool:
+        return self._robots is None or not self._internal(url) or self._robots.can_fetch(USER_AGENT, url)
+
+    def _next(self) -> FrontierItem | None:
+        while (item := self.frontier.pop()) is not None:
+            if self.stats.checked >= self.max_urls or (item.page and self.stats.pages >= self.max_pages):
+                # Out of budget: stop here and leave the rest queued for a resumed crawl.
+                self.frontier.push_front(item)
+                return None
+            if not self._allowed(item.url):
+                self.stats.robots_blocked += 1
+                continue
+            host = urlsplit(item.url).netloc
+            if self.hosts.get(host, 0) >= self.host_budget:
+                self.stats.over_budget += 1
+                continue
+            self.hosts[host] = self.hosts.get(host, 0) + 1
+            self.stats.checked += 1
+            self.stats.pages += item.page
+            return item
+        return None
+
+    # ---- one URL -----------------------------------------------------------
+
+    def _visit(self, item: FrontierItem) -> tuple[FrontierItem, UrlCheckResult, dict[str, list[str]] | None, bool]:
+        start = time.time()
+        paced = thread_waited_s()
+        # Internal pages are checked with a GET whose body the default extractor parses.
+        with_body = self._reuse_body and item.page and self._internal(item.url) and _looks_like_page(item.url, None)
+        try:
+            resp = head_or_get(item.url, timeout=self.timeout, session=self.session, with_body=with_body)
+        except requests.RequestException as exc:
+            elapsed_ms = (time.time() - start - (thread_waited_s() - paced)) * 1000.0
+            result = UrlCheckResult(item.url, False, None, None, str(exc), elapsed_ms)
+            return item, result, None, False
+        elapsed_ms = (time.time() - start - (thread_waited_s() - paced)) * 1000.0
+        found, failed = None, False
+        try:
+            final = str(resp.url or item.url)
+            # Redirects off-site (e.g. to a login provider) are checked, never expanded.
+            if resp.status_code < 400 and item.page and self._internal(final) and _looks_like_page(final, resp):
+                with self._extract_slots:
+                    try:
+                        found = self._extract_html(final, resp) if with_body else self.extract(final)
+                    except Exception:
+                        failed = True
+            result = UrlCheckResult(
+                url=item.url,
+                ok=resp.status_code < 400,
+                status_code=resp.status_code,
+                final_url=str(resp.url),
+                error=None,
+                elapsed_ms=elapsed_ms,
+                bytes_transferred=bytes_transferred(resp),
+            )
+        finally:
+            if with_body:
+                resp.close()
+        return item, result, found, failed
+
+    def _absorb(self, item: FrontierItem, result: UrlCheckResult, found: dict[str, list[str]] | None, failed: bool) -> None:
+        self._in_flight.pop(item.url, None)
+        if not result.ok:
+            self.stats.broken += 1
+            self.broken.append(BrokenLink(result, item.referrer))
+        self.stats.errors += failed
+        if not found:
+            return
+        for url in found.get("links", []):
+            self.enqueue(url, depth=item.depth + 1, referrer=item.url, page=True)
+        for key in ("scripts", "stylesheets", "images"):
+            for url in found.get(key, []):
+                self.enqueue(url, depth=item.depth + 1, referrer=item.url, page=False)
+
+    # ---- run ---------------------------------------------------------------
+
+    async def _run(self) -> None:
+        pending: set[asyncio.Future] = set()
+        since_checkpoint = 0
+        while True:
+            while len(pending) < self.workers and (item := self._next()) is not None:
+                self._in_flight[item.url] = item
+                pending.add(asyncio.ensure_future(asyncio.to_thread(self._visit, item)))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                self._absorb(*task.result())
+            since_checkpoint += len(done)
+            if self.checkpoint_path and since_checkpoint >= self.checkpoint_every:
+                self.save_checkpoint()
+                since_checkpoint = 0
+
+    def crawl(self, *, resume: bool = False) -> CrawlResult:
+        if resume and self.checkpoint_path and self.checkpoint_path.exists():
+            self.load_checkpoint()
+        elif not self._seeded:
+            # A leftover spill file belongs to an earlier crawl that is not being resumed.
+            self.frontier.spill_path.unlink(missing_ok=True)
+            self.frontier = Frontier(self.frontier.spill_path, max_in_memory=self.frontier.max_in_memory)
+        start = time.perf_counter()
+        if not self._seeded:
+            self._seed()
+        elif self.use_robots and self._robots is None:
+            self._robots = self._load_robots()
+        try:
+            asyncio.run(self._run())
+        finally:
+            if self.checkpoint_path:
+                self.save_checkpoint()
+        return CrawlResult(
+            stats=self.stats,
+            broken=list(self.broken),
+            complete=not len(self.frontier),
+            elapsed_s=time.perf_counter() - start,
+            hosts=dict(self.hosts),
+        )
+
+    # ---- checkpoint --------------------------------------------------------
+
+    def save_checkpoint(self) -> None:
+        # In-flight URLs go back to the front of the queue, with their budget refunded.
+        in_flight = list(self._in_flight.values())
+        stats, hosts = asdict(self.stats), dict(self.hosts)
+        stats["checked"] -= len(in_flight)
+        for item in in_flight:
+            hosts[urlsplit(item.url).netloc] -= 1
+            stats["pages"] -= item.page
+        frontier = self.frontier.state()
+        frontier["memory"] = [asdict(item) for item in in_flight] + frontier["memory"]
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "base_url": self.base_url,
+            "seeded": self._seeded,
+            "stats": stats,
+            "hosts": hosts,
+            "broken": [{"result": asdict(b.result), "referrer": b.referrer} for b in self.broken],
+            "seen": self.seen.state(),
+            "frontier": frontier,
+        }
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.checkpoint_path.parent, prefix=".crawl-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def load_checkpoint(self) -> None:
+        state = json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+        if state.get("version") != CHECKPOINT_VERSION or state.get("base_url") != self.base_url:
+            raise ValueError(f"{self.checkpoint_path} is not a checkpoint of a crawl of {self.base_url}")
+        self._seeded = bool(state["seeded"])
+        self.stats = CrawlStats(**state["stats"])
+        self.hosts = dict(state["hosts"])
+        self.broken = [BrokenLink(UrlCheckResult(**b["result"]), b["referrer"]) for b in state["broken"]]
+        self.seen = BloomFilter.from_state(state["seen"])
+        self.frontier = Frontier.from_state(
+            self.frontier.spill_path, state["frontier"], max_in_memory=self.frontier.max_in_memory
+        )
+
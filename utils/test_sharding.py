@@ -0,0 +1,131 @@
+"""Duration-aware test sharding (longest-processing-time-first bin packing).
+
+Per-test durations measured by ``tests/conftest.py`` are kept in a small JSON
+file as an exponentially weighted mean, so one slow outlier does not reshuffle
+every shard. Tests without history are estimated from their parametrized
+siblings, else from the median of everything known.
+
+Two uses:
+
+- CI nodes: ``--shard-count N --shard-index I`` keeps the tests LPT assigns to
+  node I. Every node computes the same plan locally from the same durations file.
+- xdist workers: test files are reordered longest-first, so ``--dist loadfile``
+  hands the expensive files out first (dynamic LPT) and module fixtures stay
+  together.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import statistics
+import tempfile
+import threading
+from pathlib import Path
+from typing import Hashable, Iterable
+
+DEFAULT_PATH = Path("reports") / "test_durations.json"
+DEFAULT_ESTIMATE_S = 1.0
+
+
+def _function_id(nodeid: str) -> str:
+    return nodeid.split("[", 1)[0]
+
+
+def _file_id(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+
+class DurationStore:
+    def __init__(self, path: Path = DEFAULT_PATH, *, alpha: float = 0.3, load: bool = True):
+        self.path = Path(path)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._pending: dict[str, float] = {}
+        self._data: dict[str, dict] = self._read() if load else {}
+        self._refresh_estimates()
+
+    def _read(self) -> dict[str, dict]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        return data.get("tests", {}) if isinstance(data, dict) else {}
+
+    def _refresh_estimates(self) -> None:
+        by_function: dict[str, list[float]] = {}
+        for nodeid, entry in self._data.items():
+            by_function.setdefault(_function_id(nodeid), []).append(float(entry["mean_s"]))
+        self._function_means = {fn: sum(v) / len(v) for fn, v in by_function.items()}
+        means = [float(entry["mean_s"]) for entry in self._data.values()]
+        self._fallback = statistics.median(means) if means else DEFAULT_ESTIMATE_S
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, nodeid: str) -> float | None:
+        entry = self._data.get(nodeid)
+        return float(entry["mean_s"]) if entry else None
+
+    def estimate(self, nodeid: str) -> float:
+        known = self.get(nodeid)
+        if known is not None:
+            return known
+        return self._function_means.get(_function_id(nodeid), self._fallback)
+
+    def record(self, nodeid: str, seconds: float) -> None:
+        with self._lock:
+            self._pending[nodeid] = max(0.0, float(seconds))
+
+    def save(self) -> int:
+        """Fold this run's durations into the file (re-read first, so parallel jobs only lose ties)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        data = self._read()
+        for nodeid, seconds in pending.items():
+            entry = data.get(nodeid)
+            if entry is None:
+                data[nodeid] = {"mean_s": round(seconds, 4), "runs": 1}
+            else:
+                mean = (1 - self.alpha) * float(entry["mean_s"]) + self.alpha * seconds
+                data[nodeid] = {"mean_s": round(mean, 4), "runs": int(entry.get("runs", 0)) + 1}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".durations-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "tests": dict(sorted(data.items()))}, f, indent=1)
+        os.replace(tmp, self.path)
+        self._data = data
+        self._refresh_estimates()
+        return len(pending)
+
+
+def lpt_partition(weights: dict[Hashable, float], shards: int) -> list[list[Hashable]]:
+    """Greedy LPT: heaviest job first onto the least-loaded shard. Deterministic for equal weights."""
+    shards = max(1, shards)
+    bins: list[list[Hashable]] = [[] for _ in range(shards)]
+    heap = [(0.0, i) for i in range(shards)]
+    for key in sorted(weights, key=lambda k: (-weights[k], str(k))):
+        load, index = heapq.heappop(heap)
+        bins[index].append(key)
+        heapq.heappush(heap, (load + weights[key], index))
+    return bins
+
+
+def shard_nodeids(nodeids: Iterable[str], store: DurationStore, *, count: int, index: int) -> set[str]:
+    """Nodeids LPT assigns to shard ``index`` (0-based) of ``count``."""
+    if not 0 <= index < count:
+        raise ValueError(f"shard index {index} out of range for {count} shards")
+    weights = {nodeid: store.estimate(nodeid) for nodeid in nodeids}
+    return set(lpt_partition(weights, count)[index])
+
+
+def longest_files_first(nodeids: list[str], store: DurationStore) -> list[str]:
+    """Reorder by file, heaviest file first; order inside a file is unchanged."""
+    totals: dict[str, float] = {}
+    for nodeid in nodeids:
+        totals[_file_id(nodeid)] = totals.get(_file_id(nodeid), 0.0) + store.estimate(nodeid)
+    rank = {f: n for n, f in enumerate(sorted(totals, key=lambda f: (-totals[f], f)))}
+    return sorted(nodeids, key=lambda nodeid: rank[_file_id(nodeid)])
+
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+from urllib.parse import urlsplit, urlunsplit
+
+T = TypeVar("T")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+    size: int
+
+
+def cache_key(url: str) -> str:
+    """Normalize a URL for cache lookups (case, default port, empty path, fragment)."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+@dataclass
+class _Entry(Generic[T]):
+    value: T
+    expires_at: float
+
+
+class UrlVerdictCache(Generic[T]):
+    """Thread-safe TTL + LRU cache that coalesces concurrent fetches of the same URL.
+
+    The first caller for a key performs the fetch; callers arriving while it is in
+    flight wait for, and share, that result. Exceptions are propagated to all waiters
+    and never cached.
+    """
+
+    def __init__(self, *, ttl_s: float = 600.0, max_entries: int = 2048):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry[T]] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self.configure(ttl_s=ttl_s, max_entries=max_entries)
+
+    def configure(self, *, ttl_s: float, max_entries: int) -> None:
+        with self._lock:
+            self.ttl_s = float(ttl_s)
+            self.max_entries = int(max_entries)
+            self._evict_over_capacity()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0 and self.max_entries > 0
+
+    def get_or_fetch(
+        self,
+        url: str,
+        fetch: Callable[[], T],
+        *,
+        cacheable: Callable[[T], bool] = lambda _value: True,
+    ) -> T:
+        if not self.enabled:
+            return fetch()
+
+        key = cache_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.value
+                del self._entries[key]
+
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._inflight[key] = pending
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = fetch()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable(value):
+                self._entries[key] = _Entry(value=value, expires_at=time.monotonic() + self.ttl_s)
+                self._entries.move_to_end(key)
+                self._evict_over_capacity()
+        pending.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
+
+    def _evict_over_capacity(self) -> None:
+        # Caller holds self._lock.
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self._evictions += 1
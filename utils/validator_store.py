@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils.url_cache import cache_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    status_code INTEGER NOT NULL,
+    final_url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class ValidatorRecord:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    status_code: int
+    final_url: str
+    headers: dict[str, str]
+    checked_at: float
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, not_modified: requests.Response) -> requests.Response:
+        """Rebuild the stored verdict, refreshed with headers from a 304 reply."""
+        resp = requests.Response()
+        resp.status_code = self.status_code
+        resp.url = self.final_url
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp.headers.update(not_modified.headers)
+        resp.headers.pop("Content-Length", None)
+        resp.reason = "OK (revalidated)"
+        resp.request = not_modified.request
+        resp.elapsed = not_modified.elapsed
+        resp._content = b""
+        return resp
+
+
+class ValidatorStore:
+    """SQLite-backed ETag/Last-Modified store shared across runs and xdist workers."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def get(self, url: str) -> ValidatorRecord | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, status_code, final_url, headers, checked_at "
+                "FROM validators WHERE url = ?",
+                (cache_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        return ValidatorRecord(
+            url=row[0],
+            etag=row[1],
+            last_modified=row[2],
+            status_code=int(row[3]),
+            final_url=row[4],
+            headers=json.loads(row[5]),
+            checked_at=float(row[6]),
+        )
+
+    def put(self, url: str, resp: requests.Response) -> bool:
+        """Store a response's validators; returns False when it has none."""
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return False
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators "
+                "(url, etag, last_modified, status_code, final_url, headers, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key(url),
+                    etag,
+                    last_modified,
+                    resp.status_code,
+                    str(resp.url),
+                    json.dumps(dict(resp.headers)),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+        return True
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE validators SET checked_at = ? WHERE url = ?",
+                (time.time(), cache_key(url)),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,237 @@
+"""Visual regression diffing for the RWD-*/CB-* screenshots.
+
+Screenshots under ``reports/screenshots`` are compared against baselines that
+mirror the same relative layout under ``reports/screenshots/baseline``. Each pair
+is split into fixed-size tiles and compared with NumPy in a few vectorized
+passes:
+
+1. tiles that are byte-identical are unchanged;
+2. tiles whose average hash (8x8 perceptual hash) matches and whose mean
+   absolute difference is below the noise floor are unchanged (anti-aliasing,
+   sub-pixel font rendering);
+3. the remaining tiles get a per-tile SSIM; below the threshold they are changed.
+
+Changed images get a heatmap overlay (red = per-pixel difference, boxes = changed
+tiles). Directories are processed in a process pool.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw
+
+SCREENSHOTS_DIR = Path("reports") / "screenshots"
+BASELINE_DIRNAME = "baseline"
+DIFF_DIRNAME = "diff"
+PATTERNS = ("RWD-*.png", "CB-*.png")
+
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+_HASH_SIZE = 8
+
+
+@dataclass(frozen=True)
+class DiffSettings:
+    tile: int = 64
+    ssim_threshold: float = 0.98
+    noise_floor: float = 2.0  # mean absolute difference (0-255) tolerated when hashes match
+
+
+@dataclass(frozen=True)
+class DiffResult:
+    name: str
+    status: str  # "match", "changed", "new" or "error"
+    changed_tiles: int = 0
+    total_tiles: int = 0
+    min_ssim: float = 1.0
+    size_mismatch: bool = False
+    heatmap: Path | None = None
+    error: str | None = None
+
+    @property
+    def changed_ratio(self) -> float:
+        return self.changed_tiles / self.total_tiles if self.total_tiles else 0.0
+
+    def describe(self) -> str:
+        if self.status in ("new", "error"):
+            return f"{self.name}: {self.status}{f' ({self.error})' if self.error else ''}"
+        extra = " size mismatch," if self.size_mismatch else ""
+        heatmap = f" -> {self.heatmap}" if self.heatmap else ""
+        return (
+            f"{self.name}: {self.status},{extra} {self.changed_tiles}/{self.total_tiles} tiles "
+            f"({self.changed_ratio:.1%}), min SSIM {self.min_ssim:.4f}{heatmap}"
+        )
+
+
+def _load(path: Path) -> np.ndarray:
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"), dtype=np.uint8)
+
+
+def _tiles(arr: np.ndarray, tile: int) -> np.ndarray:
+    """(H, W[, C]) -> (rows, cols, tile, tile[, C]); edges are padded by replication."""
+    h, w = arr.shape[:2]
+    pad_h, pad_w = (-h) % tile, (-w) % tile
+    if pad_h or pad_w:
+        pad = ((0, pad_h), (0, pad_w)) + ((0, 0),) * (arr.ndim - 2)
+        arr = np.pad(arr, pad, mode="edge")
+    rows, cols = arr.shape[0] // tile, arr.shape[1] // tile
+    shaped = arr.reshape(rows, tile, cols, tile, *arr.shape[2:])
+    return shaped.swapaxes(1, 2)
+
+
+def _average_hash(gray_tiles: np.ndarray) -> np.ndarray:
+    """Per-tile 64-bit average hash as a boolean (n, 8, 8) array."""
+    n, tile, _ = gray_tiles.shape
+    block = tile // _HASH_SIZE
+    small = gray_tiles[:, : block * _HASH_SIZE, : block * _HASH_SIZE].reshape(
+        n, _HASH_SIZE, block, _HASH_SIZE, block
+    ).mean(axis=(2, 4))
+    return small > small.mean(axis=(1, 2), keepdims=True)
+
+
+def _tile_ssim(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """SSIM over whole tiles; a/b are (n, tile, tile) float arrays."""
+    a = a.reshape(a.shape[0], -1)
+    b = b.reshape(b.shape[0], -1)
+    mu_a, mu_b = a.mean(axis=1), b.mean(axis=1)
+    var_a, var_b = a.var(axis=1), b.var(axis=1)
+    cov = ((a - mu_a[:, None]) * (b - mu_b[:, None])).mean(axis=1)
+    return ((2 * mu_a * mu_b + _C1) * (2 * cov + _C2)) / ((mu_a**2 + mu_b**2 + _C1) * (var_a + var_b + _C2))
+
+
+def _gray(rgb_tiles: np.ndarray) -> np.ndarray:
+    return rgb_tiles.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def compare_arrays(baseline: np.ndarray, current: np.ndarray, settings: DiffSettings = DiffSettings()):
+    """Return (changed tile mask, per-tile SSIM) over the common area of two RGB arrays.
+
+    Only tiles that are not byte-identical are converted to float and analysed.
+    """
+    if settings.tile < _HASH_SIZE:
+        raise ValueError(f"tile must be at least {_HASH_SIZE}px")
+    h = min(baseline.shape[0], current.shape[0])
+    w = min(baseline.shape[1], current.shape[1])
+    base_t, cur_t = _tiles(baseline[:h, :w], settings.tile), _tiles(current[:h, :w], settings.tile)
+    rows, cols = base_t.shape[:2]
+    ssim = np.ones((rows, cols), dtype=np.float64)
+    changed = np.zeros((rows, cols), dtype=bool)
+
+    differs = np.any(base_t != cur_t, axis=(2, 3, 4))
+    if not differs.any():
+        return changed, ssim
+
+    base_g, cur_g = _gray(base_t[differs]), _gray(cur_t[differs])
+    mean_abs = np.abs(base_g - cur_g).mean(axis=(1, 2))
+    same_hash = np.all(_average_hash(base_g) == _average_hash(cur_g), axis=(1, 2))
+    analyse = ~(same_hash & (mean_abs < settings.noise_floor))
+    if analyse.any():
+        scores = _tile_ssim(base_g[analyse], cur_g[analyse])
+        positions = tuple(idx[analyse] for idx in np.nonzero(differs))
+        ssim[positions] = scores
+        changed[positions] = scores < settings.ssim_threshold
+    return changed, ssim
+
+
+def write_heatmap(baseline: np.ndarray, current: np.ndarray, changed: np.ndarray, tile: int, path: Path) -> Path:
+    h = min(baseline.shape[0], current.shape[0])
+    w = min(baseline.shape[1], current.shape[1])
+    cur = Image.fromarray(np.ascontiguousarray(current[:h, :w]))
+    r, g, b = ImageChops.difference(Image.fromarray(np.ascontiguousarray(baseline[:h, :w])), cur).split()
+    diff = ImageChops.lighter(ImageChops.lighter(r, g), b)
+    # Faded current capture, with red blended in proportionally to the per-pixel (max channel) difference.
+    faded = cur.point(lambda v: 140 + v * 45 // 100)
+    mask = diff.point(lambda v: min(255, v * 4))
+    img = Image.composite(Image.new("RGB", (w, h), (255, 0, 0)), faded, mask)
+    draw = ImageDraw.Draw(img)
+    for row, col in zip(*np.nonzero(changed)):
+        x0, y0 = int(col) * tile, int(row) * tile
+        draw.rectangle([x0, y0, min(x0 + tile, w) - 1, min(y0 + tile, h) - 1], outline=(255, 0, 255), width=2)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    img.save(path, compress_level=1)
+    return path
+
+
+def compare_files(
+    baseline_path: Path, current_path: Path, *, name: str, heatmap_path: Path | None, settings: DiffSettings
+) -> DiffResult:
+    if not baseline_path.exists():
+        return DiffResult(name=name, status="new")
+    try:
+        if baseline_path.read_bytes() == current_path.read_bytes():
+            return DiffResult(name=name, status="match")
+        baseline, current = _load(baseline_path), _load(current_path)
+        changed, ssim = compare_arrays(baseline, current, settings)
+        size_mismatch = baseline.shape != current.shape
+        n_changed = int(changed.sum())
+        heatmap = None
+        if n_changed and heatmap_path is not None:
+            heatmap = write_heatmap(baseline, current, changed, settings.tile, heatmap_path)
+    except Exception as e:
+        return DiffResult(name=name, status="error", error=f"{type(e).__name__}: {e}")
+
+    return DiffResult(
+        name=name,
+        status="changed" if n_changed or size_mismatch else "match",
+        changed_tiles=n_changed,
+        total_tiles=int(changed.size),
+        min_ssim=float(ssim.min()),
+        size_mismatch=size_mismatch,
+        heatmap=heatmap,
+    )
+
+
+def _compare_job(job: tuple[Path, Path, str, Path | None, DiffSettings]) -> DiffResult:
+    baseline_path, current_path, name, heatmap_path, settings = job
+    return compare_files(baseline_path, current_path, name=name, heatmap_path=heatmap_path, settings=settings)
+
+
+def find_screenshots(root: Path = SCREENSHOTS_DIR, patterns: tuple[str, ...] = PATTERNS) -> list[Path]:
+    skip = {root / BASELINE_DIRNAME, root / DIFF_DIRNAME}
+    found = set()
+    for pattern in patterns:
+        for path in root.rglob(pattern):
+            if not any(parent in skip for parent in path.parents):
+                found.add(path)
+    return sorted(found)
+
+
+def diff_screenshots(
+    root: Path = SCREENSHOTS_DIR,
+    *,
+    settings: DiffSettings = DiffSettings(),
+    workers: int | None = None,
+    patterns: tuple[str, ...] = PATTERNS,
+) -> list[DiffResult]:
+    """Compare every screenshot under ``root`` with its baseline, in a process pool."""
+    root = Path(root)
+    jobs = []
+    for path in find_screenshots(root, patterns):
+        rel = path.relative_to(root)
+        heatmap = root / DIFF_DIRNAME / rel.with_name(f"{rel.stem}.diff.png")
+        jobs.append((root / BASELINE_DIRNAME / rel, path, rel.as_posix(), heatmap, settings))
+    if not jobs:
+        return []
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        return [_compare_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_compare_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def approve(root: Path = SCREENSHOTS_DIR, patterns: tuple[str, ...] = PATTERNS) -> int:
+    """Copy the current screenshots over their baselines; returns how many were copied."""
+    root = Path(root)
+    count = 0
+    for path in find_screenshots(root, patterns):
+        target = root / BASELINE_DIRNAME / path.relative_to(root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target)
+        count += 1
+    return count
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import codecs
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Iterable
 from urllib.parse import urljoin, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils import http_archive
+from utils.rate_limiter import RateLimitedSession, thread_waited_s
+from utils.url_cache import UrlVerdictCache
+from utils.validator_store import ValidatorStore
 
 
 @dataclass(frozen=True)
@@ -15,6 +28,7 @@ class UrlCheckResult:
     final_url: str | None
     error: str | None
     elapsed_ms: float | None
+    bytes_transferred: int = 0  # response body bytes actually received (0 for HEAD)
 
 
 def is_http_url(url: str) -> bool:
@@ -42,34 +56,195 @@ def normalize_url(base_url: str, url: str) -> str | None:
     return urljoin(base_url, url)
 
 
-def head_or_get(url: str, timeout: float = 10.0) -> requests.Response:
+_BROWSER_HEADERS = {
+    # Some CDNs/WAFs block default python-requests user agents (403/429).
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "*/*",
+}
+
+# Session-wide verdicts shared by every head_or_get/check_urls caller.
+URL_CACHE: UrlVerdictCache[requests.Response] = UrlVerdictCache()
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_validator_store: ValidatorStore | None = None
+
+
+def new_session(*, pool_maxsize: int = 16) -> requests.Session:
+    """Return a keep-alive, per-host rate-limited Session with one connection pool per host."""
+    session = RateLimitedSession()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(_BROWSER_HEADERS)
+    return http_archive.mount(session)
+
+
+def get_session() -> requests.Session:
+    """Process-wide shared Session so repeated checks reuse TCP/TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+def set_validator_store(store: ValidatorStore | None) -> None:
+    """Enable (or disable with None) conditional requests backed by a persistent store."""
+    global _validator_store
+    _validator_store = store
+
+
+def _is_stable_verdict(resp: requests.Response) -> bool:
+    # Throttling and server errors are transient; let the next caller retry.
+    return resp.status_code != 429 and resp.status_code < 500
+
+
+def bytes_transferred(resp: requests.Response) -> int:
+    """Body bytes received over the wire so far (before decompression; 0 for HEAD)."""
+    raw = getattr(resp, "raw", None)
     try:
-        return requests.head(
-            url,
-            allow_redirects=True,
-            timeout=timeout,
-            headers={
-                # Some CDNs/WAFs block default python-requests user agents (403/429).
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "*/*",
-            },
+        return int(raw.tell()) if raw is not None else len(resp._content or b"")
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _get_headers_only(
+    http: requests.Session, url: str, *, timeout: float, headers: dict[str, str], fallback: str
+) -> requests.Response:
+    """GET for servers that reject HEAD, without downloading the body."""
+    if fallback == "range":
+        resp = http.get(
+            url, allow_redirects=True, timeout=timeout, headers={**headers, "Range": "bytes=0-0"}, stream=True
         )
-    except requests.RequestException:
-        # Some servers block HEAD; fall back to GET (small timeout, no streaming).
-        return requests.get(
-            url,
-            allow_redirects=True,
-            timeout=timeout,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "*/*",
-            },
+        if resp.status_code == 206:
+            _ = resp.content  # one byte; the connection goes back to the pool
+            return resp
+        if resp.status_code != 416:
+            resp.close()
+            resp._content = b""
+            return resp
+        resp.close()  # 416: e.g. an empty body; retry without Range
+    resp = http.get(url, allow_redirects=True, timeout=timeout, headers=headers, stream=True)
+    # Closing after the headers drops the connection instead of draining a .deb/.pdf body.
+    resp.close()
+    resp._content = b""
+    return resp
+
+
+def head_or_get(
+    url: str,
+    timeout: float = 10.0,
+    *,
+    session: requests.Session | None = None,
+    use_cache: bool = True,
+    fallback: str = "stream",
+    with_body: bool = False,
+) -> requests.Response:
+    """Status and headers of ``url`` via HEAD, with a GET fallback that never downloads the body.
+
+    ``fallback="range"`` makes the GET ask for ``Range: bytes=0-0`` (the status is
+    then 206 where the server honours it); the default closes the stream after
+    the headers. ``with_body=True`` skips HEAD and returns a streamed GET whose
+    body is only downloaded when ``.content`` is first read; it is never cached.
+    ``bytes_transferred(resp)`` tells how much body actually came over the wire.
+    """
+    http = session or get_session()
+    store = _validator_store
+
+    if with_body:
+        return http.get(url, allow_redirects=True, timeout=timeout, headers=dict(_BROWSER_HEADERS), stream=True)
+
+    def fetch() -> requests.Response:
+        record = store.get(url) if store else None
+        headers = dict(_BROWSER_HEADERS)
+        if record:
+            headers.update(record.conditional_headers())
+        try:
+            resp = http.head(url, allow_redirects=True, timeout=timeout, headers=headers)
+        except requests.RequestException:
+            resp = None
+        if resp is None or resp.status_code in (405, 501):
+            # HEAD blocked or not implemented.
+            resp = _get_headers_only(http, url, timeout=timeout, headers=headers, fallback=fallback)
+
+        if store is None:
+            return resp
+        if resp.status_code == 304 and record:
+            # Unchanged since the last run: reuse the stored verdict and headers.
+            store.touch(url)
+            return record.to_response(resp)
+        # A 206 only describes the byte range asked for, not the resource.
+        if resp.status_code < 400 and resp.status_code != 206:
+            store.put(url, resp)
+        return resp
+
+    if not use_cache:
+        return fetch()
+    return URL_CACHE.get_or_fetch(url, fetch, cacheable=_is_stable_verdict)
+
+
+class _HostGate:
+    """Per-host concurrency limit plus a minimum spacing between request starts."""
+
+    def __init__(self, limit: int, delay_s: float):
+        self._slots = threading.BoundedSemaphore(max(1, limit))
+        self._lock = threading.Lock()
+        self._delay_s = delay_s
+        self._next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        with self._slots:
+            if self._delay_s:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._next_start - now
+                    self._next_start = max(now, self._next_start) + self._delay_s
+                if wait > 0:
+                    time.sleep(wait)
+            yield
+
+
+def _check_one(url: str, *, timeout: float, require_https: bool, gate: _HostGate) -> UrlCheckResult:
+    if require_https and urlparse(url).scheme != "https":
+        return UrlCheckResult(
+            url=url,
+            ok=False,
+            status_code=None,
+            final_url=None,
+            error="non-https",
+            elapsed_ms=None,
         )
 
+    with gate.slot():
+        start = time.time()
+        paced = thread_waited_s()
+        try:
+            resp = head_or_get(url, timeout=timeout)
+            elapsed_ms = (time.time() - start - (thread_waited_s() - paced)) * 1000.0
+            return UrlCheckResult(
+                url=url,
+                ok=resp.status_code < 400,
+                status_code=resp.status_code,
+                final_url=str(resp.url),
+                error=None,
+                elapsed_ms=elapsed_ms,
+                bytes_transferred=bytes_transferred(resp),
+            )
+        except requests.RequestException as exc:
+            elapsed_ms = (time.time() - start - (thread_waited_s() - paced)) * 1000.0
+            return UrlCheckResult(
+                url=url,
+                ok=False,
+                status_code=None,
+                final_url=None,
+                error=str(exc),
+                elapsed_ms=elapsed_ms,
+            )
+
 
 def check_urls(
     urls: list[str],
@@ -78,53 +253,31 @@ def check_urls(
     max_urls: int = 40,
     delay_s: float = 0.0,
     require_https: bool = False,
+    max_workers: int = 8,
+    per_host: int = 4,
 ) -> list[UrlCheckResult]:
-    results: list[UrlCheckResult] = []
-    for idx, url in enumerate(urls[:max_urls]):
-        if require_https and urlparse(url).scheme != "https":
-            results.append(
-                UrlCheckResult(
-                    url=url,
-                    ok=False,
-                    status_code=None,
-                    final_url=None,
-                    error="non-https",
-                    elapsed_ms=None,
-                )
-            )
-            continue
+    """Check up to ``max_urls`` URLs concurrently; results keep the input order.
 
-        start = time.time()
-        try:
-            resp = head_or_get(url, timeout=timeout)
-            elapsed_ms = (time.time() - start) * 1000.0
-            results.append(
-                UrlCheckResult(
-                    url=url,
-                    ok=resp.status_code < 400,
-                    status_code=resp.status_code,
-                    final_url=str(resp.url),
-                    error=None,
-                    elapsed_ms=elapsed_ms,
-                )
-            )
-        except requests.RequestException as exc:
-            elapsed_ms = (time.time() - start) * 1000.0
-            results.append(
-                UrlCheckResult(
-                    url=url,
-                    ok=False,
-                    status_code=None,
-                    final_url=None,
-                    error=str(exc),
-                    elapsed_ms=elapsed_ms,
-                )
-            )
+    ``max_workers`` bounds total in-flight requests and ``per_host`` bounds them per
+    host. ``delay_s`` is the minimum spacing between request starts to the same host.
+    """
+    targets = urls[:max_urls]
+    if not targets:
+        return []
+
+    gates: dict[str, _HostGate] = {}
+    for url in targets:
+        host = urlparse(url).netloc
+        if host not in gates:
+            gates[host] = _HostGate(per_host, delay_s)
 
-        if delay_s and idx < max_urls - 1:
-            time.sleep(delay_s)
+    def run(url: str) -> UrlCheckResult:
+        gate = gates[urlparse(url).netloc]
+        return _check_one(url, timeout=timeout, require_https=require_https, gate=gate)
 
-    return results
+    workers = max(1, min(max_workers, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="linkcheck") as pool:
+        return list(pool.map(run, targets))
 
 
 def collect_dom_urls(driver, *, base_url: str) -> dict[str, list[str]]:
@@ -157,6 +310,179 @@ def collect_dom_urls(driver, *, base_url: str) -> dict[str, list[str]]:
     return out
 
 
+_URL_KEYS = ("links", "scripts", "stylesheets", "images")
+# Element ids client-side frameworks mount into; an empty one means the page is rendered by JS.
+_MOUNT_IDS = frozenset({"root", "app", "__next", "__nuxt", "svelte", "ember-app"})
+_MIN_STATIC_TEXT = 512
+_MAX_HTML_BYTES = 8 * 1024 * 1024
+# Bot protection answers plain HTTP clients with these; a real browser usually gets through.
+_BLOCKED_STATUSES = (403, 429, 503)
+
+
+class _UrlExtractor(HTMLParser):
+    """Incremental counterpart of collect_dom_urls' selectors, plus JS-rendering signals."""
+
+    def __init__(self, page_url: str):
+        super().__init__(convert_charrefs=True)
+        self.doc_base = page_url
+        self.raw: dict[str, list[str]] = {key: [] for key in _URL_KEYS}
+        self.scripts = 0
+        self.text_chars = 0
+        self.empty_mount = False
+        self._has_base = False
+        self._in_raw_text = 0
+        self._inert = 0  # inside <noscript>/<template>: not in the live DOM querySelectorAll sees
+        self._open_mount: str | None = None
+
+    def _add(self, key: str, value: str | None) -> None:
+        try:
+            self.raw[key].append(urljoin(self.doc_base, (value or "").strip()))
+        except ValueError:
+            pass  # unparsable URL; the browser's new URL() rejects it too
+
+    def handle_starttag(self, tag, attrs):
+        self._open_mount = None
+        attrs = dict(attrs)
+        if tag in ("noscript", "template"):
+            self._inert += 1
+        if self._inert:
+            return
+        if tag == "base" and "href" in attrs and not self._has_base:
+            self.doc_base = urljoin(self.doc_base, attrs["href"] or "")
+            self._has_base = True
+        elif tag == "a" and "href" in attrs:
+            self._add("links", attrs["href"])
+        elif tag == "link" and "href" in attrs and attrs.get("rel") == "stylesheet":
+            self._add("stylesheets", attrs["href"])
+        elif tag == "img" and "src" in attrs:
+            self._add("images", attrs["src"])
+        if tag == "script":
+            self.scripts += 1
+            if "src" in attrs:
+                self._add("scripts", attrs["src"])
+        if tag in ("script", "style"):
+            self._in_raw_text += 1
+        elif attrs.get("id") in _MOUNT_IDS:
+            self._open_mount = tag
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == self._open_mount:
+            self.empty_mount = True
+        self._open_mount = None
+        if tag in ("noscript", "template") and self._inert:
+            self._inert -= 1
+        elif tag in ("script", "style") and self._in_raw_text and not self._inert:
+            self._in_raw_text -= 1
+
+    def handle_data(self, data):
+        if data.strip():
+            self._open_mount = None
+            if not self._in_raw_text and not self._inert:
+                self.text_chars += len(data.strip())
+
+
+@dataclass(frozen=True)
+class HtmlUrls:
+    urls: dict[str, list[str]]  # same keys and normalization as collect_dom_urls
+    js_rendered: bool  # the markup looks like a client-rendered shell; use a browser instead
+    status_code: int | None
+
+
+def parse_html_urls(chunks: Iterable[str], *, page_url: str, base_url: str, status_code: int | None = None) -> HtmlUrls:
+    """Feed HTML text chunks through an incremental parser; nothing holds the whole document."""
+    parser = _UrlExtractor(page_url)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    out: dict[str, list[str]] = {}
+    for key, values in parser.raw.items():
+        out[key] = sorted({nv for nv in (normalize_url(base_url, v) for v in values) if nv})
+    js_rendered = parser.scripts > 0 and (
+        parser.empty_mount or (not out["links"] and parser.text_chars < _MIN_STATIC_TEXT)
+    )
+    return HtmlUrls(urls=out, js_rendered=js_rendered, status_code=status_code)
+
+
+def _response_charset(resp: requests.Response) -> str:
+    # requests assumes ISO-8859-1 for text/* without a charset; HTML in the wild is UTF-8.
+    content_type = resp.headers.get("Content-Type", "")
+    if "charset=" in content_type.lower():
+        return resp.encoding or "utf-8"
+    return "utf-8"
+
+
+def fetch_html_urls(
+    url: str,
+    *,
+    base_url: str,
+    timeout: float = 10.0,
+    session: requests.Session | None = None,
+) -> HtmlUrls:
+    """Stream a page over HTTP into the incremental parser (no browser, bounded memory)."""
+    http = session or get_session()
+    with http.get(url, timeout=timeout, stream=True, headers={"Accept": "text/html,*/*;q=0.8"}) as resp:
+        return read_html_urls(resp, base_url=base_url)
+
+
+def read_html_urls(resp: requests.Response, *, base_url: str) -> HtmlUrls:
+    """Parse the body of a streamed GET (e.g. ``head_or_get(with_body=True)``); the caller closes it."""
+    # Error pages are parsed too: the browser path collects their links as well.
+    if "html" not in resp.headers.get("Content-Type", "text/html").lower():
+        return HtmlUrls({key: [] for key in _URL_KEYS}, False, resp.status_code)
+    decoder = codecs.getincrementaldecoder(_response_charset(resp))(errors="replace")
+
+    def chunks():
+        read = 0
+        for raw in resp.iter_content(chunk_size=64 * 1024):
+            read += len(raw)
+            yield decoder.decode(raw)
+            if read >= _MAX_HTML_BYTES:
+                return
+        yield decoder.decode(b"", final=True)
+
+    return parse_html_urls(chunks(), page_url=str(resp.url), base_url=base_url, status_code=resp.status_code)
+
+
+def snapshot_html_urls(path: Path, *, page_url: str, base_url: str) -> HtmlUrls:
+    """Parse a saved ``.htm`` snapshot as if it had been served at ``page_url``."""
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        return parse_html_urls(iter(lambda: f.read(64 * 1024), ""), page_url=page_url, base_url=base_url)
+
+
+def collect_page_urls(
+    url: str,
+    *,
+    base_url: str,
+    render: Callable[[str], dict[str, list[str]]] | None = None,
+    timeout: float = 10.0,
+    session: requests.Session | None = None,
+    response: requests.Response | None = None,
+) -> dict[str, list[str]]:
+    """collect_dom_urls' result for ``url``, from the raw HTML unless the page needs a browser.
+
+    ``render(url)`` (typically driver.get + collect_dom_urls) is only called for
+    client-rendered pages and pages that block plain HTTP clients. ``response`` is
+    an open streamed GET of ``url`` to parse instead of fetching the page again.
+    """
+    try:
+        if response is not None:
+            static = read_html_urls(response, base_url=base_url)
+        else:
+            static = fetch_html_urls(url, base_url=base_url, timeout=timeout, session=session)
+    except requests.RequestException:
+        if render is None:
+            raise
+        return render(url)
+    blocked = static.status_code in _BLOCKED_STATUSES
+    if render is not None and (static.js_rendered or blocked):
+        return render(url)
+    return static.urls
+
+
 def security_headers(url: str, timeout: float = 10.0) -> dict[str, str]:
     resp = head_or_get(url, timeout=timeout)
     return {k.lower(): v for k, v in resp.headers.items()}